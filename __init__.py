@@ -1,3 +1,5 @@
+import time
+
 import bpy
 
 from .config import __addon_name__
@@ -30,6 +32,8 @@ _addon_properties = {}
 # }
 
 def register():
+    # 注册耗时（包括导入插件的所有模块），numpy等耗时较长的模块在首次执行时才导入
+    start_time = time.perf_counter()
     # Register classes
     auto_load.init()
     auto_load.register()
@@ -39,7 +43,7 @@ def register():
     load_dictionary(dictionary)
     bpy.app.translations.register(__addon_name__, common_dictionary)
 
-    print("{} addon is installed.".format(__addon_name__))
+    print("{} addon is installed. ({:.1f} ms)".format(__addon_name__, (time.perf_counter() - start_time) * 1000))
 
 
 def unregister():
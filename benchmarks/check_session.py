@@ -0,0 +1,124 @@
+"""
+一致性检查：调整会话导出的模型应与相同参数下批处理生成的模型一致
+
+在Blender后台模式中，对每个合成模型（synth_pmx.py生成）：
+1. 以目标参数执行批处理，得到批处理结果；
+2. 以另一组参数开始调整会话，再将参数逐项改为目标参数（触发增量重新设置），导出会话结果；
+3. 通过core.pmx_diff逐项对比两个结果。
+
+分两种情形：incremental（仅修改抖动与碰撞参数）与 rescale（同时修改刚体缩放，重新设置胸部刚体大小、位置与碰撞），均不重新移植。
+需已安装MMD Tools与本插件。存在差异时退出码为1。
+
+用法：
+    blender -b --factory-startup --python benchmarks/check_session.py -- 模型目录 [--only small]
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import addon_utils
+import bpy
+
+ADDON_NAMES = ("mmd_jiggle_bones", "mmd_tools")
+SUFFIX = "RGBA"
+
+# 目标参数（批处理与会话导出时一致）
+TARGET = {"jiggle_adjustment_mode": "DEFAULT", "factor": 0.3, "collision": "DEFAULT", "collision_group_number": 14,
+          "rb_scale_factor": 0.8}
+# 会话开始时的参数，之后逐项改为目标参数
+START = {
+    "incremental": {"factor": 0.7, "collision": "NO_COLLISION", "collision_group_number": 12, "rb_scale_factor": 0.8},
+    "rescale": {"factor": 0.7, "collision": "NO_COLLISION", "collision_group_number": 12, "rb_scale_factor": 0.6},
+}
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="check_session.py", description="调整会话与批处理结果一致性检查")
+    parser.add_argument("models", help="synth_pmx.py的输出目录（包含models.json）")
+    parser.add_argument("--only", nargs="+", help="仅检查指定名称的模型")
+    return parser.parse_args(argv)
+
+
+def find_addon_module(name):
+    """插件可能以传统插件或扩展（bl_ext.*）的形式安装"""
+    for module in addon_utils.modules():
+        if module.__name__ == name or module.__name__.endswith("." + name):
+            return module.__name__
+    raise RuntimeError(f"未安装插件：{name}")
+
+
+def set_props(props, values):
+    for name, value in values.items():
+        setattr(props, name, value)
+
+
+def take_output(model_dir, source_name, target_dir):
+    """将插件生成的文件移动到target_dir，返回其路径"""
+    outputs = [f for f in os.listdir(model_dir) if f.lower().endswith(".pmx") and f != source_name]
+    if len(outputs) != 1:
+        raise RuntimeError(f"生成的文件数量异常：{outputs}")
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, outputs[0])
+    shutil.move(os.path.join(model_dir, outputs[0]), target)
+    return target
+
+
+def check_model(pmx_diff, info, work_dir):
+    props = bpy.context.scene.mmd_jiggle_tools_set_rgba
+    model_dir = os.path.dirname(info["path"])
+    source_name = os.path.basename(info["path"])
+    props.batch.directory = model_dir
+    props.batch.search_strategy = "LATEST"
+    props.batch.conflict_strategy = "RE_GENERATE"
+    props.batch.threshold = 0
+    props.batch.suffix = SUFFIX
+    props.batch.variants = ""
+
+    set_props(props, TARGET)
+    bpy.ops.mmd_jiggle_tools.set_rgba()
+    batch_output = take_output(model_dir, source_name, os.path.join(work_dir, "batch"))
+
+    results = {}
+    for case, start in START.items():
+        set_props(props, dict(TARGET, **start))
+        props.session_file = info["path"]
+        bpy.ops.mmd_jiggle_tools.start_session()
+        # 逐项改为目标参数，由属性的更新回调重新设置会话模型
+        set_props(props, TARGET)
+        bpy.ops.mmd_jiggle_tools.export_session()
+        bpy.ops.mmd_jiggle_tools.end_session()
+        session_output = take_output(model_dir, source_name, os.path.join(work_dir, case))
+        results[case] = pmx_diff.diff_files(batch_output, session_output)
+    return results
+
+
+def main():
+    args = parse_args()
+    addon = find_addon_module(ADDON_NAMES[0])
+    for name in ADDON_NAMES:
+        addon_utils.enable(find_addon_module(name), default_set=True)
+    pmx_diff = importlib.import_module(f"{addon}.core.pmx_diff")
+
+    with open(os.path.join(args.models, "models.json"), "r", encoding="utf-8") as f:
+        models = json.load(f)
+    work_dir = tempfile.mkdtemp(prefix="mmd_jiggle_check_session_")
+    failed = False
+    for name, info in models.items():
+        if args.only and name not in args.only:
+            continue
+        for case, (path_a, path_b, status, lines) in check_model(pmx_diff, info, work_dir).items():
+            print(f"[{name} {case}] {status}")
+            for line in lines:
+                print(f"    {line}")
+            failed = failed or status != pmx_diff.STATUS_SAME
+    print(f"结果文件：{work_dir}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
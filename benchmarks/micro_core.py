@@ -0,0 +1,82 @@
+"""
+微基准测试：在普通Python环境（无需Blender）中测量core中纯Python算法的耗时
+
+对合成模型（synth_pmx.py生成）逐个测量：PMX解析、骨骼索引构建、源模型分析、预检。
+结果以JSON Lines格式追加写入结果文件，每次运行每个模型一行。
+
+用法（在插件根目录下执行）：
+    python benchmarks/micro_core.py 模型目录 [--repeat 5] [--results 结果文件]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.analysis import filter_horizontal_bones, get_breast_bone_names  # noqa: E402
+from core.model import StandInModel  # noqa: E402
+from core.pmx import read_model  # noqa: E402
+from core.preflight import preflight_file  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="micro_core.py", description="core算法微基准测试")
+    parser.add_argument("models", help="synth_pmx.py的输出目录（包含models.json）")
+    parser.add_argument("--results", help="结果文件，默认为模型目录下的results_core.jsonl")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量的次数，取最小值")
+    parser.add_argument("--only", nargs="+", help="仅运行指定名称的模型")
+    return parser.parse_args()
+
+
+def measure(func, repeat):
+    """返回 (最小耗时, 最后一次的返回值)"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_model(path, repeat):
+    with open(path, "rb") as f:
+        data = f.read()
+    timings = {}
+    timings["read_model"], _ = measure(lambda: read_model(data), repeat)
+    timings["read_model_full"], pmx = measure(lambda: read_model(data, weights=True, positions=True), repeat)
+    timings["build_stand_in"], model = measure(lambda: StandInModel(pmx), repeat)
+    breast_names = get_breast_bone_names(model.bone_index)
+    timings["filter_horizontal_bones"], _ = measure(
+        lambda: filter_horizontal_bones(model.bone_index, breast_names), repeat)
+    timings["breast_vertex_positions"], _ = measure(lambda: model.breast_vertex_positions(breast_names), repeat)
+    timings["analyze_model"], analysis = measure(model.analyze, repeat)
+    timings["preflight_file"], _ = measure(lambda: preflight_file(path), repeat)
+    return {"timings_s": {k: round(v, 6) for k, v in timings.items()}, "error": analysis.error}
+
+
+def main():
+    args = parse_args()
+    with open(os.path.join(args.models, "models.json"), "r", encoding="utf-8") as f:
+        models = json.load(f)
+    results_path = args.results or os.path.join(args.models, "results_core.jsonl")
+    environment = {"python": platform.python_version(), "platform": platform.platform()}
+
+    for name, info in models.items():
+        if args.only and name not in args.only:
+            continue
+        result = run_model(info["path"], args.repeat)
+        record = {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"), "model": info,
+                  "repeat": args.repeat, **environment, **result}
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        timings = "，".join(f"{k} {v * 1000:.1f}ms" for k, v in result["timings_s"].items())
+        print(f"[{name}] {timings}" + (f"（分析失败：{result['error']}）" if result["error"] else ""))
+    print(f"结果已写入：{results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+性能测试：在Blender后台模式中对合成模型（synth_pmx.py生成）逐个执行RGBA式胸部物理移植，记录总耗时与各阶段耗时
+
+需已安装MMD Tools与本插件。各阶段耗时来自插件的分阶段性能分析（core/profiler.py）。
+结果以JSON Lines格式追加写入结果文件，每次运行每个模型一行。
+
+用法：
+    blender -b --factory-startup --python benchmarks/run_benchmark.py -- 模型目录 [--repeat 3] [--results 结果文件]
+"""
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import addon_utils
+import bpy
+
+ADDON_NAMES = ("mmd_jiggle_bones", "mmd_tools")
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="run_benchmark.py", description="RGBA式胸部物理移植性能测试")
+    parser.add_argument("models", help="synth_pmx.py的输出目录（包含models.json）")
+    parser.add_argument("--results", help="结果文件，默认为模型目录下的results.jsonl")
+    parser.add_argument("--repeat", type=int, default=1, help="每个模型的运行次数")
+    parser.add_argument("--only", nargs="+", help="仅运行指定名称的模型")
+    parser.add_argument("--warm", action="store_true", help="保留源模型分析缓存（默认每次运行前清除，测量完整流程）")
+    return parser.parse_args(argv)
+
+
+def find_addon_module(name):
+    """插件可能以传统插件或扩展（bl_ext.*）的形式安装"""
+    for module in addon_utils.modules():
+        if module.__name__ == name or module.__name__.endswith("." + name):
+            return module.__name__
+    raise RuntimeError(f"未安装插件：{name}")
+
+
+def remove_outputs(model_dir, source_name):
+    for f in os.listdir(model_dir):
+        if f.lower().endswith(".pmx") and f != source_name:
+            os.remove(os.path.join(model_dir, f))
+
+
+def run_once(addon, info, warm):
+    utils = importlib.import_module(f"{addon}.utils")
+    result_cache = importlib.import_module(f"{addon}.core.result_cache")
+    analysis_cache = importlib.import_module(f"{addon}.core.analysis_cache")
+    profiler = importlib.import_module(f"{addon}.core.profiler")
+
+    model_dir = os.path.dirname(info["path"])
+    remove_outputs(model_dir, os.path.basename(info["path"]))
+    if not warm:
+        source_hash = result_cache.hash_file(info["path"])
+        analysis_cache.AnalysisCache(utils.get_cache_dir("analysis")).discard(source_hash)
+
+    props = bpy.context.scene.mmd_jiggle_tools_set_rgba
+    props.batch.directory = model_dir
+    props.batch.search_strategy = "LATEST"
+    props.batch.conflict_strategy = "RE_GENERATE"
+    props.batch.threshold = 0
+
+    trace_path = os.path.join(tempfile.mkdtemp(prefix="mmd_jiggle_bench_"), "trace.json")
+    os.environ[profiler.PROFILE_ENV] = trace_path
+    start = time.perf_counter()
+    try:
+        bpy.ops.mmd_jiggle_tools.set_rgba()
+    finally:
+        del os.environ[profiler.PROFILE_ENV]
+    total = time.perf_counter() - start
+
+    stages = {}
+    # 各阶段常驻内存增量之和（KB）
+    rss_delta_kb = {}
+    if os.path.exists(trace_path):
+        with open(trace_path, "r", encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        for event in events:
+            if event["cat"] == "stage":
+                stages[event["name"]] = stages.get(event["name"], 0.0) + event["dur"] / 1e6
+                rss_delta_kb[event["name"]] = rss_delta_kb.get(event["name"], 0) + event["args"]["rss_delta_kb"]
+    outputs = [f for f in os.listdir(model_dir) if f.lower().endswith(".pmx") and f != os.path.basename(info["path"])]
+    return {"total_s": round(total, 4), "stages_s": {k: round(v, 4) for k, v in stages.items()},
+            "stages_rss_delta_kb": rss_delta_kb, "outputs": len(outputs)}
+
+
+def main():
+    args = parse_args()
+    addon = find_addon_module(ADDON_NAMES[0])
+    register_ms = {}
+    for name in ADDON_NAMES:
+        # 启用插件的耗时（包括导入模块与register()）
+        start = time.perf_counter()
+        addon_utils.enable(find_addon_module(name), default_set=True)
+        register_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+    print(f"插件启用耗时：{register_ms}")
+
+    with open(os.path.join(args.models, "models.json"), "r", encoding="utf-8") as f:
+        models = json.load(f)
+    results_path = args.results or os.path.join(args.models, "results.jsonl")
+    environment = {
+        "blender": bpy.app.version_string,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "addon": addon,
+        "register_ms": register_ms,
+    }
+
+    for name, info in models.items():
+        if args.only and name not in args.only:
+            continue
+        for run in range(1, args.repeat + 1):
+            result = run_once(addon, info, args.warm)
+            record = {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"), "model": info, "run": run,
+                      "warm": args.warm, **environment, **result}
+            with open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stages = "，".join(f"{k} {v:.2f}s" for k, v in sorted(result["stages_s"].items(), key=lambda kv: -kv[1]))
+            print(f"[{name} #{run}] 总耗时 {result['total_s']:.2f}s（{stages}）")
+    print(f"结果已写入：{results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+合成PMX模型生成器，用于性能测试（无需Blender，依赖numpy）
+
+生成的模型包含：椭球形躯干网格（顶点数可调）、上半身/上半身2/首/双臂骨骼与刚体、
+胸部骨骼链（可选布局）及对应的物理刚体与Joint、胸饰品骨骼链、用于凑足刚体数量的头发骨骼链。
+
+用法（在插件根目录下执行）：
+    python benchmarks/synth_pmx.py 输出目录 --preset all
+    python benchmarks/synth_pmx.py 输出目录 --vertices 200000 --rigid-bodies 800 --breast-layout numbered --breast-chain 4
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+
+import numpy as np
+
+# 胸部骨骼布局：standard 为“左胸”+“左胸1..n-1”，numbered 为“左胸1..n”，girlsfrontline 为“chest_l”+“chest_l_1..n-1”
+BREAST_LAYOUTS = ("standard", "numbered", "girlsfrontline")
+PRESETS = {
+    "small": dict(vertices=10_000, rigid_bodies=50, breast_layout="standard", breast_chain=1, accessories=0),
+    "medium": dict(vertices=100_000, rigid_bodies=300, breast_layout="standard", breast_chain=3, accessories=2),
+    "large": dict(vertices=300_000, rigid_bodies=1000, breast_layout="numbered", breast_chain=5, accessories=4),
+    "xlarge": dict(vertices=1_000_000, rigid_bodies=2000, breast_layout="girlsfrontline", breast_chain=3,
+                   accessories=4),
+}
+ACCESSORY_CHAIN_LENGTH = 3
+HAIR_CHAIN_LENGTH = 5
+
+# 顶点格式：全部使用BDEF2权重，骨骼索引为2字节
+VERTEX_DTYPE = np.dtype([
+    ("position", "<f4", 3), ("normal", "<f4", 3), ("uv", "<f4", 2),
+    ("weight_type", "u1"), ("bone1", "<i2"), ("bone2", "<i2"), ("weight", "<f4"), ("edge", "<f4"),
+])
+
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+
+    def raw(self, data):
+        self.parts.append(data)
+
+    def pack(self, fmt, *values):
+        self.parts.append(struct.pack("<" + fmt, *values))
+
+    def text(self, value):
+        data = value.encode("utf-8")
+        self.pack("i", len(data))
+        self.parts.append(data)
+
+    def getvalue(self):
+        return b"".join(self.parts)
+
+
+class SynthModel:
+    """合成模型的骨骼、刚体、Joint（PMX坐标系，单位同MMD）"""
+
+    def __init__(self):
+        self.bones = []  # (名称, 位置, 父骨骼索引, 尾部偏移)
+        self.rigid_bodies = []  # (名称, 骨骼索引, 群组, 形状, 大小, 位置, 模式)
+        self.joints = []  # (名称, 刚体A, 刚体B, 位置)
+        self.bone_index = {}
+        self.rb_index = {}
+
+    def add_bone(self, name, position, parent=None, tail=(0.0, 0.5, 0.0)):
+        self.bone_index[name] = len(self.bones)
+        self.bones.append((name, tuple(position), -1 if parent is None else self.bone_index[parent], tuple(tail)))
+        return name
+
+    def add_rigid_body(self, name, bone, group, mode, size=(0.3, 0.0, 0.0), shape=0):
+        position = self.bones[self.bone_index[bone]][1]
+        self.rb_index[name] = len(self.rigid_bodies)
+        self.rigid_bodies.append((name, self.bone_index[bone], group, shape, tuple(size), position, mode))
+        return name
+
+    def add_joint(self, name, rb_a, rb_b):
+        position = self.rigid_bodies[self.rb_index[rb_b]][5]
+        self.joints.append((name, self.rb_index[rb_a], self.rb_index[rb_b], position))
+
+
+def breast_bone_names(layout, side, count):
+    lr = "左" if side > 0 else "右"
+    if layout == "standard":
+        return [f"{lr}胸"] + [f"{lr}胸{i}" for i in range(1, count)]
+    if layout == "numbered":
+        return [f"{lr}胸{i}" for i in range(1, count + 1)]
+    suffix = "l" if side > 0 else "r"
+    return [f"chest_{suffix}"] + [f"chest_{suffix}_{i}" for i in range(1, count)]
+
+
+def build_skeleton(rigid_bodies, breast_layout, breast_chain, accessories):
+    model = SynthModel()
+    model.add_bone("センター", (0, 8, 0))
+    model.add_bone("上半身", (0, 11, 0), "センター")
+    model.add_bone("上半身2", (0, 13, 0), "上半身")
+    model.add_bone("首", (0, 16, 0), "上半身2")
+    for side, lr in ((-1, "右"), (1, "左")):
+        model.add_bone(f"{lr}腕", (1.5 * side, 15.5, 0), "上半身2", (-2.5 * side, 0, 0))
+        model.add_bone(f"{lr}ひじ", (4.0 * side, 15.5, 0), f"{lr}腕", (-2.5 * side, 0, 0))
+        model.add_bone(f"{lr}手首", (6.5 * side, 15.5, 0), f"{lr}ひじ", (-1.0 * side, 0, 0))
+
+    # 躯干刚体（骨骼追随）
+    for name in ("上半身", "上半身2", "首", "右腕", "右ひじ", "右手首", "左腕", "左ひじ", "左手首"):
+        model.add_rigid_body(name, name, 0, 0, (0.8, 1.0, 0.0), shape=2)
+
+    # 胸部骨骼链：由胸部根部向前延伸
+    breast_tips = {}
+    for side in (-1, 1):
+        names = breast_bone_names(breast_layout, side, breast_chain)
+        start = np.array((0.9 * side, 14.6, -0.4))
+        end = np.array((1.0 * side, 14.4, -1.8))
+        step = (end - start) / len(names)
+        parent, parent_rb = "上半身2", "上半身2"
+        for i, name in enumerate(names):
+            model.add_bone(name, start + step * i, parent, step)
+            model.add_rigid_body(name, name, 1, 1, (0.6, 0.0, 0.0))
+            model.add_joint(name, parent_rb, name)
+            parent = parent_rb = name
+        breast_tips[side] = parent
+
+    # 胸饰品骨骼链：胸部骨骼的子骨骼（非胸部骨骼）
+    for side in (-1, 1):
+        lr = "左" if side > 0 else "右"
+        for j in range(1, accessories // 2 + (accessories % 2 if side > 0 else 0) + 1):
+            parent = parent_rb = breast_tips[side]
+            head = np.array(model.bones[model.bone_index[parent]][1]) + (0.2 * side * j, -0.2, -0.2)
+            for i in range(1, ACCESSORY_CHAIN_LENGTH + 1):
+                name = f"{lr}胸飾{j}_{i}"
+                model.add_bone(name, head + (0, -0.4 * i, 0), parent, (0, -0.4, 0))
+                model.add_rigid_body(name, name, 2, 1, (0.1, 0.0, 0.0))
+                model.add_joint(name, parent_rb, name)
+                parent = parent_rb = name
+
+    # 头发骨骼链：凑足刚体数量
+    chain = 0
+    while len(model.rigid_bodies) < rigid_bodies:
+        chain += 1
+        angle = chain * 2.399963  # 黄金角，使头发链均匀分布在头部周围
+        head = np.array((math.cos(angle) * 1.2, 17.5, math.sin(angle) * 1.2))
+        parent = parent_rb = "首"
+        for i in range(1, HAIR_CHAIN_LENGTH + 1):
+            if len(model.rigid_bodies) >= rigid_bodies:
+                break
+            name = f"髪{chain}_{i}"
+            model.add_bone(name, head + (0, -0.8 * i, 0), parent, (0, -0.8, 0))
+            model.add_rigid_body(name, name, 3, 1, (0.2, 0.0, 0.0))
+            model.add_joint(name, parent_rb, name)
+            parent = parent_rb = name
+    return model
+
+
+def build_mesh(model, vertex_count, breast_layout, breast_chain):
+    """椭球形躯干，胸部区域的顶点以0.9的权重绑定到最近的胸部骨骼，其余顶点绑定到上半身2"""
+    rows = max(int(math.sqrt(vertex_count)), 3)
+    cols = max(vertex_count // rows, 3)
+    theta = np.linspace(0.05, math.pi - 0.05, rows, dtype=np.float32)[:, None]
+    phi = np.linspace(0, 2 * math.pi, cols, endpoint=False, dtype=np.float32)[None, :]
+    normal = np.stack(np.broadcast_arrays(np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)),
+                      axis=-1).reshape(-1, 3)
+    position = normal * np.array((2.0, 3.5, 1.3), dtype=np.float32) + np.array((0, 13, 0), dtype=np.float32)
+
+    vertices = np.zeros(len(position), dtype=VERTEX_DTYPE)
+    vertices["position"] = position
+    vertices["normal"] = normal
+    vertices["uv"] = np.stack(np.broadcast_arrays(phi / (2 * math.pi), theta / math.pi), axis=-1).reshape(-1, 2)
+    vertices["weight_type"] = 1
+    vertices["bone1"] = vertices["bone2"] = model.bone_index["上半身2"]
+    vertices["weight"] = 1.0
+    vertices["edge"] = 1.0
+
+    breast_bones = [n for side in (-1, 1) for n in breast_bone_names(breast_layout, side, breast_chain)]
+    breast_positions = np.array([model.bones[model.bone_index[n]][1] for n in breast_bones], dtype=np.float32)
+    distances = np.linalg.norm(position[:, None, :] - breast_positions[None, :, :], axis=-1)
+    nearest = distances.argmin(axis=1)
+    in_breast = (distances.min(axis=1) < 1.3) & (position[:, 2] < 0)
+    vertices["bone1"][in_breast] = np.array([model.bone_index[n] for n in breast_bones], dtype=np.int16)[
+        nearest[in_breast]]
+    vertices["weight"][in_breast] = 0.9
+
+    index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    a, b = index[:-1, :], np.roll(index[:-1, :], -1, axis=1)
+    c, d = index[1:, :], np.roll(index[1:, :], -1, axis=1)
+    faces = np.stack((a, c, b, b, c, d), axis=-1).reshape(-1)
+    return vertices, faces
+
+
+def write_pmx(filepath, name, model, vertices, faces):
+    w = _Writer()
+    w.raw(b"PMX ")
+    # PMX 2.0，UTF-8，无追加UV，索引大小：顶点4、纹理1、材质1、骨骼2、表情1、刚体2
+    w.pack("f", 2.0)
+    w.pack("9B", 8, 1, 0, 4, 1, 1, 2, 1, 2)
+    w.text(name)
+    w.text(name)
+    w.text("synthetic benchmark model")
+    w.text("synthetic benchmark model")
+
+    w.pack("i", len(vertices))
+    w.raw(vertices.tobytes())
+    w.pack("i", len(faces))
+    w.raw(faces.astype("<i4").tobytes())
+    # 纹理
+    w.pack("i", 0)
+    # 材质
+    w.pack("i", 1)
+    w.text("body")
+    w.text("body")
+    w.pack("4f3ff3f", 1, 1, 1, 1, 0, 0, 0, 5, 0.5, 0.5, 0.5)
+    w.pack("B4ff", 0, 0, 0, 0, 1, 1)
+    w.pack("bbBBb", -1, -1, 0, 1, 0)
+    w.text("")
+    w.pack("i", len(faces))
+    # 骨骼：可旋转、可见、可操作，尾部为偏移
+    w.pack("i", len(model.bones))
+    for bone_name, position, parent, tail in model.bones:
+        w.text(bone_name)
+        w.text(bone_name)
+        w.pack("3fhiH3f", *position, parent, 0, 0x001A, *tail)
+    # 表情
+    w.pack("i", 0)
+    # 显示枠
+    w.pack("i", 2)
+    w.text("Root")
+    w.text("Root")
+    w.pack("BiBh", 1, 1, 0, 0)
+    w.text("表情")
+    w.text("Exp")
+    w.pack("Bi", 1, 0)
+    # 刚体
+    w.pack("i", len(model.rigid_bodies))
+    for rb_name, bone, group, shape, size, position, mode in model.rigid_bodies:
+        w.text(rb_name)
+        w.text(rb_name)
+        w.pack("hBHB3f3f3f5fB", bone, group, 0xFFFF, shape, *size, *position, 0, 0, 0,
+               1.0, 0.5, 0.5, 0.0, 0.5, mode)
+    # Joint
+    w.pack("i", len(model.joints))
+    for joint_name, rb_a, rb_b, position in model.joints:
+        w.text(joint_name)
+        w.text(joint_name)
+        w.pack("Bhh", 0, rb_a, rb_b)
+        w.pack("3f3f", *position, 0, 0, 0)
+        w.pack("12f", 0, 0, 0, 0, 0, 0, -0.2, -0.2, -0.2, 0.2, 0.2, 0.2)
+        w.pack("6f", 0, 0, 0, 0, 0, 0)
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "wb") as f:
+        f.write(w.getvalue())
+
+
+def generate(output_dir, name, vertices, rigid_bodies, breast_layout, breast_chain, accessories):
+    """生成模型文件（输出目录/名称/名称.pmx），返回模型参数"""
+    model = build_skeleton(rigid_bodies, breast_layout, breast_chain, accessories)
+    vertex_data, faces = build_mesh(model, vertices, breast_layout, breast_chain)
+    filepath = os.path.join(output_dir, name, f"{name}.pmx")
+    write_pmx(filepath, name, model, vertex_data, faces)
+    return {
+        "name": name,
+        "path": filepath,
+        "vertices": len(vertex_data),
+        "faces": len(faces) // 3,
+        "bones": len(model.bones),
+        "rigid_bodies": len(model.rigid_bodies),
+        "joints": len(model.joints),
+        "breast_layout": breast_layout,
+        "breast_chain": breast_chain,
+        "accessories": accessories,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/synth_pmx.py", description="生成用于性能测试的合成PMX模型")
+    parser.add_argument("output", help="输出目录，每个模型位于单独的子目录中")
+    parser.add_argument("--preset", choices=tuple(PRESETS) + ("all",), help="预设规模")
+    parser.add_argument("--name", default="synth", help="自定义模型的名称")
+    parser.add_argument("--vertices", type=int, default=10_000)
+    parser.add_argument("--rigid-bodies", type=int, default=50)
+    parser.add_argument("--breast-layout", choices=BREAST_LAYOUTS, default="standard")
+    parser.add_argument("--breast-chain", type=int, default=1, choices=range(1, 10), metavar="1~9",
+                        help="每侧胸部骨骼数量")
+    parser.add_argument("--accessories", type=int, default=0, help="胸饰品骨骼链数量")
+    args = parser.parse_args(argv)
+
+    if args.preset:
+        configs = PRESETS.items() if args.preset == "all" else [(args.preset, PRESETS[args.preset])]
+    else:
+        configs = [(args.name, dict(vertices=args.vertices, rigid_bodies=args.rigid_bodies,
+                                    breast_layout=args.breast_layout, breast_chain=args.breast_chain,
+                                    accessories=args.accessories))]
+
+    manifest_path = os.path.join(args.output, "models.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    for name, config in configs:
+        info = generate(args.output, name, **config)
+        manifest[name] = info
+        print(f"已生成：{info['path']}（顶点{info['vertices']}，刚体{info['rigid_bodies']}，Joint{info['joints']}）")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
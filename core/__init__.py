@@ -0,0 +1,3 @@
+# 与Blender无关的纯Python逻辑（不得在此包中导入bpy）
+# 可在插件根目录下通过 python -m core.xxx 方式独立运行
+# 插件注册时会导入本包的所有模块，模块顶层不导入numpy、concurrent.futures等耗时较长的模块：numpy通过lazy_import.LazyModule在首次使用时导入，其余在使用时按需导入
@@ -0,0 +1,136 @@
+"""
+源模型分析：胸部骨骼识别、水平胸部骨骼筛选、伪胸部骨骼坐标计算、胸饰品信息
+
+仅依赖BoneIndex、JointGraph等数据结构与numpy，不访问bpy。
+插件中由Blender对象构建这些数据结构后调用，也可通过core.model中的StandInModel直接由PMX文件构建。
+"""
+import math
+
+from .analysis_cache import SourceAnalysis
+from .lazy_import import LazyModule
+from .naming import (LOW_BREAST_WEIGHT_MSG, NO_BREAST_BONES_MSG, NO_UPPER_BODY2_MSG, UPPER_BODY2_NAME,
+                     is_breast_bone_name, is_dummy_bone)
+
+np = LazyModule("numpy")
+
+# 水平胸部骨骼与水平面的夹角阈值
+HORIZONTAL_ANGLE_THRESHOLD = math.radians(30)
+
+
+def get_breast_bone_names(bone_index):
+    """获取胸部骨骼名称列表"""
+    return bone_index.filter(is_breast_bone_name)
+
+
+def filter_horizontal_bones(bone_index, breast_names):
+    """筛选与水平面夹角小于30度的胸部骨骼"""
+    # 骨骼在世界空间的向量
+    indices = bone_index.indices(breast_names)
+    bone_vecs = bone_index.world_tails[indices] - bone_index.world_heads[indices]
+    # 投影到 XY 平面后的长度
+    xy_lengths = np.hypot(bone_vecs[:, 0], bone_vecs[:, 1])
+    # 夹角 = 骨骼向量与水平投影向量的夹角
+    angles = np.arctan2(np.abs(bone_vecs[:, 2]), xy_lengths)
+
+    # 如果骨骼长度很小，跳过避免除零
+    valid = (np.linalg.norm(bone_vecs, axis=1) > 0) & (xy_lengths > 0)
+    return [name for name, ok in zip(breast_names, valid & (angles < HORIZONTAL_ANGLE_THRESHOLD)) if ok]
+
+
+def get_dummy_breast_coords(bone_index, breast_names, horizontal_names, world_cos):
+    """
+    根据胸部网格范围（胸部顶点的世界坐标，N×3）计算伪胸部骨骼的坐标
+    返回 (左head, 右head, 左tail, 右tail, x方向半径, z方向半径)，坐标为三元组
+    """
+    world_cos = np.asarray(world_cos, dtype=np.float64).reshape(-1, 3)
+    # 伪胸部骨骼的 tail.y 取自胸部顶点中 y 值最小的顶点
+    y_min = world_cos[:, 1].min()
+    # 伪胸部骨骼的 tail.x 取自胸部顶点中 一侧x 值最大的顶点 与 0 的均值
+    x_r = x_max = world_cos[:, 0].max()
+    avg_x = abs(x_max / 2)
+    # 伪胸部骨骼的 tail.z 取自胸部顶点中 z 值最大最小两点的均值
+    z_min, z_max = world_cos[:, 2].min(), world_cos[:, 2].max()
+    avg_z = (z_min + z_max) / 2
+    z_r = (z_max - z_min) / 2
+
+    # 从水平胸部骨骼中，获取head坐标中y值最大的骨骼，并计算伪胸部骨骼head位置
+    candidate_heads = bone_index.world_heads[bone_index.indices(horizontal_names or breast_names)]
+    max_head_co = candidate_heads[candidate_heads[:, 1].argmax()]
+    head_x, head_y = abs(float(max_head_co[0])), float(max_head_co[1])
+    return ((head_x, head_y, float(avg_z)), (-head_x, head_y, float(avg_z)),
+            (float(avg_x), float(y_min), float(avg_z)), (-float(avg_x), float(y_min), float(avg_z)),
+            float(x_r), float(z_r))
+
+
+def expand_accessory_bone_names(bone_index, accessory_breast_rel_map):
+    """根据胸饰骨骼关系表扩展所有子孙骨骼名称"""
+    accessory_bone_names = list(accessory_breast_rel_map.keys())
+    collected = set(accessory_bone_names)
+
+    # 对每个起始骨骼展开其子树
+    for root_name in list(accessory_bone_names):
+        for name in bone_index.subtree_names(root_name, include_self=False):
+            if name not in collected:
+                collected.add(name)
+                accessory_bone_names.append(name)
+
+    return accessory_bone_names
+
+
+def get_accessory_info(bone_index, breast_names, rb_bones, graph):
+    """
+    获取胸部饰品信息，用于后续处理：
+        1. 修复骨骼的父子关系
+        2. 修复Joint的连接关系
+        3. 设置胸饰品刚体的碰撞
+    rb_bones 为 刚体名称 → 关联骨骼名称，graph 为刚体与Joint的JointGraph
+    """
+    # 胸饰品指胸骨的子骨骼，例如胸飾、胸坠、胸結等（bbc 即 breast_bone_child）
+    # 记录胸饰品根骨骼和胸部骨骼的关系，供后续修复骨骼父子级用
+    breast_name_set = set(breast_names)
+    accessory_breast_rel_map = {}
+    for bb_name in breast_names:
+        for bbc_name in bone_index.children_names(bb_name):
+            if bbc_name not in breast_name_set and not is_dummy_bone(bbc_name):
+                accessory_breast_rel_map[bbc_name] = bb_name
+
+    # 获取胸部刚体名称集合与胸饰品刚体名称集合
+    breast_rb_names = {rb_name for rb_name, bone in rb_bones.items() if bone in breast_name_set}
+    accessory_bone_names = set(expand_accessory_bone_names(bone_index, accessory_breast_rel_map))
+    accessory_rb_names = {rb_name for rb_name, bone in rb_bones.items() if bone in accessory_bone_names}
+
+    # 记录链接胸和胸饰品的Joint，避免后续被删除，供后续修复Joint连接用
+    kept_joints = {}
+    for joint_name, (breast_rb_name, _) in graph.bridging_joints(breast_rb_names, accessory_rb_names).items():
+        # todo 根据实际位置确定左右
+        kept_joints[joint_name] = "L" if "左" in breast_rb_name else "R"
+    return accessory_breast_rel_map, kept_joints, accessory_bone_names
+
+
+def analyze_model(bone_index, rb_bones, graph, get_breast_vertex_positions):
+    """
+    分析源模型，返回SourceAnalysis
+    get_breast_vertex_positions(胸部骨骼名称列表) 返回胸部权重大于WEIGHT_THRESHOLD的顶点的世界坐标（N×3），
+    仅在其它校验通过后调用（通常是最耗时的一步）
+    """
+    breast_names = get_breast_bone_names(bone_index)
+    if not breast_names:
+        return SourceAnalysis.failed(NO_BREAST_BONES_MSG)
+
+    # 校验源模型是否存在名为“上半身2”的骨骼（先于耗时的顶点权重扫描）
+    if UPPER_BODY2_NAME not in bone_index:
+        return SourceAnalysis.failed(NO_UPPER_BODY2_MSG)
+
+    # 筛选源模型胸部骨骼中的水平胸部骨骼，用于计算位置
+    horizontal_names = filter_horizontal_bones(bone_index, breast_names)
+    # 胸部权重大于WEIGHT_THRESHOLD的顶点作为胸部网格范围，用于定位伪胸部骨骼的坐标
+    world_cos = get_breast_vertex_positions(breast_names)
+    if len(world_cos) == 0:
+        return SourceAnalysis.failed(LOW_BREAST_WEIGHT_MSG)
+
+    head_l, head_r, tail_l, tail_r, x_r, z_r = get_dummy_breast_coords(
+        bone_index, breast_names, horizontal_names, world_cos)
+    accessory_breast_rel_map, kept_joints, accessory_bone_names = get_accessory_info(
+        bone_index, breast_names, rb_bones, graph)
+    return SourceAnalysis(None, list(breast_names), head_l, head_r, tail_l, tail_r, x_r, z_r,
+                          accessory_breast_rel_map, kept_joints, sorted(accessory_bone_names))
@@ -0,0 +1,75 @@
+"""
+源模型分析结果缓存
+
+胸部骨骼识别、胸部顶点筛选、伪胸部骨骼坐标计算、胸饰品信息仅取决于源模型本身，
+以源模型文件内容哈希为键保存为JSON，修改抖动强度、刚体缩放、碰撞等参数后再次处理时无需重新分析。
+"""
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+Vec3 = Tuple[float, float, float]
+
+
+class SourceAnalysis(NamedTuple):
+    # 分析失败时的错误信息，此时其余字段无意义
+    error: Optional[str]
+    breast_names: List[str]
+    dummy_head_l: Vec3
+    dummy_head_r: Vec3
+    dummy_tail_l: Vec3
+    dummy_tail_r: Vec3
+    # 胸部区域在x、z方向上的半径
+    x_r: float
+    z_r: float
+    # 胸饰品根骨骼 → 胸部骨骼
+    accessory_breast_rel_map: Dict[str, str]
+    # 链接胸和胸饰品的Joint（MMD名称，即PMX中的名称）→ 左右（L/R），使用前需解析为当前场景中的物体
+    kept_joints: Dict[str, str]
+    accessory_bone_names: List[str]
+
+    @classmethod
+    def failed(cls, error):
+        zero = (0.0, 0.0, 0.0)
+        return cls(error, [], zero, zero, zero, zero, 0.0, 0.0, {}, {}, [])
+
+
+class AnalysisCache:
+    # 分析逻辑变化时递增，使旧的缓存失效（2：kept_joints由Blender物体名称改为MMD名称）
+    VERSION = 2
+
+    def __init__(self, cache_dir, context=""):
+        """context为影响分析结果的外部环境（如插件与MMD Tools版本），与缓存中记录的不一致时视为未命中"""
+        self.cache_dir = cache_dir
+        self.context = context
+
+    def _path(self, source_hash):
+        return os.path.join(self.cache_dir, source_hash[:2], f"{source_hash}.json")
+
+    def load(self, source_hash):
+        try:
+            with open(self._path(source_hash), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != self.VERSION or data.get("context") != self.context:
+            return None
+        fields = data["analysis"]
+        for name in ("dummy_head_l", "dummy_head_r", "dummy_tail_l", "dummy_tail_r"):
+            fields[name] = tuple(fields[name])
+        return SourceAnalysis(**fields)
+
+    def discard(self, source_hash):
+        try:
+            os.remove(self._path(source_hash))
+        except OSError:
+            pass
+
+    def save(self, source_hash, analysis):
+        path = self._path(source_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "context": self.context, "analysis": analysis._asdict()}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_path, path)
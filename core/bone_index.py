@@ -0,0 +1,104 @@
+from .lazy_import import LazyModule
+
+np = LazyModule("numpy")
+
+
+class BoneIndex:
+    """
+    骨架的数组化索引
+
+    - parents[i] 为第i根骨骼的父骨骼索引，根骨骼为-1
+    - 通过欧拉序（先序遍历）区间 [tin[i], tout[i]) 表示子树，祖孙判断为O(1)
+    - heads/tails 为骨架空间坐标，world_heads/world_tails 为世界空间坐标（N×3）
+    """
+
+    def __init__(self, names, parents, heads, tails, matrix_world=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.heads = np.asarray(heads, dtype=np.float64).reshape(-1, 3)
+        self.tails = np.asarray(tails, dtype=np.float64).reshape(-1, 3)
+        if matrix_world is None:
+            matrix_world = np.identity(4)
+        matrix_world = np.asarray(matrix_world, dtype=np.float64)
+        rot, loc = matrix_world[:3, :3], matrix_world[:3, 3]
+        self.world_heads = self.heads @ rot.T + loc
+        self.world_tails = self.tails @ rot.T + loc
+
+        count = len(self.names)
+        self.children = [[] for _ in range(count)]
+        for i, parent in enumerate(self.parents):
+            if parent >= 0:
+                self.children[parent].append(i)
+
+        # 欧拉序，使用显式栈代替递归，避免长骨骼链超出递归深度
+        self.order = []
+        self.tin = np.zeros(count, dtype=np.int32)
+        self.tout = np.zeros(count, dtype=np.int32)
+        for root in (i for i in range(count) if self.parents[i] < 0):
+            stack = [(root, False)]
+            while stack:
+                i, leaving = stack.pop()
+                if leaving:
+                    self.tout[i] = len(self.order)
+                    continue
+                self.tin[i] = len(self.order)
+                self.order.append(i)
+                stack.append((i, True))
+                stack.extend((c, False) for c in reversed(self.children[i]))
+
+    @classmethod
+    def from_armature(cls, armature):
+        """根据Blender骨架对象构建"""
+        bones = armature.data.bones
+        count = len(bones)
+        names = [b.name for b in bones]
+        index = {name: i for i, name in enumerate(names)}
+        parents = [index[b.parent.name] if b.parent else -1 for b in bones]
+        heads = np.empty(count * 3, dtype=np.float32)
+        tails = np.empty(count * 3, dtype=np.float32)
+        bones.foreach_get("head_local", heads)
+        bones.foreach_get("tail_local", tails)
+        return cls(names, parents, heads, tails, np.array(armature.matrix_world))
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.names)
+
+    def filter(self, predicate):
+        """按骨骼顺序返回满足条件的骨骼名称"""
+        return [name for name in self.names if predicate(name)]
+
+    def children_names(self, name):
+        i = self.index.get(name)
+        if i is None:
+            return []
+        return [self.names[c] for c in self.children[i]]
+
+    def is_descendant(self, name, ancestor_name, include_self=False):
+        """name 是否为 ancestor_name 的子孙骨骼"""
+        i, a = self.index.get(name), self.index.get(ancestor_name)
+        if i is None or a is None:
+            return False
+        if i == a:
+            return include_self
+        return self.tin[a] <= self.tin[i] < self.tout[a]
+
+    def subtree_names(self, name, include_self=True):
+        """返回以 name 为根的子树中的全部骨骼名称（先序）"""
+        i = self.index.get(name)
+        if i is None:
+            return []
+        start = self.tin[i] if include_self else self.tin[i] + 1
+        return [self.names[j] for j in self.order[start:self.tout[i]]]
+
+    def indices(self, names):
+        return np.fromiter((self.index[n] for n in names), dtype=np.int32)
+
+    def world_head(self, name):
+        return self.world_heads[self.index[name]]
+
+    def world_tail(self, name):
+        return self.world_tails[self.index[name]]
@@ -0,0 +1,104 @@
+from .lazy_import import LazyModule
+
+np = LazyModule("numpy")
+
+# 碰撞组数量  PE 1~16 MMD Tools 0~15
+GROUP_COUNT = 16
+ALL_GROUPS_BITS = (1 << GROUP_COUNT) - 1
+
+
+def mask_to_bits(mask):
+    """MMD Tools collision_group_mask（16个bool）→ 整数位掩码"""
+    bits = 0
+    for i, masked in enumerate(mask):
+        if masked:
+            bits |= 1 << i
+    return bits
+
+
+def bits_to_mask(bits):
+    """整数位掩码 → MMD Tools collision_group_mask（16个bool）"""
+    return tuple(bool(bits >> i & 1) for i in range(GROUP_COUNT))
+
+
+def groups_to_bits(groups):
+    bits = 0
+    for group in groups:
+        bits |= 1 << group
+    return bits
+
+
+class CollisionMatrix:
+    """
+    刚体碰撞设置的位掩码表示
+
+    - groups[i] 为第i个刚体的碰撞组
+    - masks[i] 的第g位为1表示第i个刚体不与碰撞组g碰撞（与MMD Tools的collision_group_mask含义一致）
+    - selector 可以是bool数组，也可以是刚体索引数组
+    """
+
+    def __init__(self, groups, masks):
+        self.groups = np.asarray(groups, dtype=np.int32)
+        self.masks = np.asarray(masks, dtype=np.uint32)
+
+    @classmethod
+    def from_rigid_bodies(cls, rigid_bodies):
+        """读取MMD刚体的碰撞组与碰撞掩码（每个刚体各读取一次）"""
+        groups = [rb.mmd_rigid.collision_group_number for rb in rigid_bodies]
+        masks = [mask_to_bits(rb.mmd_rigid.collision_group_mask) for rb in rigid_bodies]
+        return cls(groups, masks)
+
+    def copy(self):
+        return CollisionMatrix(self.groups.copy(), self.masks.copy())
+
+    def __len__(self):
+        return len(self.groups)
+
+    def append(self, group, bits):
+        """追加一个刚体，返回其索引"""
+        self.groups = np.append(self.groups, np.int32(group))
+        self.masks = np.append(self.masks, np.uint32(bits))
+        return len(self.groups) - 1
+
+    def set_group(self, selector, group):
+        self.groups[selector] = group
+
+    def set_masks(self, selector, bits):
+        self.masks[selector] = bits
+
+    def mask_groups(self, selector, groups):
+        """被选中的刚体不与指定碰撞组碰撞"""
+        self.masks[selector] |= np.uint32(groups_to_bits(groups))
+
+    def unmask_groups(self, selector, groups):
+        """被选中的刚体与指定碰撞组碰撞"""
+        self.masks[selector] &= np.uint32(~groups_to_bits(groups) & ALL_GROUPS_BITS)
+
+    def is_masked(self, index, group):
+        return bool(self.masks[index] >> group & 1)
+
+    def changed(self, original):
+        """与original相比碰撞组或碰撞掩码发生变化的刚体索引（新追加的刚体均视为变化）"""
+        count = len(original)
+        changed = (self.groups[:count] != original.groups) | (self.masks[:count] != original.masks)
+        return np.concatenate([np.flatnonzero(changed), np.arange(count, len(self))])
+
+    def interaction_matrix(self):
+        """
+        16×16 碰撞组交互矩阵
+        matrix[a, b] 为True表示存在碰撞组a的刚体与碰撞组b的刚体会发生碰撞（双方均未屏蔽对方的碰撞组）
+        """
+        one_hot = np.zeros((len(self), GROUP_COUNT), dtype=np.int64)
+        one_hot[np.arange(len(self)), self.groups] = 1
+        allow = ((self.masks[:, None] >> np.arange(GROUP_COUNT, dtype=np.uint32)) & 1) == 0
+        # counts[a, b] 为碰撞组a中允许与碰撞组b碰撞的刚体数量
+        counts = one_hot.T @ allow.astype(np.int64)
+        return (counts > 0) & (counts.T > 0)
+
+    def format(self):
+        """以PE的碰撞组编号（1~16）输出交互矩阵"""
+        matrix = self.interaction_matrix()
+        lines = ["    " + "".join(f"{g + 1:>3}" for g in range(GROUP_COUNT))]
+        for a in range(GROUP_COUNT):
+            lines.append(f"{a + 1:>3} " + "".join("  ●" if matrix[a, b] else "  ·" for b in range(GROUP_COUNT)))
+        return "\n".join(lines)
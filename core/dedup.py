@@ -0,0 +1,44 @@
+"""
+重复源文件的结果复用：内容相同的源模型只处理一次，其余副本复制生成的文件（并改写生成标记中的源文件名）
+"""
+import os
+from datetime import datetime
+
+from .pmx import read_header, replace_comment_e
+from .provenance import format_marker, parse_marker, set_marker
+
+
+def duplicate_output_path(output, source_path, duplicate_path, overwrite=False):
+    """
+    根据首个源文件的输出路径，得到重复源文件对应的输出路径
+    如 “a/模型 RGBA_soft.pmx”（源文件 a/模型.pmx）→ “b/模型副本 RGBA_soft.pmx”（源文件 b/模型副本.pmx）
+    目标文件已存在且overwrite为False时，与插件生成文件时一致，在名称后添加时间戳
+    """
+    source_name = os.path.splitext(os.path.basename(source_path))[0]
+    duplicate_name = os.path.splitext(os.path.basename(duplicate_path))[0]
+    output_name = os.path.basename(output)
+    rest = output_name[len(source_name):] if output_name.startswith(source_name) else " " + output_name
+    target = os.path.join(os.path.dirname(duplicate_path), duplicate_name + rest)
+    if os.path.exists(target) and not overwrite:
+        stem, ext = os.path.splitext(target)
+        target = f"{stem} {datetime.now().strftime('%Y%m%d%H%M%S')}{ext}"
+    return target
+
+
+def copy_output(src, dst, source_file):
+    """
+    复制首个源文件的输出，并将生成标记中的源文件名改为重复源文件的文件名source_file
+    使该输出在下次批处理时被识别为重复源文件的输出（而非首个源文件的输出）；无生成标记时直接复制
+    """
+    with open(src, "rb") as f:
+        data = f.read()
+    comment_e = read_header(data).comment_e
+    record = parse_marker(comment_e)
+    if record is not None:
+        record["file"] = source_file
+        data = replace_comment_e(data, set_marker(comment_e, format_marker(record)))
+    tmp_path = dst + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, dst)
+
@@ -0,0 +1,129 @@
+import os
+import re
+import struct
+
+from .pmx import PmxError, read_header_from_file, read_model_from_file
+from .provenance import parse_marker
+
+# 插件添加的上半身刚体，用于识别源模型已不在同目录下的旧版本输出
+LEGACY_OUTPUT_RB_NAMES = {"上半身2_L", "上半身2_R"}
+
+
+def build_output_pattern(suffix):
+    """匹配插件输出的文件名：“名称 后缀”“名称 后缀_版本”“名称 后缀 时间戳”，第一组为源模型名称"""
+    return re.compile(r'^(.+) ' + re.escape(suffix) + r'([_ ].*)?$')
+
+
+def read_marker(filepath):
+    """读取文件头中的生成标记，非PMX文件或无法解析时返回None"""
+    if not filepath.lower().endswith(".pmx"):
+        return None
+    try:
+        return parse_marker(read_header_from_file(filepath).comment_e)
+    except (OSError, PmxError, UnicodeDecodeError):
+        return None
+
+
+def is_legacy_output(filepath):
+    """依据内容判断是否为旧版本插件生成的文件（包含插件添加的上半身刚体），无法解析时返回False"""
+    try:
+        model = read_model_from_file(filepath)
+    except (OSError, PmxError, struct.error, IndexError, UnicodeDecodeError):
+        return False
+    return LEGACY_OUTPUT_RB_NAMES <= {rb.name for rb in model.rigid_bodies}
+
+
+def _get_cached(record, key, name, size, mtime, func):
+    """按文件大小与修改时间缓存在目录记录中"""
+    cache = record.extra.setdefault(key, {})
+    cached = cache.get(name)
+    if cached is not None and cached[0] == size and cached[1] == mtime:
+        return cached[2]
+    value = func(os.path.join(record.path, name))
+    cache[name] = [size, mtime, value]
+    return value
+
+
+def get_marker(record, name, size, mtime):
+    """获取文件的生成标记，按文件大小与修改时间缓存在目录记录中"""
+    return _get_cached(record, "markers", name, size, mtime, read_marker)
+
+
+def classify_files(record, threshold, suffix):
+    """
+    将目录中的模型文件分为原模型文件与插件生成的文件
+    返回 (原模型文件[(文件名, 修改时间)], 原模型文件（已处理）的文件名集合)
+
+    - 优先依据文件头中的生成标记识别，与名称后缀无关
+    - 没有生成标记的文件（旧版本插件生成）：文件名符合“源模型名称 后缀...”，且同目录下存在对应的源模型文件；
+      源模型文件不在同目录下时，再依据内容（是否包含插件添加的刚体）区分，结果同样缓存在目录记录中
+    """
+    names = {name for name, _, _ in record.files}
+    processed_pattern = build_output_pattern(suffix)
+    # 原模型文件
+    original_files = []
+    # 原模型文件（已处理）
+    processed_files = set()
+    for name, size, mtime in record.files:
+        if size <= threshold:
+            continue
+        marker = get_marker(record, name, size, mtime)
+        if marker is not None:
+            processed_files.add(marker.get("file", ""))
+            continue
+        name_no_ext, ext = os.path.splitext(name)
+        m = processed_pattern.match(name_no_ext)
+        if m and (f"{m.group(1)}{ext}" in names
+                  or _get_cached(record, "legacy_outputs", name, size, mtime, is_legacy_output)):
+            processed_files.add(f"{m.group(1)}{ext}")
+        else:
+            original_files.append((name, mtime))
+    return original_files, processed_files
+
+
+def select_files(record, spec):
+    """按检索模式与冲突时策略，从目录记录中选出待处理的文件名"""
+    original_files, processed_files = classify_files(record, spec.threshold, spec.suffix)
+    selected = []
+    if spec.search_strategy == 'LATEST':
+        if original_files:
+            selected = [max(original_files, key=lambda f: f[1])[0]]
+    elif spec.search_strategy == 'ALL':
+        selected = [name for name, _ in original_files]
+    if spec.conflict_strategy == 'SKIP':
+        selected = [f for f in selected if f not in processed_files]
+    return selected
+
+
+class FileDiscovery:
+    """
+    以生成器的方式逐个目录返回待处理文件，目录遍历完成前即可开始处理
+
+    - found 为目前已发现的待处理文件数量，done 为True时表示遍历已完成
+    - 遍历完成后保存扫描索引
+    """
+
+    def __init__(self, spec, index):
+        self.spec = spec
+        self.index = index
+        self.found = 0
+        self.total_pmx_count = 0
+        self.done = False
+
+    def __iter__(self):
+        for record in self.index.walk(self.spec.directory):
+            if not record.files:
+                continue
+            self.total_pmx_count += len(record.files)
+            # 经检索模式和冲突时筛选后的模型文件
+            selected = select_files(record, self.spec)
+            if not selected:
+                continue
+            print(f"当前模型目录：{record.path}，原模型文件（检索模式-{self.spec.search_strategy} "
+                  f"冲突时-{self.spec.conflict_strategy}）：{selected}")
+            for f in selected:
+                self.found += 1
+                yield os.path.join(record.path, f)
+        self.index.save()
+        self.done = True
+        print(f"扫描索引已更新，重新扫描目录数量：{self.index.rescanned}")
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+
+class JointGraph:
+    """
+    刚体与Joint之间的邻接关系
+
+    - 节点为刚体名称，边为Joint名称，均使用集合存储，成员判断为O(1)
+    - Joint的某一端为空（或不属于当前刚体集合）时，视为悬空Joint
+    """
+
+    def __init__(self, rb_names, joint_ends):
+        # 刚体名称集合
+        self.rb_names = set(rb_names)
+        # joint名称 -> (object1名称, object2名称)，端点为空时为None
+        self.joint_ends = dict(joint_ends)
+        # 刚体名称 -> 与其相连的joint名称集合
+        self.rb_joints = defaultdict(set)
+        for joint_name, ends in self.joint_ends.items():
+            for rb_name in ends:
+                if rb_name is not None:
+                    self.rb_joints[rb_name].add(joint_name)
+        # 名称 -> Blender对象，仅在通过from_objects构建时存在
+        self.rbs = {}
+        self.joints = {}
+
+    @classmethod
+    def from_objects(cls, joint_parent, rb_parent, by_name_j=False):
+        """
+        根据MMD模型的Joint父级和刚体父级构建
+        by_name_j为True时以MMD名称（mmd_rigid.name_j、mmd_joint.name_j）为节点与边，与PMX文件中的名称一致，
+        不受场景中同名物体（名称带.001等后缀）的影响，用于需要缓存的源模型分析；否则以Blender物体名称为节点与边
+        """
+        def rb_key(rb):
+            return rb.mmd_rigid.name_j if by_name_j else rb.name
+
+        rbs = {rb_key(rb): rb for rb in rb_parent.children}
+        joints = {}
+        joint_ends = {}
+        for joint in joint_parent.children:
+            rbc = joint.rigid_body_constraint
+            object1, object2 = rbc.object1, rbc.object2
+            joint_name = joint.mmd_joint.name_j if by_name_j else joint.name
+            joints[joint_name] = joint
+            joint_ends[joint_name] = (rb_key(object1) if object1 else None, rb_key(object2) if object2 else None)
+        graph = cls(rbs.keys(), joint_ends)
+        graph.rbs = rbs
+        graph.joints = joints
+        return graph
+
+    def joints_touching(self, rb_names):
+        """与指定刚体相连的joint名称集合"""
+        touching = set()
+        for rb_name in rb_names:
+            touching |= self.rb_joints.get(rb_name, set())
+        return touching
+
+    def dangling_joints(self):
+        """端点为空或端点不属于当前刚体集合的joint名称集合"""
+        return {joint_name for joint_name, ends in self.joint_ends.items()
+                if any(rb_name is None or rb_name not in self.rb_names for rb_name in ends)}
+
+    def bridging_joints(self, rb_names_a, rb_names_b):
+        """
+        连接两组刚体的joint
+        返回 joint名称 -> (a侧刚体名称, b侧刚体名称)
+        """
+        rb_names_a = set(rb_names_a)
+        rb_names_b = set(rb_names_b)
+        bridging = {}
+        # 仅遍历与a侧刚体相连的joint，而非全部joint
+        for joint_name in self.joints_touching(rb_names_a):
+            rb_name1, rb_name2 = self.joint_ends[joint_name]
+            if rb_name1 in rb_names_a and rb_name2 in rb_names_b:
+                bridging[joint_name] = (rb_name1, rb_name2)
+            elif rb_name1 in rb_names_b and rb_name2 in rb_names_a:
+                bridging[joint_name] = (rb_name2, rb_name1)
+        return bridging
+
+    def remove_rigid_bodies(self, rb_names):
+        """移除刚体，与其相连的joint对应端点置空，返回受影响的joint名称集合"""
+        affected = set()
+        for rb_name in rb_names:
+            self.rb_names.discard(rb_name)
+            self.rbs.pop(rb_name, None)
+            for joint_name in self.rb_joints.pop(rb_name, set()):
+                ends = self.joint_ends.get(joint_name)
+                if ends is None:
+                    continue
+                self.joint_ends[joint_name] = tuple(None if n == rb_name else n for n in ends)
+                affected.add(joint_name)
+        return affected
+
+    def remove_joints(self, joint_names):
+        """移除joint"""
+        for joint_name in joint_names:
+            ends = self.joint_ends.pop(joint_name, ())
+            self.joints.pop(joint_name, None)
+            for rb_name in ends:
+                if rb_name is not None:
+                    self.rb_joints.get(rb_name, set()).discard(joint_name)
@@ -0,0 +1,82 @@
+"""
+批处理日志：以追加的方式记录每个源文件的开始、完成与失败，用于中断后继续处理
+
+每行一条JSON记录，中断时写入不完整的行在读取时忽略。
+继续处理时，以每个源文件的最后一条记录为准：
+    - 已完成，且结果键一致、生成的文件均存在且未被重设Joint限制：跳过
+    - 因模型本身的问题失败（如缺少胸部骨骼），且结果键一致：跳过，再次处理结果相同
+    - 仅有开始记录（处理过程中中断），或因暂时性错误（导入/导出异常等）失败：重新处理
+"""
+import json
+import os
+import time
+
+from .result_cache import outputs_intact
+
+EVENT_STARTED = "started"
+EVENT_COMPLETED = "completed"
+EVENT_FAILED = "failed"
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class BatchJournal:
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        # 源文件 → 最后一条记录
+        self.entries = {}
+        if os.path.exists(journal_path):
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry["source"]] = entry
+        self._file = None
+
+    def resume_state(self, source_path, key, digest):
+        """
+        继续处理时该源文件的状态：
+        返回 (是否跳过, 原因)，无需跳过时原因为None
+        """
+        entry = self.entries.get(_normalize(source_path))
+        if entry is None or entry.get("key") != key:
+            return False, None
+        if entry["event"] == EVENT_COMPLETED:
+            if outputs_intact(entry["outputs"], digest):
+                return True, "上次运行已完成"
+            return False, None
+        if entry["event"] == EVENT_FAILED and not entry["transient"]:
+            return True, f"上次运行失败：{entry['message']}"
+        return False, None
+
+    def started(self, source_path, key):
+        self._append({"event": EVENT_STARTED, "source": _normalize(source_path), "key": key})
+
+    def completed(self, source_path, key, outputs):
+        self._append({"event": EVENT_COMPLETED, "source": _normalize(source_path), "key": key,
+                      "outputs": list(outputs)})
+
+    def failed(self, source_path, key, message, transient):
+        """transient为True表示暂时性错误，继续处理时会重试"""
+        self._append({"event": EVENT_FAILED, "source": _normalize(source_path), "key": key, "message": message,
+                      "transient": transient})
+
+    def _append(self, entry):
+        entry["time"] = round(time.time(), 3)
+        self.entries[entry["source"]] = entry
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # 每条记录立即刷新并落盘，Blender崩溃时不丢失
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,20 @@
+import importlib
+
+
+class LazyModule:
+    """
+    模块代理，首次访问属性时才导入实际模块
+    用于在模块顶层声明numpy等耗时较长的依赖（如 np = LazyModule("numpy")），插件注册时不会导入
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        # 仅在实例中不存在该属性时调用；取得的属性缓存到实例上，之后的访问不再经过此方法
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attr)
+        setattr(self, attr, value)
+        return value
@@ -0,0 +1,96 @@
+"""
+由PMX文件直接构建的源模型数据，不依赖bpy与MMD Tools
+
+按MMD Tools导入时的规则换算（骨骼名称转换、坐标轴 xzy、缩放0.08），
+提供与插件中由Blender对象构建时相同的BoneIndex、JointGraph等数据结构，
+可在普通Python环境中运行源模型分析（core.analysis），用于测试与性能测试。
+
+用法（在插件根目录下执行）：
+    python -m core.model 模型文件 [模型文件 ...]
+"""
+import sys
+import time
+
+from .analysis import analyze_model
+from .bone_index import BoneIndex
+from .joint_graph import JointGraph
+from .lazy_import import LazyModule
+from .naming import WEIGHT_THRESHOLD, get_blender_bone_names
+from .pmx import BONE_TAIL_IS_BONE, read_model_from_file
+
+np = LazyModule("numpy")
+
+# MMD Tools导入时的默认缩放
+IMPORT_SCALE = 0.08
+
+
+def to_blender_coords(co, scale=IMPORT_SCALE):
+    """PMX坐标 → Blender坐标（N×3）"""
+    co = np.asarray(co, dtype=np.float64).reshape(-1, 3)
+    return co[:, (0, 2, 1)] * scale
+
+
+class StandInModel:
+    """
+    源模型的替身，字段与插件中由Blender对象获取的数据一一对应
+
+    - bone_index: 骨骼（名称为导入后的名称）
+    - rb_bones: 刚体名称 → 关联骨骼名称
+    - graph: 刚体与Joint的JointGraph
+    """
+
+    def __init__(self, model, scale=IMPORT_SCALE):
+        self.model = model
+        names = get_blender_bone_names(model.bones)
+        heads = to_blender_coords([b.position for b in model.bones], scale)
+        tails = heads.copy()
+        for i, bone in enumerate(model.bones):
+            if bone.flags & BONE_TAIL_IS_BONE:
+                if 0 <= bone.tail < len(model.bones):
+                    tails[i] = heads[bone.tail]
+            else:
+                tails[i] = heads[i] + to_blender_coords(bone.tail, scale)[0]
+        self.bone_index = BoneIndex(names, [b.parent for b in model.bones], heads, tails)
+
+        rb_names = [rb.name for rb in model.rigid_bodies]
+        self.rb_bones = {rb.name: names[rb.bone] if 0 <= rb.bone < len(names) else ""
+                         for rb in model.rigid_bodies}
+        joint_ends = {}
+        for joint in model.joints:
+            ends = tuple(rb_names[i] if 0 <= i < len(rb_names) else None for i in (joint.rigid_a, joint.rigid_b))
+            joint_ends[joint.name] = ends
+        self.graph = JointGraph(rb_names, joint_ends)
+
+        self.positions = None
+        if model.positions is not None:
+            self.positions = to_blender_coords(model.positions, scale)
+
+    @classmethod
+    def from_file(cls, filepath, scale=IMPORT_SCALE):
+        return cls(read_model_from_file(filepath, weights=True, positions=True), scale)
+
+    def breast_vertex_positions(self, bone_names):
+        """胸部权重（各胸部骨骼权重之和）大于WEIGHT_THRESHOLD的顶点坐标（N×3）"""
+        bone_indices = set(self.bone_index.indices(bone_names).tolist())
+        indices = [i for i, vertex_weights in enumerate(self.model.weights)
+                   if sum(w for b, w in vertex_weights if b in bone_indices) > WEIGHT_THRESHOLD]
+        return self.positions[indices]
+
+    def analyze(self):
+        """源模型分析，返回SourceAnalysis"""
+        return analyze_model(self.bone_index, self.rb_bones, self.graph, self.breast_vertex_positions)
+
+
+def main(argv=None):
+    for filepath in (sys.argv[1:] if argv is None else argv):
+        start = time.perf_counter()
+        model = StandInModel.from_file(filepath)
+        loaded = time.perf_counter()
+        analysis = model.analyze()
+        end = time.perf_counter()
+        print(f"{filepath}（读取 {loaded - start:.3f}s，分析 {end - loaded:.3f}s）")
+        print(f"    {analysis.error or analysis}")
+
+
+if __name__ == "__main__":
+    main()
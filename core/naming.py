@@ -0,0 +1,116 @@
+"""
+源模型的命名规则：胸部骨骼、胸部刚体及必需骨骼的识别，插件处理流程与预检共用
+"""
+import re
+import string
+
+UPPER_BODY2_NAME = "上半身2"
+# 胸部权重阈值
+WEIGHT_THRESHOLD = 0.25
+
+# 源模型不满足处理条件时的错误信息
+NO_BREAST_BONES_MSG = "源模型中未找到胸部骨骼"
+NO_UPPER_BODY2_MSG = f"源模型中未找到名称为“{UPPER_BODY2_NAME}”的骨骼"
+LOW_BREAST_WEIGHT_MSG = f"源模型中胸部顶点权重均小于{WEIGHT_THRESHOLD}，无法获取有效胸部网格范围"
+
+BREAST_BONE_PATTERN = re.compile(
+    r'^胸'  # 开头必须是“胸”
+    r'([_上下前後先間親亲変形回転支え基W筋]*)'
+    r'([0-9０-９])?'  # 可选的单独数字（半角或全角）
+    r'([錘先D])?'
+    r'(\.\d{3})?'  # 可选的前置序号
+    r'(\.[LR])?'  # 可选的左右标识
+    r'(\.\d{3})?'  # 可选的后置序号
+    r'$'
+)
+
+BREAST_RB_PATTERN = re.compile(
+    r'^([_左右胸]*)'  # 开头必须是“胸”
+    r'([_上下前後先間親亲変形回転支え基W筋]*)'
+    r'([0-9０-９])?'  # 可选的单独数字（半角或全角）
+    r'([錘先D])?'
+    r'(\.\d{3})?'  # 可选的前置序号
+    r'(\.[LR])?'  # 可选的左右标识
+    r'(\.\d{3})?'  # 可选的后置序号
+    r'$'
+)
+
+
+def is_dummy_bone(name):
+    return name.startswith("_dummy_") or name.startswith("_shadow_")
+
+
+# 少女前线2单独校验
+def check_girlsfrontline_breast_bones_and_rbs(b_name):
+    if "chest_r" in b_name.lower():
+        return True
+    if "chest_l" in b_name.lower():
+        return True
+    if "bone" in b_name.lower() and "ches" in b_name.lower():
+        return True
+    return False
+
+
+def is_breast_bone_name(b_name):
+    """
+    判断是否为胸部骨骼
+
+    - 通过正则来识别模型中的胸部骨骼。
+    - 少女前线2的胸部骨骼单独处理。
+    """
+    if is_dummy_bone(b_name):
+        return False
+    if BREAST_BONE_PATTERN.match(b_name):
+        return True
+    return check_girlsfrontline_breast_bones_and_rbs(b_name)
+
+
+def to_blender_bone_name(name):
+    """
+    PMX骨骼名称 → 导入Blender后的骨骼名称（MMD Tools默认将“左”“右”转换为“.L”“.R”后缀）
+    如 左胸 → 胸.L，用于在不导入模型的情况下套用上述规则
+    """
+    m = re.match(r'^(.*)左(.*)$', name)
+    if m:
+        name = m.group(1) + m.group(2) + ".L"
+    m = re.match(r'^(.*)右(.*)$', name)
+    if m:
+        name = m.group(1) + m.group(2) + ".R"
+    return name
+
+
+def get_blender_bone_names(bones):
+    """与导入Blender后的骨骼名称一致，重名时依次添加.001、.002等后缀"""
+    names = []
+    seen = set()
+    for bone in bones:
+        base = to_blender_bone_name(bone.name)
+        name, i = base, 0
+        while name in seen:
+            i += 1
+            name = f"{base}.{i:03d}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def int2base(x, base, width=0):
+    """
+    Method to convert an int to a base
+    Source: http://stackoverflow.com/questions/2267362
+    MMD Tools中物体名称的序号前缀（如“00A_”）即由此生成
+    """
+    digs = string.digits + string.ascii_uppercase
+    assert (2 <= base <= len(digs))
+    digits, negtive = '', False
+    if x <= 0:
+        if x == 0:
+            return '0' * max(1, width)
+        x, negtive, width = -x, True, width - 1
+    while x:
+        digits = digs[x % base] + digits
+        x //= base
+    digits = '0' * (width - len(digits)) + digits
+    if negtive:
+        digits = '-' + digits
+    return digits
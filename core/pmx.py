@@ -0,0 +1,422 @@
+"""
+PMX 2.0/2.1 文件的轻量读取，不依赖bpy与MMD Tools
+
+仅解析批处理流程需要的结构（骨骼、权重、刚体、Joint、显示枠等），其余数据按长度跳过。
+Joint记录会保留其限制值在文件中的偏移，便于原地修改。
+"""
+import struct
+from typing import NamedTuple, Tuple
+
+PMX_SIGNATURE = b"PMX "
+
+_INT = struct.Struct("<i")
+_FLOAT = struct.Struct("<f")
+_VEC3 = struct.Struct("<3f")
+_USHORT = struct.Struct("<H")
+_SIGNED_INDEX = {1: "<b", 2: "<h", 4: "<i"}
+_VERTEX_INDEX = {1: "<B", 2: "<H", 4: "<i"}
+
+# 骨骼标志位
+BONE_TAIL_IS_BONE = 0x0001
+BONE_IS_IK = 0x0020
+BONE_INHERIT_ROTATION = 0x0100
+BONE_INHERIT_TRANSLATION = 0x0200
+BONE_FIXED_AXIS = 0x0400
+BONE_LOCAL_AXIS = 0x0800
+BONE_EXTERNAL_PARENT = 0x2000
+
+
+class PmxError(Exception):
+    pass
+
+
+class PmxHeader(NamedTuple):
+    version: float
+    encoding: str
+    additional_uvs: int
+    vertex_index_size: int
+    texture_index_size: int
+    material_index_size: int
+    bone_index_size: int
+    morph_index_size: int
+    rigid_index_size: int
+    name: str
+    name_e: str
+    comment: str
+    comment_e: str
+    # 模型信息之后（顶点数据）的起始偏移
+    end_offset: int
+
+
+class PmxBone(NamedTuple):
+    name: str
+    name_e: str
+    position: Tuple[float, float, float]
+    parent: int
+    layer: int
+    flags: int
+    # 尾部为骨骼索引或相对位置
+    tail: object
+
+
+class PmxRigidBody(NamedTuple):
+    name: str
+    name_e: str
+    bone: int
+    group: int
+    # PMX中的非碰撞掩码：第g位为1表示与碰撞组g碰撞（与MMD Tools的collision_group_mask相反）
+    mask: int
+    shape: int
+    size: Tuple[float, float, float]
+    position: Tuple[float, float, float]
+    rotation: Tuple[float, float, float]
+    mass: float
+    linear_damping: float
+    angular_damping: float
+    bounce: float
+    friction: float
+    mode: int
+
+
+class PmxJoint(NamedTuple):
+    name: str
+    name_e: str
+    type: int
+    rigid_a: int
+    rigid_b: int
+    position: Tuple[float, float, float]
+    rotation: Tuple[float, float, float]
+    lin_lower: Tuple[float, float, float]
+    lin_upper: Tuple[float, float, float]
+    ang_lower: Tuple[float, float, float]
+    ang_upper: Tuple[float, float, float]
+    spring_lin: Tuple[float, float, float]
+    spring_ang: Tuple[float, float, float]
+    # lin_lower在文件中的偏移，其后依次为lin_upper、ang_lower、ang_upper
+    limits_offset: int
+
+
+class PmxDisplayFrame(NamedTuple):
+    name: str
+    name_e: str
+    special: int
+    # ((0:骨骼 1:表情, 索引), ...)
+    items: Tuple[Tuple[int, int], ...]
+
+
+class PmxModel(NamedTuple):
+    header: PmxHeader
+    vertex_count: int
+    # 每个顶点的 ((骨骼索引, 权重), ...)，未读取权重时为None
+    weights: object
+    face_count: int
+    textures: Tuple[str, ...]
+    material_names: Tuple[str, ...]
+    bones: Tuple[PmxBone, ...]
+    morph_names: Tuple[str, ...]
+    display_frames: Tuple[PmxDisplayFrame, ...]
+    rigid_bodies: Tuple[PmxRigidBody, ...]
+    joints: Tuple[PmxJoint, ...]
+    # 每个顶点的坐标，未读取时为None
+    positions: object = None
+
+
+class _Reader:
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+        self.encoding = "utf-16-le"
+
+    def unpack(self, st):
+        values = st.unpack_from(self.data, self.offset)
+        self.offset += st.size
+        return values
+
+    def byte(self):
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def int(self):
+        return self.unpack(_INT)[0]
+
+    def float(self):
+        return self.unpack(_FLOAT)[0]
+
+    def vec3(self):
+        return self.unpack(_VEC3)
+
+    def text(self):
+        length = self.int()
+        if length < 0 or self.offset + length > len(self.data):
+            raise PmxError(f"invalid text length {length} at {self.offset}")
+        value = bytes(self.data[self.offset:self.offset + length]).decode(self.encoding, errors="replace")
+        self.offset += length
+        return value
+
+    def skip(self, size):
+        self.offset += size
+        if self.offset > len(self.data):
+            raise PmxError("unexpected end of file")
+
+
+def _index_reader(size, vertex=False):
+    st = struct.Struct((_VERTEX_INDEX if vertex else _SIGNED_INDEX)[size])
+
+    def read(reader):
+        return reader.unpack(st)[0]
+
+    return read
+
+
+def read_header(data):
+    """读取文件头与模型信息（名称、注释），data仅需包含文件开头部分"""
+    return _read_header(data)[0]
+
+
+def _read_header(data):
+    """读取文件头，返回 (PmxHeader, 英文注释的起始偏移)"""
+    if bytes(data[:4]) != PMX_SIGNATURE:
+        raise PmxError("not a PMX file")
+    reader = _Reader(data, 4)
+    version = reader.float()
+    globals_count = reader.byte()
+    globals_ = [reader.byte() for _ in range(globals_count)]
+    if globals_count < 8:
+        raise PmxError("invalid PMX globals")
+    reader.encoding = "utf-8" if globals_[0] == 1 else "utf-16-le"
+    name = reader.text()
+    name_e = reader.text()
+    comment = reader.text()
+    comment_e_offset = reader.offset
+    comment_e = reader.text()
+    return PmxHeader(round(version, 1), reader.encoding, *globals_[1:8], name, name_e, comment, comment_e,
+                     reader.offset), comment_e_offset
+
+
+def replace_comment_e(data, comment_e):
+    """返回将英文注释替换为comment_e后的文件内容，其余数据保持不变"""
+    header, offset = _read_header(data)
+    encoded = comment_e.encode(header.encoding)
+    return bytes(data[:offset]) + _INT.pack(len(encoded)) + encoded + bytes(data[header.end_offset:])
+
+
+def read_header_from_file(filepath, chunk_size=16 * 1024):
+    """仅读取文件开头部分解析文件头，注释过长时再读取更多内容"""
+    with open(filepath, "rb") as f:
+        data = f.read(chunk_size)
+        while True:
+            try:
+                return read_header(data)
+            except (PmxError, struct.error):
+                more = f.read(len(data))
+                if not more:
+                    raise PmxError("unexpected end of file")
+                data += more
+
+
+def _weight_sizes(header):
+    """各权重类型（BDEF1、BDEF2、BDEF4、SDEF、QDEF）的数据长度"""
+    bi = header.bone_index_size
+    return bi, bi * 2 + 4, bi * 4 + 16, bi * 2 + 4 + 36, bi * 4 + 16
+
+
+def _skip_vertices(reader, header, vertex_count):
+    """按长度跳过顶点数据（顶点长度取决于权重类型，需逐个读取权重类型）"""
+    base_size = 32 + 16 * header.additional_uvs
+    weight_sizes = _weight_sizes(header)
+    data = reader.data
+    offset = reader.offset
+    for _ in range(vertex_count):
+        offset += base_size + 1 + weight_sizes[data[offset + base_size]] + 4
+    reader.offset = offset
+
+
+def read_textures(data):
+    """仅读取纹理列表，读取到纹理表后即停止，不解析材质、骨骼等后续数据"""
+    header = read_header(data)
+    reader = _Reader(data, header.end_offset)
+    reader.encoding = header.encoding
+    _skip_vertices(reader, header, reader.int())
+    reader.skip(reader.int() * header.vertex_index_size)
+    return tuple(reader.text() for _ in range(reader.int()))
+
+
+def read_model(data, weights=False, positions=False):
+    """解析PMX模型，weights为True时读取每个顶点的骨骼权重，positions为True时读取每个顶点的坐标"""
+    header = read_header(data)
+    reader = _Reader(data, header.end_offset)
+    reader.encoding = header.encoding
+    bone_index = _index_reader(header.bone_index_size)
+    texture_index = _index_reader(header.texture_index_size)
+    material_index = _index_reader(header.material_index_size)
+    morph_index = _index_reader(header.morph_index_size)
+    rigid_index = _index_reader(header.rigid_index_size)
+    vertex_index = _index_reader(header.vertex_index_size, vertex=True)
+    bi = header.bone_index_size
+
+    # 顶点
+    vertex_count = reader.int()
+    base_size = 32 + 16 * header.additional_uvs
+    weight_sizes = _weight_sizes(header)
+    vertex_weights = None
+    vertex_positions = None
+    if weights or positions:
+        vertex_weights = []
+        vertex_positions = []
+        idx_fmt = _SIGNED_INDEX[bi][1]
+        bdef2 = struct.Struct(f"<2{idx_fmt}f")
+        bdef4 = struct.Struct(f"<4{idx_fmt}4f")
+        for _ in range(vertex_count):
+            if positions:
+                vertex_positions.append(reader.vec3())
+                reader.skip(base_size - 12)
+            else:
+                reader.skip(base_size)
+            weight_type = reader.byte()
+            if not weights:
+                reader.skip(weight_sizes[weight_type] + 4)
+                continue
+            if weight_type == 0:
+                vertex_weights.append(((bone_index(reader), 1.0),))
+            elif weight_type in (1, 3):
+                b1, b2, w = reader.unpack(bdef2)
+                vertex_weights.append(((b1, w), (b2, 1.0 - w)))
+                if weight_type == 3:
+                    reader.skip(36)
+            elif weight_type in (2, 4):
+                values = reader.unpack(bdef4)
+                vertex_weights.append(tuple(zip(values[:4], values[4:])))
+            else:
+                raise PmxError(f"unknown weight type {weight_type}")
+            reader.skip(4)
+    else:
+        _skip_vertices(reader, header, vertex_count)
+
+    # 面
+    face_count = reader.int()
+    reader.skip(face_count * header.vertex_index_size)
+
+    # 纹理
+    textures = tuple(reader.text() for _ in range(reader.int()))
+
+    # 材质
+    material_names = []
+    for _ in range(reader.int()):
+        material_names.append(reader.text())
+        reader.text()
+        reader.skip(65)
+        texture_index(reader)
+        texture_index(reader)
+        reader.skip(1)
+        if reader.byte() == 0:
+            texture_index(reader)
+        else:
+            reader.skip(1)
+        reader.text()
+        reader.skip(4)
+
+    # 骨骼
+    bones = []
+    for _ in range(reader.int()):
+        name = reader.text()
+        name_e = reader.text()
+        position = reader.vec3()
+        parent = bone_index(reader)
+        layer = reader.int()
+        flags = reader.unpack(_USHORT)[0]
+        tail = bone_index(reader) if flags & BONE_TAIL_IS_BONE else reader.vec3()
+        if flags & (BONE_INHERIT_ROTATION | BONE_INHERIT_TRANSLATION):
+            bone_index(reader)
+            reader.skip(4)
+        if flags & BONE_FIXED_AXIS:
+            reader.skip(12)
+        if flags & BONE_LOCAL_AXIS:
+            reader.skip(24)
+        if flags & BONE_EXTERNAL_PARENT:
+            reader.skip(4)
+        if flags & BONE_IS_IK:
+            bone_index(reader)
+            reader.skip(8)
+            for _ in range(reader.int()):
+                bone_index(reader)
+                if reader.byte():
+                    reader.skip(24)
+        bones.append(PmxBone(name, name_e, position, parent, layer, flags, tail))
+
+    # 表情
+    morph_names = []
+    for _ in range(reader.int()):
+        morph_names.append(reader.text())
+        reader.text()
+        reader.skip(1)
+        morph_type = reader.byte()
+        for _ in range(reader.int()):
+            if morph_type in (0, 9):
+                morph_index(reader)
+                reader.skip(4)
+            elif morph_type == 1:
+                vertex_index(reader)
+                reader.skip(12)
+            elif morph_type == 2:
+                bone_index(reader)
+                reader.skip(28)
+            elif 3 <= morph_type <= 7:
+                vertex_index(reader)
+                reader.skip(16)
+            elif morph_type == 8:
+                material_index(reader)
+                reader.skip(113)
+            elif morph_type == 10:
+                rigid_index(reader)
+                reader.skip(25)
+            else:
+                raise PmxError(f"unknown morph type {morph_type}")
+
+    # 显示枠
+    display_frames = []
+    for _ in range(reader.int()):
+        name = reader.text()
+        name_e = reader.text()
+        special = reader.byte()
+        items = []
+        for _ in range(reader.int()):
+            item_type = reader.byte()
+            items.append((item_type, morph_index(reader) if item_type == 1 else bone_index(reader)))
+        display_frames.append(PmxDisplayFrame(name, name_e, special, tuple(items)))
+
+    # 刚体
+    rigid_body_struct = struct.Struct("<BHB9f5fB")
+    rigid_bodies = []
+    for _ in range(reader.int()):
+        name = reader.text()
+        name_e = reader.text()
+        bone = bone_index(reader)
+        values = reader.unpack(rigid_body_struct)
+        rigid_bodies.append(PmxRigidBody(
+            name, name_e, bone, values[0], values[1], values[2],
+            values[3:6], values[6:9], values[9:12], *values[12:17], values[17]))
+
+    # Joint
+    joint_struct = struct.Struct("<24f")
+    joints = []
+    for _ in range(reader.int()):
+        name = reader.text()
+        name_e = reader.text()
+        joint_type = reader.byte()
+        rigid_a = rigid_index(reader)
+        rigid_b = rigid_index(reader)
+        limits_offset = reader.offset + 24
+        v = reader.unpack(joint_struct)
+        joints.append(PmxJoint(
+            name, name_e, joint_type, rigid_a, rigid_b,
+            v[0:3], v[3:6], v[6:9], v[9:12], v[12:15], v[15:18], v[18:21], v[21:24], limits_offset))
+
+    return PmxModel(header, vertex_count, vertex_weights if weights else None, face_count // 3, textures,
+                    tuple(material_names), tuple(bones), tuple(morph_names), tuple(display_frames),
+                    tuple(rigid_bodies), tuple(joints), vertex_positions if positions else None)
+
+
+def read_model_from_file(filepath, weights=False, positions=False):
+    with open(filepath, "rb") as f:
+        return read_model(f.read(), weights=weights, positions=positions)
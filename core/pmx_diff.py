@@ -0,0 +1,304 @@
+"""
+PMX结构对比工具，无需Blender
+
+逐项对比两个PMX文件的骨骼、顶点权重、刚体、Joint与显示枠，数值按容差比较，
+用于验证优化后的处理流程与原流程（MMD Tools导出）的结果一致。
+元素按名称（重名时按出现次序）配对，索引引用（父骨骼、刚体关联骨骼、Joint两端刚体等）均转换为名称后比较。
+
+用法（在插件根目录下执行）：
+    python -m core.pmx_diff 模型A.pmx 模型B.pmx
+    python -m core.pmx_diff 目录A 目录B --atol 1e-4 --workers 8
+
+对比目录时按相对路径配对其中的PMX文件。全部一致时退出码为0，存在差异时为1，文件无法解析或缺失时为2。
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+
+from .pmx import BONE_TAIL_IS_BONE, PmxError, read_model_from_file
+
+STATUS_SAME = "SAME"
+STATUS_DIFF = "DIFF"
+STATUS_ERROR = "ERROR"
+
+SECTIONS = ("bones", "weights", "rigid_bodies", "joints", "display_frames")
+
+# 各字段的容差类别，未列出的字段精确比较
+_FLOAT_FIELDS = {
+    "position": "atol", "size": "atol", "tail": "atol", "lin_lower": "atol", "lin_upper": "atol",
+    "spring_lin": "atol",
+    "rotation": "angle_tol", "ang_lower": "angle_tol", "ang_upper": "angle_tol", "spring_ang": "angle_tol",
+    "mass": "rtol", "linear_damping": "rtol", "angular_damping": "rtol", "bounce": "rtol", "friction": "rtol",
+}
+
+
+class Tolerance:
+    def __init__(self, atol=1e-4, angle_tol=1e-4, rtol=1e-5, weight_tol=1e-3):
+        # 坐标、尺寸、移动限制（PMX单位）
+        self.atol = atol
+        # 旋转、角度限制（弧度）
+        self.angle_tol = angle_tol
+        # 质量、阻尼等标量（相对容差）
+        self.rtol = rtol
+        # 顶点权重
+        self.weight_tol = weight_tol
+
+    def close(self, kind, a, b):
+        if isinstance(a, tuple) != isinstance(b, tuple):
+            return False
+        if not isinstance(a, tuple):
+            a, b = (a,), (b,)
+        if len(a) != len(b):
+            return False
+        if kind == "rtol":
+            return all(math.isclose(x, y, rel_tol=self.rtol, abs_tol=self.rtol) for x, y in zip(a, b))
+        tol = getattr(self, kind)
+        return all(abs(x - y) <= tol for x, y in zip(a, b))
+
+
+def _keyed(names):
+    """名称 → 配对键 (名称, 第几次出现)"""
+    seen = {}
+    keys = []
+    for name in names:
+        n = seen.get(name, 0)
+        seen[name] = n + 1
+        keys.append((name, n))
+    return keys
+
+
+def _name_of(names, i):
+    return names[i] if 0 <= i < len(names) else None
+
+
+def bone_records(model):
+    names = [b.name for b in model.bones]
+    records = []
+    for bone in model.bones:
+        if bone.flags & BONE_TAIL_IS_BONE:
+            tail = ("bone", _name_of(names, bone.tail))
+        else:
+            tail = bone.tail
+        records.append({"parent": _name_of(names, bone.parent), "position": bone.position, "layer": bone.layer,
+                        "flags": bone.flags, "tail": tail})
+    return names, records
+
+
+def rigid_body_records(model):
+    bone_names = [b.name for b in model.bones]
+    names = [rb.name for rb in model.rigid_bodies]
+    records = [{"bone": _name_of(bone_names, rb.bone), "shape": rb.shape, "size": rb.size,
+                "position": rb.position, "rotation": rb.rotation, "group": rb.group, "mask": rb.mask,
+                "mode": rb.mode, "mass": rb.mass, "linear_damping": rb.linear_damping,
+                "angular_damping": rb.angular_damping, "bounce": rb.bounce, "friction": rb.friction}
+               for rb in model.rigid_bodies]
+    return names, records
+
+
+def joint_records(model):
+    rb_names = [rb.name for rb in model.rigid_bodies]
+    names = [j.name for j in model.joints]
+    records = [{"type": j.type, "rigid_a": _name_of(rb_names, j.rigid_a), "rigid_b": _name_of(rb_names, j.rigid_b),
+                "position": j.position, "rotation": j.rotation, "lin_lower": j.lin_lower, "lin_upper": j.lin_upper,
+                "ang_lower": j.ang_lower, "ang_upper": j.ang_upper, "spring_lin": j.spring_lin,
+                "spring_ang": j.spring_ang}
+               for j in model.joints]
+    return names, records
+
+
+def display_frame_records(model):
+    item_names = ([b.name for b in model.bones], list(model.morph_names))
+    names = [frame.name for frame in model.display_frames]
+    records = [{"special": frame.special,
+                "items": tuple((kind, _name_of(item_names[kind], i)) for kind, i in frame.items)}
+               for frame in model.display_frames]
+    return names, records
+
+
+def diff_records(section, a, b, tol, max_lines):
+    """按名称配对并逐字段比较，返回差异描述列表（最多max_lines条，超出部分汇总为一行）"""
+    names_a, records_a = a
+    names_b, records_b = b
+    keys_a, keys_b = _keyed(names_a), _keyed(names_b)
+    index_b = {key: i for i, key in enumerate(keys_b)}
+    key_set_a = set(keys_a)
+
+    lines = []
+    for key in keys_a:
+        if key not in index_b:
+            lines.append(f"仅A中存在：{key[0]}")
+    for key in keys_b:
+        if key not in key_set_a:
+            lines.append(f"仅B中存在：{key[0]}")
+    common_a = [key for key in keys_a if key in index_b]
+    common_b = [key for key in keys_b if key in key_set_a]
+    if common_a != common_b:
+        lines.append("顺序不同")
+
+    for i, key in enumerate(keys_a):
+        j = index_b.get(key)
+        if j is None:
+            continue
+        ra, rb = records_a[i], records_b[j]
+        for field, va in ra.items():
+            vb = rb[field]
+            kind = _FLOAT_FIELDS.get(field)
+            if field == "tail" and (isinstance(va[0], str) or isinstance(vb[0], str)):
+                kind = None
+            same = tol.close(kind, va, vb) if kind else va == vb
+            if not same:
+                lines.append(f"{key[0]}.{field}：{_format(va)} ≠ {_format(vb)}")
+
+    return _truncate(section, lines, max_lines)
+
+
+def diff_weights(model_a, model_b, tol, max_lines):
+    """
+    按顶点索引比较权重，骨骼索引转换为名称，同一骨骼的权重合并，忽略小于容差的权重
+    （BDEF1与权重为0的BDEF2等写法不同但效果相同的情况视为一致）
+    """
+    if model_a.vertex_count != model_b.vertex_count:
+        return _truncate("weights", [f"顶点数：{model_a.vertex_count} ≠ {model_b.vertex_count}"], max_lines)
+    names_a = [b.name for b in model_a.bones]
+    names_b = [b.name for b in model_b.bones]
+    same_bones = names_a == names_b
+
+    lines = []
+    for i, (wa, wb) in enumerate(zip(model_a.weights, model_b.weights)):
+        # 骨骼顺序一致且数据完全相同时无需转换
+        if same_bones and wa == wb:
+            continue
+        da = _normalize_weights(wa, names_a, tol.weight_tol)
+        db = _normalize_weights(wb, names_b, tol.weight_tol)
+        if da.keys() != db.keys() or any(abs(da[k] - db[k]) > tol.weight_tol for k in da):
+            lines.append(f"顶点{i}：{_format_weights(da)} ≠ {_format_weights(db)}")
+            if len(lines) > max_lines * 100:
+                # 差异过多时不再继续比较
+                lines.append("……")
+                break
+    return _truncate("weights", lines, max_lines)
+
+
+def _normalize_weights(vertex_weights, names, weight_tol):
+    merged = {}
+    for b, w in vertex_weights:
+        name = _name_of(names, b)
+        merged[name] = merged.get(name, 0.0) + w
+    return {name: w for name, w in merged.items() if abs(w) > weight_tol}
+
+
+def _format_weights(weights):
+    return "{" + ", ".join(f"{name}:{w:.4f}" for name, w in sorted(weights.items(), key=str)) + "}"
+
+
+def _format(value):
+    if isinstance(value, tuple) and value and all(isinstance(v, float) for v in value):
+        return "(" + ", ".join(f"{v:.6g}" for v in value) + ")"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return repr(value)
+
+
+def _truncate(section, lines, max_lines):
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"……另有{len(lines) - max_lines}处差异"]
+    return [f"[{section}] {line}" for line in lines]
+
+
+def diff_models(model_a, model_b, tol=None, max_lines=10):
+    """返回 {区段: 差异描述列表}，仅包含存在差异的区段"""
+    tol = tol or Tolerance()
+    result = {}
+    for section, get_records in (("bones", bone_records), ("rigid_bodies", rigid_body_records),
+                                 ("joints", joint_records), ("display_frames", display_frame_records)):
+        lines = diff_records(section, get_records(model_a), get_records(model_b), tol, max_lines)
+        if lines:
+            result[section] = lines
+    lines = diff_weights(model_a, model_b, tol, max_lines)
+    if lines:
+        result["weights"] = lines
+    return result
+
+
+def diff_files(path_a, path_b, tol=None, max_lines=10):
+    """返回 (文件A, 文件B, 状态, 差异描述列表)"""
+    try:
+        model_a = read_model_from_file(path_a, weights=True)
+        model_b = read_model_from_file(path_b, weights=True)
+    except (OSError, PmxError, struct.error, IndexError, UnicodeDecodeError) as e:
+        return path_a, path_b, STATUS_ERROR, [f"无法解析模型文件：{e}"]
+    diffs = diff_models(model_a, model_b, tol, max_lines)
+    lines = [line for section in SECTIONS for line in diffs.get(section, ())]
+    return path_a, path_b, STATUS_DIFF if lines else STATUS_SAME, lines
+
+
+def _diff_files_args(args):
+    return diff_files(*args)
+
+
+def pair_files(path_a, path_b):
+    """返回 ([(文件A, 文件B), ...], [仅存在于一侧的文件, ...])"""
+    if not (os.path.isdir(path_a) and os.path.isdir(path_b)):
+        return [(path_a, path_b)], []
+
+    def collect(root):
+        found = set()
+        for dirpath, _, filenames in os.walk(root):
+            for f in filenames:
+                if f.lower().endswith(".pmx"):
+                    found.add(os.path.relpath(os.path.join(dirpath, f), root))
+        return found
+
+    rel_a, rel_b = collect(path_a), collect(path_b)
+    pairs = [(os.path.join(path_a, rel), os.path.join(path_b, rel)) for rel in sorted(rel_a & rel_b)]
+    missing = [os.path.join(path_a, rel) for rel in sorted(rel_a - rel_b)] + \
+              [os.path.join(path_b, rel) for rel in sorted(rel_b - rel_a)]
+    return pairs, missing
+
+
+def run_diff(pairs, tol, max_lines, workers=None):
+    """在进程池中对比，按输入顺序逐个返回结果"""
+    from concurrent.futures import ProcessPoolExecutor
+    if len(pairs) == 1:
+        yield diff_files(pairs[0][0], pairs[0][1], tol, max_lines)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_diff_files_args, ((a, b, tol, max_lines) for a, b in pairs), chunksize=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.pmx_diff", description="对比两个PMX文件（或目录）的结构")
+    parser.add_argument("a", help="PMX文件或目录")
+    parser.add_argument("b", help="PMX文件或目录")
+    parser.add_argument("--atol", type=float, default=1e-4, help="坐标、尺寸、移动限制的容差（PMX单位）")
+    parser.add_argument("--angle-tol", type=float, default=1e-4, help="旋转、角度限制的容差（弧度）")
+    parser.add_argument("--rtol", type=float, default=1e-5, help="质量、阻尼等的相对容差")
+    parser.add_argument("--weight-tol", type=float, default=1e-3, help="顶点权重的容差")
+    parser.add_argument("--max-lines", type=int, default=10, help="每个区段最多显示的差异数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为CPU核心数")
+    args = parser.parse_args(argv)
+
+    tol = Tolerance(args.atol, args.angle_tol, args.rtol, args.weight_tol)
+    pairs, missing = pair_files(args.a, args.b)
+    for path in missing:
+        print(f"{STATUS_ERROR}：{path}（另一侧不存在）")
+
+    counts = {STATUS_SAME: 0, STATUS_DIFF: 0, STATUS_ERROR: len(missing)}
+    for path_a, path_b, status, lines in run_diff(pairs, tol, args.max_lines, args.workers):
+        counts[status] += 1
+        if status != STATUS_SAME:
+            print(f"{status}：{path_a} ↔ {path_b}")
+            for line in lines:
+                print(f"    {line}")
+
+    print(f"共{len(pairs) + len(missing)}个文件，一致{counts[STATUS_SAME]}个，"
+          f"存在差异{counts[STATUS_DIFF]}个，出错{counts[STATUS_ERROR]}个")
+    if counts[STATUS_ERROR]:
+        return 2
+    return 1 if counts[STATUS_DIFF] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
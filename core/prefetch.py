@@ -0,0 +1,134 @@
+"""
+后台预读：在处理当前模型时，提前读取后续模型文件（及其引用的纹理），使其进入系统文件缓存
+"""
+import hashlib
+import os
+import queue
+import threading
+from typing import NamedTuple, Optional
+
+from .pmx import read_textures
+
+# 单次读取的块大小
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class PrefetchedFile(NamedTuple):
+    path: str
+    size: int
+    # 文件内容的SHA-256，读取失败时为None
+    sha256: Optional[str]
+
+
+_END = object()
+
+
+class Prefetcher:
+    """
+    从paths（可为生成器，如FileDiscovery）中依次取出文件路径，在后台线程中预读后续depth个文件，并计算内容哈希
+
+    - 同时最多有depth个文件处于已读取、待处理状态，仅返回文件大小与内容哈希，不保留文件内容
+    - textures为True时，解析PMX纹理列表并预读纹理文件（仅进入系统缓存，不保留内容）；
+      仅解析到纹理表为止，超过max_file_bytes的文件不解析，以免在后台线程中长时间占用GIL
+    - 后台线程中不得访问bpy
+    """
+
+    def __init__(self, paths, depth=2, max_file_bytes=256 * 1024 * 1024, textures=True):
+        self.paths = paths
+        self.max_file_bytes = max_file_bytes
+        self.textures = textures
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="mmd_jiggle_prefetch", daemon=True)
+
+    def __iter__(self):
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    break
+                yield item
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        # 释放队列，避免后台线程阻塞在put上
+        while not self._queue.empty():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for path in self.paths:
+                if self._stop.is_set():
+                    return
+                if not self._put(self._read(path)):
+                    return
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._put(_END)
+
+    def _read(self, path):
+        size = 0
+        chunks = []
+        oversize = False
+        sha256 = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    sha256.update(chunk)
+                    if oversize:
+                        continue
+                    if size > self.max_file_bytes:
+                        # 过大的文件仅预热系统缓存，不解析纹理
+                        oversize = True
+                        chunks = []
+                    else:
+                        chunks.append(chunk)
+        except OSError:
+            return PrefetchedFile(path, size, None)
+
+        # 过大的文件跳过纹理预读（解析顶点数据耗时较长）
+        if self.textures and not oversize and chunks:
+            self._read_textures(path, b"".join(chunks))
+        return PrefetchedFile(path, size, sha256.hexdigest())
+
+    @staticmethod
+    def _read_textures(path, data):
+        if not path.lower().endswith(".pmx"):
+            return
+        try:
+            textures = read_textures(data)
+        except Exception:
+            # 文件损坏等问题留给导入时处理
+            return
+        base_dir = os.path.dirname(path)
+        for texture in textures:
+            texture_path = os.path.join(base_dir, texture.replace("\\", os.sep))
+            try:
+                with open(texture_path, "rb") as f:
+                    while f.read(CHUNK_SIZE):
+                        pass
+            except OSError:
+                continue
@@ -0,0 +1,88 @@
+"""
+预检：无需Blender，仅解析模型文件，按与插件处理流程相同的规则找出无法处理的模型
+
+校验内容（顺序同插件处理流程）：胸部骨骼、“上半身2”骨骼、胸部顶点权重。
+骨骼名称按MMD Tools导入时的规则转换后再进行匹配，与导入后的结果基本一致。
+
+用法（在插件根目录下执行）：
+    python -m core.preflight 模型目录
+    python -m core.preflight 模型目录 --search-strategy ALL --json
+"""
+import argparse
+import contextlib
+import json
+import struct
+import sys
+
+from .discovery import FileDiscovery
+from .naming import (LOW_BREAST_WEIGHT_MSG, NO_BREAST_BONES_MSG, NO_UPPER_BODY2_MSG, UPPER_BODY2_NAME,
+                     WEIGHT_THRESHOLD, get_blender_bone_names, is_breast_bone_name)
+from .pmx import PmxError, read_model_from_file
+from .scan_index import ScanIndex
+
+STATUS_OK = "OK"
+STATUS_ERROR = "ERROR"
+# 无法预检（如PMD文件），需实际处理后才能确定
+STATUS_UNKNOWN = "UNKNOWN"
+
+
+def preflight_file(filepath):
+    """返回 (文件路径, 状态, 信息)"""
+    if not filepath.lower().endswith(".pmx"):
+        return filepath, STATUS_UNKNOWN, "仅支持预检PMX文件"
+    try:
+        model = read_model_from_file(filepath, weights=True)
+    except (OSError, PmxError, struct.error, IndexError, UnicodeDecodeError) as e:
+        return filepath, STATUS_ERROR, f"无法解析模型文件：{e}"
+
+    names = get_blender_bone_names(model.bones)
+    breast_indices = {i for i, name in enumerate(names) if is_breast_bone_name(name)}
+    if not breast_indices:
+        return filepath, STATUS_ERROR, NO_BREAST_BONES_MSG
+    if UPPER_BODY2_NAME not in names:
+        return filepath, STATUS_ERROR, NO_UPPER_BODY2_MSG
+    for vertex_weights in model.weights:
+        if sum(w for b, w in vertex_weights if b in breast_indices) > WEIGHT_THRESHOLD:
+            return filepath, STATUS_OK, ""
+    return filepath, STATUS_ERROR, LOW_BREAST_WEIGHT_MSG
+
+
+def run_preflight(filepaths, workers=None):
+    """在进程池中预检，按输入顺序逐个返回结果"""
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(preflight_file, filepaths, chunksize=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.preflight", description="预检模型目录中待处理的模型")
+    parser.add_argument("directory", help="模型目录（可跨越层级）")
+    parser.add_argument("--suffix", default="RGBA", help="名称后缀，用于识别已生成的文件")
+    parser.add_argument("--search-strategy", choices=("LATEST", "ALL"), default="LATEST", help="检索模式")
+    parser.add_argument("--conflict-strategy", choices=("SKIP", "RE_GENERATE", "UPDATE"), default="RE_GENERATE",
+                        help="冲突时")
+    parser.add_argument("--threshold", type=int, default=1024, help="阈值，与插件中的设置一致")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为CPU核心数")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果（供插件调用）")
+    args = parser.parse_args(argv)
+
+    # FileDiscovery仅读取目录、阈值、后缀、检索模式、冲突时，与插件中的筛选结果一致
+    # 输出JSON时，遍历目录的日志输出到stderr
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        filepaths = list(FileDiscovery(args, ScanIndex()))
+    results = []
+    for filepath, status, msg in run_preflight(filepaths, args.workers):
+        results.append({"path": filepath, "status": status, "message": msg})
+        if not args.json and status != STATUS_OK:
+            print(f"{status}：{filepath}（{msg}）")
+
+    failed = sum(r["status"] == STATUS_ERROR for r in results)
+    if args.json:
+        json.dump(results, sys.stdout, ensure_ascii=False)
+    else:
+        print(f"共{len(results)}个文件，无法处理{failed}个")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+分阶段性能分析：记录每个模型各处理阶段的耗时、CPU时间、常驻内存增量与物体数量，并汇总整个批处理
+常驻内存增量为阶段结束与开始时进程当前常驻内存之差（可为负数，macOS下无法获取，始终为0）
+
+开启方式：面板中勾选“性能分析”，或设置环境变量 MMD_JIGGLE_PROFILE=1。
+未开启时可仅记录每个模型各阶段的耗时与阶段边界处常驻内存的最大值（record_stages），供批处理报告使用，
+不保存事件，也不采集CPU时间与物体数量。
+环境变量的值为.json文件路径时，结果写入该文件（供benchmarks中的脚本读取）。
+结果可导出为Chrome Trace格式的JSON，可在 chrome://tracing、Perfetto 或 speedscope 中查看。
+"""
+import json
+import os
+import sys
+import time
+
+PROFILE_ENV = "MMD_JIGGLE_PROFILE"
+
+
+def is_profile_env_enabled():
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def get_profile_env_path():
+    """环境变量中指定的结果文件路径，未指定时返回None"""
+    value = os.environ.get(PROFILE_ENV, "")
+    return value if value.lower().endswith(".json") else None
+
+
+def _get_windows_memory_counters():
+    """Windows下的进程内存计数器，无法获取时返回None"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        kernel32 = ctypes.WinDLL("kernel32")
+        psapi = ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters
+    except OSError:
+        pass
+    return None
+
+
+def get_peak_rss():
+    """当前进程的峰值常驻内存（字节），无法获取时返回0"""
+    if sys.platform == "win32":
+        counters = _get_windows_memory_counters()
+        return counters.PeakWorkingSetSize if counters else 0
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def get_current_rss():
+    """当前进程的常驻内存（字节），无法获取时（如macOS）返回0"""
+    if sys.platform == "win32":
+        counters = _get_windows_memory_counters()
+        return counters.WorkingSetSize if counters else 0
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _Sample:
+    __slots__ = ("wall", "cpu", "rss", "objects")
+
+    def __init__(self, object_counter=None, detailed=True):
+        self.wall = time.perf_counter()
+        self.rss = get_current_rss()
+        if detailed:
+            self.cpu = time.process_time()
+            self.objects = object_counter() if object_counter else 0
+        else:
+            self.cpu = self.objects = 0
+
+
+class StageProfiler:
+    """
+    以“打点”的方式划分阶段：stage(name) 结束上一个阶段并开始新的阶段，end_file() 结束当前模型
+    enabled为True时记录完整的性能分析数据（事件、CPU时间、内存、物体数量），默认不开启
+    record_stages为True时仅记录当前模型各阶段的耗时（file_stages）与阶段边界处常驻内存的最大值（file_peak_rss）
+    两者均为False时所有方法均为空操作，可在处理流程中无条件调用
+    object_counter 为返回当前物体数量的函数（如 lambda: len(bpy.data.objects)）
+    """
+
+    def __init__(self, enabled=False, object_counter=None, record_stages=False):
+        self.enabled = enabled
+        self.record_stages = enabled or record_stages
+        self.object_counter = object_counter
+        self.events = []
+        # 阶段名称 → [次数, 耗时, CPU时间, 常驻内存增量之和]
+        self.totals = {}
+        # 当前（或最近一个）模型的 阶段名称 → 耗时
+        self.file_stages = {}
+        # 当前（或最近一个）模型各阶段边界处的最大常驻内存（字节），即该模型的峰值内存（近似值）
+        self.file_peak_rss = 0
+        self._origin = time.perf_counter()
+        self._file = None
+        self._stage = None
+
+    def begin_file(self, name):
+        if not self.record_stages:
+            return
+        self.end_file()
+        self.file_stages = {}
+        self.file_peak_rss = 0
+        self._file = (name, self._sample())
+
+    def stage(self, name):
+        if not self.record_stages:
+            return
+        self._end_stage()
+        self._stage = (name, self._sample())
+
+    def end_file(self):
+        if not self.record_stages or self._file is None:
+            return
+        self._end_stage()
+        name, start = self._file
+        self._file = None
+        if self.enabled:
+            self._add_event(name, "file", start, self._sample())
+
+    def _sample(self):
+        sample = _Sample(self.object_counter, self.enabled)
+        self.file_peak_rss = max(self.file_peak_rss, sample.rss)
+        return sample
+
+    def _end_stage(self):
+        if self._stage is None:
+            return
+        name, start = self._stage
+        self._stage = None
+        end = self._sample()
+        self.file_stages[name] = self.file_stages.get(name, 0.0) + end.wall - start.wall
+        if not self.enabled:
+            return
+        self._add_event(name, "stage", start, end)
+        total = self.totals.setdefault(name, [0, 0.0, 0.0, 0])
+        total[0] += 1
+        total[1] += end.wall - start.wall
+        total[2] += end.cpu - start.cpu
+        total[3] += end.rss - start.rss
+
+    def _add_event(self, name, category, start, end):
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start.wall - self._origin) * 1e6),
+            "dur": round((end.wall - start.wall) * 1e6),
+            "pid": 1,
+            "tid": 1,
+            "args": {
+                "cpu_ms": round((end.cpu - start.cpu) * 1000, 3),
+                "rss_delta_kb": (end.rss - start.rss) // 1024,
+                "objects": end.objects,
+                "objects_delta": end.objects - start.objects,
+            },
+        })
+
+    def format_summary(self):
+        """按总耗时从高到低列出各阶段"""
+        lines = [f"{'阶段':<28}{'次数':>6}{'总耗时(s)':>12}{'平均(s)':>10}{'CPU(s)':>10}{'内存增量(MB)':>18}"]
+        for name, (count, wall, cpu, rss) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28}{count:>6}{wall:>12.3f}{wall / count:>10.3f}{cpu:>10.3f}{rss / 1048576:>18.1f}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
@@ -0,0 +1,50 @@
+"""
+生成标记：导出时写入PMX英文注释末尾的一行，记录生成该文件的源模型与参数
+
+格式为“MMDJB:”后接紧凑的JSON，如：
+    MMDJB:{"v":1,"src":"<源模型SHA-256>","file":"模型.pmx","sfx":"RGBA","var":null,"spec":"<参数摘要>","ver":"1.0.0"}
+识别时仅需读取文件头（模型信息部分），与文件名无关。
+"""
+import json
+
+MARKER_PREFIX = "MMDJB:"
+MARKER_VERSION = 1
+# 经core.retune重设Joint限制后的参数摘要，与任何参数的摘要均不一致
+RETUNED_SPEC = "retuned"
+
+
+def make_marker(source_hash, source_file, suffix, variant, spec_digest, addon_version):
+    record = {
+        "v": MARKER_VERSION,
+        "src": source_hash,
+        "file": source_file,
+        "sfx": suffix,
+        "var": variant,
+        "spec": spec_digest[:16],
+        "ver": ".".join(str(v) for v in addon_version),
+    }
+    return format_marker(record)
+
+
+def format_marker(record):
+    return MARKER_PREFIX + json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def parse_marker(comment):
+    """从注释中解析生成标记，不存在时返回None"""
+    for line in reversed(comment.splitlines()):
+        if line.startswith(MARKER_PREFIX):
+            try:
+                record = json.loads(line[len(MARKER_PREFIX):])
+            except ValueError:
+                return None
+            return record if isinstance(record, dict) else None
+    return None
+
+
+def set_marker(comment, marker):
+    """移除注释中已有的生成标记（多版本输出时逐个版本写入），并将新标记追加到末尾"""
+    lines = [line for line in comment.splitlines() if not line.startswith(MARKER_PREFIX)]
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return "\n".join(lines + [marker])
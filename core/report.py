@@ -0,0 +1,127 @@
+"""
+批处理报告：逐个模型记录源文件、生成的文件、状态、信息、文件大小、顶点/骨骼/刚体数量、各阶段耗时与内存占用，
+并在批处理结束时汇总吞吐量与耗时分位数（p50/p95/最大值），吞吐量不计入因已是最新而跳过的模型
+
+报告写入模型目录，同时生成JSON Lines与CSV两种格式，每处理完一个模型即追加一行并刷新到磁盘，
+批处理中途崩溃时已处理模型的记录不会丢失。JSON Lines的最后一行为汇总（type为summary）。
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+from .profiler import get_peak_rss
+
+REPORT_PREFIX = "mmd_jiggle_report_"
+CSV_FIELDS = ("source", "status", "message", "size", "vertices", "bones", "rigid_bodies", "elapsed_s",
+              "rss_mb", "peak_rss_mb", "reused_from", "outputs", "stages")
+
+# 状态：与插件处理结果一致（INFO/ERROR），另有因已是最新而跳过的SKIPPED
+STATUS_SKIPPED = "SKIPPED"
+
+
+def percentile(values, q):
+    """线性插值的分位数（q为0~100），values为空时返回0"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+class BatchReport:
+    def __init__(self, directory, prefix=REPORT_PREFIX):
+        stem = os.path.join(directory, f"{prefix}{datetime.now().strftime('%Y%m%d%H%M%S')}")
+        self.jsonl_path = stem + ".jsonl"
+        self.csv_path = stem + ".csv"
+        self.start_time = time.time()
+        # 实际处理（未跳过、未复用）的模型耗时，用于计算分位数
+        self.latencies = []
+        self.status_counts = {}
+        self.peak_rss = 0
+        self.file_count = 0
+        # 未跳过的模型数量及其文件大小之和，用于计算吞吐量
+        self.processed_count = 0
+        self.processed_bytes = 0
+        self._jsonl = open(self.jsonl_path, "w", encoding="utf-8")
+        # utf-8-sig 便于Excel正确识别中文
+        self._csv_file = open(self.csv_path, "w", encoding="utf-8-sig", newline="")
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(CSV_FIELDS)
+        self._csv_file.flush()
+
+    def add(self, source, status, message="", outputs=(), size=0, counts=None, stages=None, elapsed=0.0,
+            reused_from=None, rss=0, peak_rss=0):
+        """
+        记录一个模型的处理结果
+        counts为 {"vertices": .., "bones": .., "rigid_bodies": ..}，stages为 阶段名称 → 耗时
+        rss为处理完成后进程的常驻内存，peak_rss为处理该模型期间的峰值常驻内存（字节），用于估算并行处理时的内存需求
+        """
+        counts = counts or {}
+        stages = {name: round(t, 4) for name, t in (stages or {}).items()}
+        record = {
+            "type": "file",
+            "source": source,
+            "outputs": list(outputs),
+            "status": status,
+            "message": message,
+            "size": size,
+            "vertices": counts.get("vertices"),
+            "bones": counts.get("bones"),
+            "rigid_bodies": counts.get("rigid_bodies"),
+            "elapsed_s": round(elapsed, 4),
+            "rss_mb": round(rss / 1048576, 1),
+            "peak_rss_mb": round(peak_rss / 1048576, 1),
+            "reused_from": reused_from,
+            "stages": stages,
+        }
+        self._write(record)
+
+        self.file_count += 1
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self.peak_rss = max(self.peak_rss, peak_rss)
+        if status == STATUS_SKIPPED:
+            return
+        self.processed_count += 1
+        self.processed_bytes += size
+        if reused_from is None:
+            self.latencies.append(elapsed)
+
+    def _write(self, record):
+        self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._jsonl.flush()
+        if record["type"] == "file":
+            row = dict(record, outputs=";".join(record["outputs"]),
+                       stages=json.dumps(record["stages"], ensure_ascii=False))
+            self._csv.writerow(["" if row[k] is None else row[k] for k in CSV_FIELDS])
+            self._csv_file.flush()
+
+    def summary(self):
+        total_time = time.time() - self.start_time
+        return {
+            "type": "summary",
+            "files": self.file_count,
+            "processed_files": self.processed_count,
+            "status_counts": self.status_counts,
+            "total_s": round(total_time, 4),
+            "files_per_s": round(self.processed_count / total_time, 4) if total_time > 0 else 0.0,
+            "mb_per_s": round(self.processed_bytes / 1048576 / total_time, 4) if total_time > 0 else 0.0,
+            "latency_p50_s": round(percentile(self.latencies, 50), 4),
+            "latency_p95_s": round(percentile(self.latencies, 95), 4),
+            "latency_max_s": round(max(self.latencies, default=0.0), 4),
+            # 各模型的峰值取自阶段边界处的采样，汇总时取进程的峰值常驻内存
+            "peak_rss_mb": round(max(self.peak_rss, get_peak_rss()) / 1048576, 1),
+        }
+
+    def close(self):
+        """写入汇总并关闭，返回汇总"""
+        if self._jsonl.closed:
+            return None
+        summary = self.summary()
+        self._write(summary)
+        self._jsonl.close()
+        self._csv_file.close()
+        return summary
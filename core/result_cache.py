@@ -0,0 +1,86 @@
+"""
+处理结果清单：记录每个源文件对应的结果键与输出文件
+
+结果键由源文件内容哈希、插件及MMD Tools版本、胸部素材哈希、参数摘要共同决定，
+任意一项变化时视为需要重新生成。清单以JSON Lines格式追加写入，同一源文件以最后一条记录为准。
+"""
+import hashlib
+import json
+import os
+
+from .discovery import read_marker
+
+CHUNK_SIZE = 4 * 1024 * 1024
+# 参与结果键计算的参数（仅影响输出内容的参数）
+SPEC_KEY_FIELDS = ("joint_limits", "variants", "collision", "collision_group_number", "rb_scale_factor", "suffix")
+
+
+def hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def spec_digest(spec):
+    """参数摘要，浮点数以repr表示，确保相同参数得到相同摘要"""
+    values = {name: getattr(spec, name) for name in SPEC_KEY_FIELDS}
+    return hashlib.sha256(repr(sorted(values.items())).encode("utf-8")).hexdigest()
+
+
+def make_result_key(source_hash, environment_key):
+    return hashlib.sha256(f"{source_hash}|{environment_key}".encode("utf-8")).hexdigest()
+
+
+def make_environment_key(addon_version, mmd_tools_version, template_hashes, spec):
+    """与源文件无关、在整个批处理中不变的部分"""
+    return "|".join([repr(tuple(addon_version)), repr(tuple(mmd_tools_version)), *template_hashes, spec_digest(spec)])
+
+
+def outputs_intact(outputs, digest):
+    """
+    输出文件均存在，且生成标记中的参数摘要与digest一致
+    经core.retune重设Joint限制的文件，其参数摘要已被改写，不再视为该参数下的结果
+    """
+    for path in outputs:
+        marker = read_marker(path) if os.path.exists(path) else None
+        if marker is None or marker.get("spec") != digest[:16]:
+            return False
+    return True
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class ResultManifest:
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.entries = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 忽略中断时写入不完整的行
+                        continue
+                    self.entries[entry["source"]] = entry
+
+    def is_up_to_date(self, source_path, key, digest):
+        """结果键一致，且输出文件均存在、未被重设Joint限制时视为最新"""
+        entry = self.entries.get(_normalize(source_path))
+        if entry is None or entry["key"] != key:
+            return False
+        return bool(entry["outputs"]) and outputs_intact(entry["outputs"], digest)
+
+    def record(self, source_path, key, outputs):
+        entry = {"source": _normalize(source_path), "key": key, "outputs": list(outputs)}
+        self.entries[entry["source"]] = entry
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
@@ -0,0 +1,165 @@
+"""
+胸部Joint限制重设工具，无需Blender
+
+直接修改已生成的RGBA模型文件中“左胸”“右胸”Joint的移动/角度限制，语义与插件的DEFAULT/CUSTOM模式一致。
+仅改写对应Joint记录中的48字节与生成标记中的参数摘要，文件其余内容保持不变（写入临时文件后替换原文件）。
+多版本输出的各版本系数不同，默认仅修改主输出，通过--variant指定要修改的版本。
+
+用法（在插件根目录下执行）：
+    python -m core.retune 模型目录 --factor 0.3
+    python -m core.retune 模型目录 --custom limit_lin_y_upper=0.02 limit_ang_x_upper=30
+    python -m core.retune 模型目录 --factor 0.3 --variant soft
+"""
+import argparse
+import math
+import os
+import re
+import struct
+import sys
+
+from .discovery import build_output_pattern, read_marker
+from .pmx import PmxError, read_header, read_model, replace_comment_e
+from .provenance import RETUNED_SPEC, format_marker, parse_marker, set_marker
+from .spec import DEFAULT_LIMITS, LIMIT_NAMES, parse_factor, scale_default_limits
+
+BREAST_JP_NAMES = ("左胸", "右胸")
+# 与导出时的缩放一致（导入0.08，导出12.5）
+EXPORT_SCALE = 12.5
+_LIMITS_STRUCT = struct.Struct("<12f")
+# 文件名冲突时添加的时间戳
+_TIMESTAMP_PATTERN = re.compile(r' \d{14}$')
+
+
+def limits_to_pmx(joint_limits):
+    """
+    Blender中的Joint限制（顺序同LIMIT_NAMES）→ PMX中的 lin_lower、lin_upper、ang_lower、ang_upper
+    与MMD Tools导出逻辑一致：坐标按xzy交换，移动限制乘以导出缩放，角度限制取反并交换上下限
+    """
+    limits = dict(zip(LIMIT_NAMES, joint_limits))
+    lin_lower = [limits[f"limit_lin_{a}_lower"] * EXPORT_SCALE for a in "xzy"]
+    lin_upper = [limits[f"limit_lin_{a}_upper"] * EXPORT_SCALE for a in "xzy"]
+    ang_lower = [-limits[f"limit_ang_{a}_upper"] for a in "xzy"]
+    ang_upper = [-limits[f"limit_ang_{a}_lower"] for a in "xzy"]
+    return tuple(lin_lower + lin_upper + ang_lower + ang_upper)
+
+
+def get_variant(match):
+    """没有生成标记时，由文件名（“名称 后缀_版本 时间戳”）得到版本名称，主输出为None"""
+    rest = _TIMESTAMP_PATTERN.sub("", match.group(2) or "")
+    return rest[1:] if rest.startswith("_") else None
+
+
+def find_outputs(directory, suffix, variant=None):
+    """
+    优先依据文件头中的生成标记识别插件生成的文件，没有标记时（旧版本插件生成）依据文件名及同目录下的源模型文件识别
+    仅返回版本为variant的文件（None为主输出）
+    """
+    pattern = build_output_pattern(suffix)
+    for root, dirs, files in os.walk(directory):
+        names = set(files)
+        for f in files:
+            name, ext = os.path.splitext(f)
+            if ext.lower() != ".pmx":
+                continue
+            filepath = os.path.join(root, f)
+            marker = read_marker(filepath)
+            if marker is not None:
+                if marker.get("var") == variant:
+                    yield filepath
+                continue
+            m = pattern.match(name)
+            if m and f"{m.group(1)}{ext}" in names and get_variant(m) == variant:
+                yield filepath
+
+
+def retune_file(filepath, pmx_limits, dry_run=False):
+    """
+    修改单个文件，返回 (文件路径, 修改的Joint数量, 错误信息)
+    生成标记中的参数摘要改为RETUNED_SPEC，使更新模式与继续处理不再将该文件视为原参数下的结果
+    """
+    try:
+        with open(filepath, "rb") as f:
+            model_data = f.read()
+        model = read_model(model_data)
+    except (OSError, PmxError, struct.error, IndexError) as e:
+        return filepath, 0, str(e)
+
+    offsets = [j.limits_offset for j in model.joints if j.name in BREAST_JP_NAMES]
+    if not offsets:
+        return filepath, 0, "未找到胸部Joint"
+    if not dry_run:
+        packed = _LIMITS_STRUCT.pack(*pmx_limits)
+        data = bytearray(model_data)
+        for offset in offsets:
+            data[offset:offset + len(packed)] = packed
+        comment_e = read_header(data).comment_e
+        record = parse_marker(comment_e)
+        if record is not None:
+            record["spec"] = RETUNED_SPEC
+            data = replace_comment_e(data, set_marker(comment_e, format_marker(record)))
+        # 先写入临时文件再替换，中途出错时不会留下写了一半的文件
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    return filepath, len(offsets), None
+
+
+def parse_custom_limits(items):
+    """解析“名称=数值”，角度以度为单位（与面板中显示的一致）"""
+    limits = dict(DEFAULT_LIMITS)
+    for item in items:
+        name, _, value = item.partition("=")
+        if name not in LIMIT_NAMES:
+            raise ValueError(f"未知的限制名称：{name}")
+        value = float(value)
+        limits[name] = value if name.startswith("limit_lin") else math.radians(value)
+    return tuple(limits[name] for name in LIMIT_NAMES)
+
+
+def factor_arg(value):
+    """argparse的type，与多版本输出中的系数使用相同的校验"""
+    try:
+        return parse_factor(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.retune", description="重设已生成模型的胸部Joint限制")
+    parser.add_argument("directory", help="模型目录（可跨越层级）")
+    parser.add_argument("--suffix", default="RGBA", help="生成模型时使用的名称后缀")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--factor", type=factor_arg, help="默认模式：抖动强度（0~1）")
+    mode.add_argument("--custom", nargs="+", metavar="NAME=VALUE",
+                      help="自定义模式：如 limit_lin_y_upper=0.02 limit_ang_x_upper=30，未填写的参数取默认值")
+    parser.add_argument("--variant", default=None,
+                        help="多版本输出时要修改的版本名称（如 soft），默认仅修改主输出")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为CPU核心数")
+    parser.add_argument("--dry-run", action="store_true", help="仅列出将被修改的文件")
+    args = parser.parse_args(argv)
+
+    if args.factor is not None:
+        joint_limits = scale_default_limits(args.factor)
+    else:
+        joint_limits = parse_custom_limits(args.custom)
+    pmx_limits = limits_to_pmx(joint_limits)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    files = list(find_outputs(args.directory, args.suffix, args.variant))
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for filepath, count, error in executor.map(retune_file, files, [pmx_limits] * len(files),
+                                                   [args.dry_run] * len(files), chunksize=8):
+            if error:
+                failed += 1
+                print(f"跳过：{filepath}（{error}）")
+            else:
+                print(f"{'待修改' if args.dry_run else '已修改'}：{filepath}（Joint数量：{count}）")
+    print(f"共{len(files)}个文件，失败{failed}个")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
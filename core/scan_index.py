@@ -0,0 +1,99 @@
+"""
+模型目录的持久化扫描索引
+
+记录每个目录的修改时间、其中模型文件的大小与修改时间、子目录列表。
+再次扫描时，目录的修改时间未变化则直接使用索引中的记录，仅对发生变化的目录重新列举。
+注意：原地覆盖文件内容不会改变目录的修改时间，此时索引中的文件大小与修改时间可能不是最新的。
+"""
+import json
+import os
+from typing import Dict, NamedTuple, Tuple
+
+MODEL_EXTENSIONS = ('.pmx', '.pmd')
+
+
+class DirRecord(NamedTuple):
+    path: str
+    mtime_ns: int
+    # ((文件名, 大小, 修改时间), ...)，仅包含模型文件
+    files: Tuple[Tuple[str, int, float], ...]
+    subdirs: Tuple[str, ...]
+    # 由调用方缓存的派生数据（如已处理文件的映射），目录变化时随记录一同失效
+    extra: Dict[str, object]
+
+
+class ScanIndex:
+    VERSION = 1
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path
+        self.dirs = {}
+        # 本次扫描中重新列举的目录数量
+        self.rescanned = 0
+        if index_path and os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION:
+                    self.dirs = data.get("dirs", {})
+            except (OSError, ValueError):
+                self.dirs = {}
+
+    def walk(self, root):
+        """按os.walk的顺序（自上而下）逐个返回目录记录"""
+        root = os.path.normpath(root)
+        seen = set()
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(path)
+            cached = self.dirs.get(path)
+            if cached is None or cached["mtime_ns"] != mtime_ns:
+                cached = self._scan(path, mtime_ns)
+                if cached is None:
+                    continue
+                self.dirs[path] = cached
+                self.rescanned += 1
+            yield DirRecord(path, mtime_ns, tuple(tuple(f) for f in cached["files"]), tuple(cached["subdirs"]),
+                            cached["extra"])
+            stack.extend(os.path.join(path, d) for d in reversed(cached["subdirs"]))
+
+        # 移除已不存在的目录
+        prefix = root + os.sep
+        for path in [p for p in self.dirs if (p == root or p.startswith(prefix)) and p not in seen]:
+            del self.dirs[path]
+
+    @staticmethod
+    def _scan(path, mtime_ns):
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.name.lower().endswith(MODEL_EXTENSIONS):
+                            # DirEntry.stat() 在Windows上无需额外的系统调用
+                            st = entry.stat()
+                            files.append([entry.name, st.st_size, st.st_mtime])
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        subdirs.sort()
+        files.sort()
+        return {"mtime_ns": mtime_ns, "files": files, "subdirs": subdirs, "extra": {}}
+
+    def save(self):
+        if not self.index_path:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "dirs": self.dirs}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
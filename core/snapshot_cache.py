@@ -0,0 +1,55 @@
+"""
+导入快照缓存的文件管理（不涉及bpy）
+
+快照文件为源模型刚导入后的压缩.blend文件，以源模型文件内容哈希与导入环境（MMD Tools及Blender版本）为键。
+命中时更新文件的修改时间，超出容量上限时按修改时间从旧到新淘汰（LRU）。
+"""
+import hashlib
+import os
+
+SNAPSHOT_EXTENSION = ".blend"
+
+
+class SnapshotStore:
+    def __init__(self, cache_dir, max_bytes, context=""):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.context_key = hashlib.sha1(context.encode("utf-8")).hexdigest()[:8]
+
+    def path_for(self, source_hash):
+        return os.path.join(self.cache_dir, f"{source_hash}_{self.context_key}{SNAPSHOT_EXTENSION}")
+
+    def lookup(self, source_hash):
+        """返回已存在的快照路径并标记为最近使用，不存在时返回None"""
+        path = self.path_for(source_hash)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def evict(self, keep=None):
+        """淘汰最久未使用的快照，直至总大小不超过上限，keep指定的快照不会被淘汰"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(SNAPSHOT_EXTENSION):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return 0
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.normcase(path) == os.path.normcase(keep):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
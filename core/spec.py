@@ -0,0 +1,113 @@
+import math
+import struct
+from typing import NamedTuple, Tuple
+
+# 胸部Joint限制参数名称，与rigid_body_constraint的属性名称一致
+LIMIT_NAMES = (
+    "limit_lin_x_lower", "limit_lin_x_upper",
+    "limit_lin_y_lower", "limit_lin_y_upper",
+    "limit_lin_z_lower", "limit_lin_z_upper",
+    "limit_ang_x_lower", "limit_ang_x_upper",
+    "limit_ang_y_lower", "limit_ang_y_upper",
+    "limit_ang_z_lower", "limit_ang_z_upper",
+)
+# 胸部Joint限制默认值（SetRgbaProperty中的默认值同样取自此处）
+DEFAULT_LIMITS = {
+    "limit_lin_x_lower": -0.04,
+    "limit_lin_x_upper": 0.04,
+    "limit_lin_y_lower": -0.032,
+    "limit_lin_y_upper": 0.024,
+    "limit_lin_z_lower": -0.04,
+    "limit_lin_z_upper": 0.04,
+    "limit_ang_x_lower": math.radians(-45),
+    "limit_ang_x_upper": math.radians(45),
+    "limit_ang_y_lower": math.radians(-15),
+    "limit_ang_y_upper": math.radians(15),
+    "limit_ang_z_lower": math.radians(-60),
+    "limit_ang_z_upper": math.radians(60),
+}
+
+
+def to_float32(value):
+    """按Blender浮点属性的存储精度（float32）取值"""
+    return struct.unpack('<f', struct.pack('<f', value))[0]
+
+
+def scale_limits(limits, factor):
+    """Joint限制统一乘上系数，角度在角度制下相乘"""
+    scaled = []
+    for name, value in zip(LIMIT_NAMES, limits):
+        if name.startswith("limit_ang"):
+            scaled.append(math.radians(math.degrees(value) * factor))
+        else:
+            scaled.append(value * factor)
+    return tuple(scaled)
+
+
+def scale_default_limits(factor):
+    """
+    DEFAULT模式下的Joint限制：各默认值统一乘上抖动强度系数
+    默认值先按float32取值，与逐个读取属性默认值的结果一致
+    """
+    return scale_limits([to_float32(DEFAULT_LIMITS[name]) for name in LIMIT_NAMES], factor)
+
+
+def format_factor(factor, decimals=2):
+    return f"{factor:.{decimals}f}".rstrip('0').rstrip('.')
+
+
+def parse_factor(value):
+    """解析抖动强度系数（保留两位小数），超出0~1时抛出ValueError"""
+    factor = round(float(value), 2)
+    if not 0 <= factor <= 1:
+        raise ValueError(f"系数超出范围（0~1）：{value}")
+    return factor
+
+
+def parse_variants(text):
+    """
+    解析多版本输出设置，格式为以逗号分隔的“名称=系数”或“系数”，如“soft=0.3, 0.5, hard=0.8”
+    未填写名称时以系数作为名称，返回 [(名称, 系数), ...]，格式错误时抛出ValueError
+    """
+    variants = []
+    for item in text.replace("，", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, value = item.rpartition("=")
+        factor = parse_factor(value.strip())
+        name = name.strip() if sep else format_factor(factor)
+        if not name or name in (n for n, _ in variants):
+            raise ValueError(f"名称为空或重复：{item}")
+        variants.append((name, factor))
+    return variants
+
+
+class TransplantSpec(NamedTuple):
+    """
+    批处理开始时由场景属性编译得到的参数，不可变且可被pickle
+    后续流程仅读取该参数，而不再读取场景属性
+    """
+    # 最终的胸部Joint限制，顺序同LIMIT_NAMES
+    joint_limits: Tuple[float, ...]
+    # 多版本输出，((版本名称, Joint限制), ...)，为空时仅按joint_limits输出一个文件
+    variants: Tuple[Tuple[str, Tuple[float, ...]], ...]
+    collision: str
+    collision_group_number: int
+    rb_scale_factor: float
+    suffix: str
+    # 模型目录（绝对路径）
+    directory: str
+    search_strategy: str
+    threshold: int
+    conflict_strategy: str
+    # 后台预读的文件数量，0表示不预读
+    prefetch_count: int
+    # 导入快照缓存的容量上限（MB），0表示不使用导入快照缓存
+    snapshot_cache_size: int
+    # 是否开启分阶段性能分析
+    profile: bool
+    # 是否从上次中断的位置继续处理
+    resume: bool
+    # 低内存模式：处理期间关闭全局撤销，每个模型处理完成后删除残留的数据块
+    low_memory: bool
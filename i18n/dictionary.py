@@ -5,6 +5,11 @@ dictionary = {
         ("*", "Model directory not found!"): "模型目录不存在！",
         ("*", "Invalid root directory! Change to subfolder."): "模型目录为盘符根目录，请更换为其它目录！",
         ("*", "Actual files to process: {}. Total files: {}, skipped: {}"): "实际待处理数量：{}。文件总数：{}，跳过数量：{}",
+        ("*", "Preflight"): "预检",
+        ("*", "Model file not found!"): "模型文件不存在！",
+        ("*", "Start Tuning"): "开始调整",
+        ("*", "Export"): "导出",
+        ("*", "End Tuning"): "结束调整",
     }
 }
 
@@ -0,0 +1,188 @@
+import json
+import os
+import time
+
+import bpy
+
+from .set_rgba_operators import (BREAST_JP_NAME_L, BREAST_JP_NAME_R, INVALID_CHARS, clean_tmp_collection,
+                                 compile_spec, export_outputs, get_breast_front_y, get_joint_limits, get_mmd_info,
+                                 move_rgba_breast, restore_collision_state, scale_breast_rbs,
+                                 set_collision_and_resort, set_joint_limits, transplant)
+from ..core.spec import parse_variants
+from ..utils import TMP_COLLECTION_NAME, deselect_all_objects, is_mmd_tools_enabled, select_and_activate
+
+# 调整会话集合名称，会话模型保留在该集合中，批处理清理临时集合时不受影响
+SESSION_COLLECTION_NAME = "KAFEI调整会话"
+# 会话模型根物体上记录会话状态（源文件、当前的刚体缩放、胸部区域与胸饰信息）的属性名称
+SESSION_KEY = "mmd_jiggle_session"
+
+# 参数修改后需要重新设置的阶段
+STAGE_LIMITS = "limits"
+STAGE_SCALE = "scale"
+STAGE_COLLISION = "collision"
+
+
+def get_session_root():
+    """获取调整会话中的模型根物体，无会话时返回None"""
+    collection = bpy.data.collections.get(SESSION_COLLECTION_NAME)
+    if collection is None:
+        return None
+    return next((obj for obj in collection.objects if obj.parent is None and SESSION_KEY in obj), None)
+
+
+def update_session(context, stage):
+    """
+    调整会话进行中时，按修改的参数仅重新设置受影响的阶段
+    - limits：重新设置胸部Joint限制
+    - scale：重新设置胸部刚体半径，再移动RGBA胸部使胸部刚体前端重新与伪胸部骨骼tail对齐，
+      最后重新设置碰撞（胸部衝突刚体由缩放后的胸部刚体复制而来）
+    - collision：恢复设置碰撞前的状态（删除已创建的衝突刚体）后重新设置碰撞组并重排序
+    """
+    root = get_session_root()
+    if root is None:
+        return
+    props = context.scene.mmd_jiggle_tools_set_rgba
+    state = json.loads(root[SESSION_KEY])
+    armature, objs, joint_parent, rb_parent = get_mmd_info(root)
+
+    start_time = time.time()
+    if stage == STAGE_LIMITS:
+        set_joint_limits(get_joint_limits(props), joint_parent)
+    else:
+        try:
+            spec = compile_spec(props)
+        except ValueError as e:
+            print(f"调整会话：参数错误，未重新设置{stage}：{e}")
+            return
+        if stage == STAGE_SCALE:
+            if spec.rb_scale_factor == state["rb_scale_factor"]:
+                return
+            b_rb_l = next(r for r in rb_parent.children if r.mmd_rigid.name_j == BREAST_JP_NAME_L)
+            b_rb_r = next(r for r in rb_parent.children if r.mmd_rigid.name_j == BREAST_JP_NAME_R)
+            scale_breast_rbs(b_rb_l, b_rb_r, state["rgba_radius"], state["x_r"], state["z_r"], spec.rb_scale_factor)
+            # 与移植时一致，胸部刚体前端对齐到伪胸部骨骼tail的y坐标
+            move_rgba_breast(root, state["breast_front_y"] - get_breast_front_y(b_rb_l))
+            state["rb_scale_factor"] = spec.rb_scale_factor
+            root[SESSION_KEY] = json.dumps(state, ensure_ascii=False)
+        restore_collision_state(rb_parent)
+        set_collision_and_resort(root, state["accessory_breast_rel_map"], set(state["accessory_bone_names"]), spec)
+    print(f"调整会话：已重新设置{stage}，耗时{(time.time() - start_time) * 1000:.1f}ms")
+
+
+def start_session(operator, props, filepath):
+    """按当前参数移植模型并保留在会话集合中（替换已有的会话），成功时返回True"""
+    # 同一时间仅保留一个会话
+    clean_tmp_collection(SESSION_COLLECTION_NAME)
+    start_time = time.time()
+    spec = compile_spec(props)
+    try:
+        result = transplant(spec, filepath, keep_collision_state=True)
+    except Exception as e:
+        clean_tmp_collection()
+        operator.report({'ERROR'}, f"移植失败：{e}")
+        return False
+    if result.error:
+        clean_tmp_collection()
+        operator.report({'ERROR'}, result.error)
+        return False
+
+    # 临时集合转为会话集合，后续批处理清理临时集合时不影响会话模型
+    bpy.data.collections[TMP_COLLECTION_NAME].name = SESSION_COLLECTION_NAME
+    analysis = result.analysis
+    result.root[SESSION_KEY] = json.dumps({
+        "filepath": filepath,
+        "source_hash": result.source_hash,
+        "rb_scale_factor": spec.rb_scale_factor,
+        # 修改刚体缩放时使用：缩放前的胸部刚体半径、胸部区域半径、胸部刚体前端对齐的位置
+        "rgba_radius": result.rgba_radius,
+        "x_r": analysis.x_r,
+        "z_r": analysis.z_r,
+        "breast_front_y": analysis.dummy_tail_r[1],
+        "accessory_breast_rel_map": analysis.accessory_breast_rel_map,
+        "accessory_bone_names": list(analysis.accessory_bone_names),
+    }, ensure_ascii=False)
+    deselect_all_objects()
+    select_and_activate(result.root)
+    print(f"调整会话：已移植{filepath}，耗时{time.time() - start_time:.2f}s")
+    return True
+
+
+class StartSessionOperator(bpy.types.Operator):
+    bl_idname = "mmd_jiggle_tools.start_session"
+    bl_label = "Start Tuning"
+    bl_description = ("开始调整会话\n"
+                      "对指定模型执行一次RGBA式胸部物理移植并保留在场景中，"
+                      "之后修改抖动、刚体缩放与碰撞参数时仅重新设置受影响的部分，"
+                      "确认效果后再导出")
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        props = context.scene.mmd_jiggle_tools_set_rgba
+        if not is_mmd_tools_enabled():
+            self.report({'ERROR'}, "MMD Tools plugin is not enabled!")
+            return {'CANCELLED'}
+        filepath = bpy.path.abspath(props.session_file)
+        if not os.path.isfile(filepath) or not filepath.lower().endswith(".pmx"):
+            self.report({'ERROR'}, "Model file not found!")
+            return {'CANCELLED'}
+        # 导出时使用的后缀、多版本输出需提前校验
+        if not check_session_props(self, props):
+            return {'CANCELLED'}
+        if not start_session(self, props, filepath):
+            return {'CANCELLED'}
+        self.report({'INFO'}, "调整会话已开始")
+        return {'FINISHED'}
+
+
+class ExportSessionOperator(bpy.types.Operator):
+    bl_idname = "mmd_jiggle_tools.export_session"
+    bl_label = "Export"
+    bl_description = "按当前参数导出调整会话中的模型（多版本输出时逐个版本导出）"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return get_session_root() is not None
+
+    def execute(self, context):
+        props = context.scene.mmd_jiggle_tools_set_rgba
+        if not check_session_props(self, props):
+            return {'CANCELLED'}
+        root = get_session_root()
+        state = json.loads(root[SESSION_KEY])
+        new_filepaths = export_outputs(root, compile_spec(props), state["filepath"], state["source_hash"])
+        # 多版本输出时Joint限制停留在最后一个版本，恢复为当前参数以便继续调整
+        set_joint_limits(get_joint_limits(props), get_mmd_info(root)[2])
+        self.report({'INFO'}, f"导出完成，模型文件地址：{'，'.join(new_filepaths)}")
+        return {'FINISHED'}
+
+
+class EndSessionOperator(bpy.types.Operator):
+    bl_idname = "mmd_jiggle_tools.end_session"
+    bl_label = "End Tuning"
+    bl_description = "结束调整会话，删除场景中的会话模型（不导出）"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return SESSION_COLLECTION_NAME in bpy.data.collections
+
+    def execute(self, context):
+        clean_tmp_collection(SESSION_COLLECTION_NAME)
+        return {'FINISHED'}
+
+
+def check_session_props(operator, props):
+    batch = props.batch
+    if any(char in batch.suffix for char in INVALID_CHARS):
+        operator.report({'ERROR'}, 'Invalid name suffix!')
+        return False
+    try:
+        variants = parse_variants(batch.variants)
+    except ValueError as e:
+        operator.report({'ERROR'}, f"多版本输出格式错误：{e}")
+        return False
+    if any(char in name for name, _ in variants for char in INVALID_CHARS):
+        operator.report({'ERROR'}, 'Invalid name suffix!')
+        return False
+    return True
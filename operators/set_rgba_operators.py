@@ -1,20 +1,44 @@
-import math
+import json
 import os
+import subprocess
+import sys
 from collections import defaultdict, OrderedDict
 from datetime import datetime
+from typing import NamedTuple, Optional
 
 import bmesh
 import mathutils
 from mathutils.bvhtree import BVHTree
 
+from ..core.analysis import analyze_model
+from ..core.analysis_cache import AnalysisCache
+from ..core.bone_index import BoneIndex
+from ..core.collision import ALL_GROUPS_BITS, CollisionMatrix, bits_to_mask, groups_to_bits
+from ..core.dedup import copy_output, duplicate_output_path
+from ..core.discovery import FileDiscovery
+from ..core.joint_graph import JointGraph
+from ..core.journal import BatchJournal
+from ..core.lazy_import import LazyModule
+from ..core.naming import (BREAST_RB_PATTERN, UPPER_BODY2_NAME, WEIGHT_THRESHOLD,
+                           check_girlsfrontline_breast_bones_and_rbs, int2base)
+from ..core.prefetch import PrefetchedFile, Prefetcher
+from ..core.profiler import (StageProfiler, get_current_rss, get_peak_rss, get_profile_env_path,
+                             is_profile_env_enabled)
+from ..core.provenance import make_marker, set_marker
+from ..core.report import STATUS_SKIPPED, BatchReport
+from ..core.result_cache import ResultManifest, hash_file, make_environment_key, make_result_key, spec_digest
+from ..core.scan_index import ScanIndex
+from ..core.snapshot_cache import SnapshotStore
+from ..core.spec import LIMIT_NAMES, TransplantSpec, parse_variants, scale_default_limits, scale_limits
 from ..utils import *
 
+np = LazyModule("numpy")
+
 BREAST_BL_NAME_L = "胸.L"
 BREAST_BL_NAME_R = "胸.R"
 BREAST_JP_NAME_L = "左胸"
 BREAST_JP_NAME_R = "右胸"
 UPPER_BODY_NAME = "上半身"
-UPPER_BODY2_NAME = "上半身2"
 # RGBA胸部刚体名称
 RGBA_RB_NAMES = ['右胸_後', '右胸_回転', '右胸_前', '右胸_前後', '右胸',
                  '左胸_後', '左胸_回転', '左胸_前', '左胸_前後', '左胸']
@@ -29,51 +53,27 @@ RGBA_JOINT_NAMES = [
 LIMB_RB_NAMES = ["右手首", "右手", "右ひじ", "右腕", "左手首", "左手", "左ひじ", "左腕"]
 # 四肢 + 躯干 主体刚体碰撞群组  PE 1~16 MMD Tools 0~15
 LIMB_RB_GROUP = 13
+# 设置该环境变量后，输出最终的碰撞组交互矩阵
+DUMP_COLLISION_ENV = "MMD_JIGGLE_DUMP_COLLISION"
+# 刚体上记录设置碰撞前状态的自定义属性名称（调整会话中使用）
+COLLISION_STATE_KEY = "mmd_jiggle_collision_state"
+# RGBA胸部素材文件
+RGBA_FILE_L = os.path.join(os.path.dirname(os.path.dirname(__file__)), "externals", "RGBA_L.pmx")
+RGBA_FILE_R = os.path.join(os.path.dirname(os.path.dirname(__file__)), "externals", "RGBA_R.pmx")
+# 由插件创建的刚体名称（衝突刚体 + 上半身刚体）
+ADDON_RB_NAMES = {f"{n}衝突" for n in LIMB_RB_NAMES + [BREAST_JP_NAME_L, BREAST_JP_NAME_R]} | {"上半身2_R", "上半身2_L"}
 
 RB_JOINT_PREFIX_REGEXP = re.compile(r'(?P<prefix>[0-9A-Z]{3}_)(?P<name>.*)')
 
-BREAST_BONE_PATTERN = re.compile(
-    r'^胸'  # 开头必须是“胸”
-    r'([_上下前後先間親亲変形回転支え基W筋]*)'
-    r'([0-9０-９])?'  # 可选的单独数字（半角或全角）
-    r'([錘先D])?'
-    r'(\.\d{3})?'  # 可选的前置序号
-    r'(\.[LR])?'  # 可选的左右标识
-    r'(\.\d{3})?'  # 可选的后置序号
-    r'$'
-)
-
-BREAST_RB_PATTERN = re.compile(
-    r'^([_左右胸]*)'  # 开头必须是“胸”
-    r'([_上下前後先間親亲変形回転支え基W筋]*)'
-    r'([0-9０-９])?'  # 可选的单独数字（半角或全角）
-    r'([錘先D])?'
-    r'(\.\d{3})?'  # 可选的前置序号
-    r'(\.[LR])?'  # 可选的左右标识
-    r'(\.\d{3})?'  # 可选的后置序号
-    r'$'
-)
 PHYSICAL_FRAME_NAME = "物理"
 COLLISION_MAP = {
     "DEFAULT": "默认",
     "NO_COLLISION": "无碰撞",
 }
 
-# 胸部权重阈值
-WEIGHT_THRESHOLD = 0.25
 # 文件名非法字符
 INVALID_CHARS = '<>:"/\\|?*'
 
-# 少女前线2单独校验
-def check_girlsfrontline_breast_bones_and_rbs(b_name):
-    if "chest_r" in b_name.lower():
-        return True
-    if "chest_l" in b_name.lower():
-        return True
-    if "bone" in b_name.lower() and "ches" in b_name.lower():
-        return True
-    return False
-
 
 def get_mmd_info(root):
     armature = find_pmx_armature(root)
@@ -99,6 +99,10 @@ class SetRgbaOperator(bpy.types.Operator):
                       "生成的模型无法在Blender、MMM、NexGiMa中直接进行烘焙\n"
                       "如需烘焙，请使用MMD桥生成带物理的VMD文件，或采用ABC流程")
     bl_options = {'REGISTER', 'UNDO'}  # 启用撤销功能
+    # 分阶段性能分析，默认不开启，批处理开始时按设置替换
+    profiler = StageProfiler()
+    # 当前源模型的顶点/骨骼/刚体数量，供批处理报告使用
+    source_counts = {}
 
     def execute(self, context):
         self.main(context)
@@ -109,30 +113,147 @@ class SetRgbaOperator(bpy.types.Operator):
         props = scene.mmd_jiggle_tools_set_rgba
         if not self.check_props(props):
             return
-        self.batch_process(self.set_rgba, props)
-
-    def batch_process(self, func, props):
+        # 批处理开始时编译参数，后续流程不再读取场景属性
+        spec = compile_spec(props)
+        if not spec.low_memory:
+            self.batch_process(self.set_rgba, spec)
+            return
+        # 低内存模式下处理期间关闭全局撤销，结束后恢复
+        edit_prefs = context.preferences.edit
+        use_global_undo = edit_prefs.use_global_undo
+        edit_prefs.use_global_undo = False
+        try:
+            self.batch_process(self.set_rgba, spec)
+        finally:
+            edit_prefs.use_global_undo = use_global_undo
+
+    def batch_process(self, func, spec):
         start_time = time.time()
-        batch = props.batch
-        abs_path = bpy.path.abspath(batch.directory)
+        abs_path = spec.directory
         name_msg_map = OrderedDict()
 
-        # 搜索模型文件
-        file_list = recursive_search(props)
-        file_count = len(file_list)
+        # 搜索模型文件，边遍历目录边处理
+        discovery = recursive_search(spec)
+        # 后台线程遍历目录并预读后续模型文件（同时计算内容哈希），与当前模型的处理并行
+        prefetcher = Prefetcher(discovery, depth=spec.prefetch_count) if spec.prefetch_count > 0 else None
+        files = iter(prefetcher) if prefetcher else (PrefetchedFile(f, 0, None) for f in discovery)
+        # 处理结果清单：源文件内容、插件版本、RGBA素材或参数发生变化时，才需要重新生成
+        manifest = ResultManifest(get_result_manifest_path(abs_path))
+        environment_key = make_environment_key(get_own_addon_version(), get_mmd_tools_version(),
+                                               [hash_file(RGBA_FILE_L), hash_file(RGBA_FILE_R)], spec)
+        # 与生成标记中的参数摘要比较，识别被core.retune重设过的输出
+        digest = spec_digest(spec)
+        up_to_date_count = 0
+        # 批处理日志：记录每个源文件的开始、完成与失败，用于中断后继续处理
+        journal = BatchJournal(get_journal_path(abs_path))
+        resumed_count = 0
+        # 低内存模式下，每个模型处理完成后数据块应恢复到该基线
+        data_baseline = get_data_names() if spec.low_memory else None
+        # 各阶段耗时始终记录（仅耗时，供批处理报告使用）；开启性能分析时才记录事件、CPU时间、内存与物体数量，并输出Chrome Trace与汇总
+        profile_enabled = spec.profile or is_profile_env_enabled()
+        self.profiler = StageProfiler(profile_enabled, lambda: len(bpy.data.objects), record_stages=True)
+        # 批处理报告，逐个模型追加写入模型目录
+        report = BatchReport(abs_path)
+        # 内容相同的源文件只处理一次：源文件哈希 → (首个源文件路径, 状态, 信息, 生成的文件, 耗时)
+        processed_sources = {}
+        duplicate_count = 0
+        saved_time = 0
 
         # 批量处理
-        for index, filepath in enumerate(file_list):
-            file_start = time.time()
-            name, status, msg = func(props, f_path=filepath)
-            if status == "ERROR":
-                name_msg_map[name] = msg
-
-            file_name = os.path.basename(filepath)
-            elapsed_file = time.time() - file_start
-            elapsed_total = time.time() - start_time
-            print(f'文件“{file_name}”处理完成，进度{index + 1}/{file_count}'
-                  f'(当前耗时{elapsed_file:.2f}s，总耗时{elapsed_total:.2f}s)')
+        try:
+            for index, prefetched in enumerate(files):
+                filepath = prefetched.path
+                file_name = os.path.basename(filepath)
+                file_start = time.time()
+                source_hash = prefetched.sha256 or hash_file(filepath)
+                result_key = make_result_key(source_hash, environment_key)
+                file_size = prefetched.size or os.path.getsize(filepath)
+                if spec.conflict_strategy == 'UPDATE' and manifest.is_up_to_date(filepath, result_key, digest):
+                    up_to_date_count += 1
+                    print(f'文件“{file_name}”及参数均未变化，且生成的文件仍存在，跳过')
+                    report.add(filepath, STATUS_SKIPPED, "文件及参数均未变化", size=file_size)
+                    continue
+                if spec.resume:
+                    skip, reason = journal.resume_state(filepath, result_key, digest)
+                    if skip:
+                        resumed_count += 1
+                        print(f'文件“{file_name}”{reason}，跳过')
+                        report.add(filepath, STATUS_SKIPPED, reason, size=file_size)
+                        continue
+
+                if source_hash in processed_sources:
+                    # 与已处理的源文件内容相同，复用其结果
+                    first_path, status, msg, first_outputs, first_elapsed = processed_sources[source_hash]
+                    name = os.path.splitext(file_name)[0]
+                    outputs = [duplicate_output_path(o, first_path, filepath, spec.conflict_strategy == 'UPDATE')
+                               for o in first_outputs]
+                    for first_output, output in zip(first_outputs, outputs):
+                        copy_output(first_output, output, file_name)
+                    duplicate_count += 1
+                    saved_time += first_elapsed
+                    print(f'文件“{file_name}”与“{first_path}”内容相同，已复用其结果：{outputs}')
+                    report.add(filepath, status, msg, outputs, file_size, elapsed=time.time() - file_start,
+                               reused_from=first_path)
+                else:
+                    self.profiler.begin_file(file_name)
+                    self.source_counts = {}
+                    journal.started(filepath, result_key)
+                    try:
+                        name, status, msg, outputs = func(spec, f_path=filepath, source_hash=source_hash)
+                    except Exception as e:
+                        # 导入/导出等异常视为暂时性错误，继续处理时重试
+                        journal.failed(filepath, result_key, str(e), transient=True)
+                        raise
+                    self.profiler.end_file()
+                    processed_sources[source_hash] = (filepath, status, msg, outputs, time.time() - file_start)
+                    if data_baseline is not None:
+                        remove_leaked_data(file_name, data_baseline)
+                    report.add(filepath, status, msg, outputs, file_size, self.source_counts,
+                               self.profiler.file_stages, time.time() - file_start, rss=get_current_rss(),
+                               peak_rss=self.profiler.file_peak_rss)
+                if status == "ERROR":
+                    name_msg_map[name] = msg
+                    # 模型本身的问题，再次处理结果相同
+                    journal.failed(filepath, result_key, msg, transient=False)
+                else:
+                    manifest.record(filepath, result_key, outputs)
+                    journal.completed(filepath, result_key, outputs)
+
+                elapsed_file = time.time() - file_start
+                elapsed_total = time.time() - start_time
+                # 目录遍历完成前，显示目前已发现的文件数量
+                progress = f"{index + 1}/{discovery.found}" if discovery.done else f"{index + 1}/已发现{discovery.found}"
+                print(f'文件“{file_name}”处理完成，进度{progress}'
+                      f'(当前耗时{elapsed_file:.2f}s，总耗时{elapsed_total:.2f}s，'
+                      f'内存{get_current_rss() / 1048576:.0f}MB，峰值{get_peak_rss() / 1048576:.0f}MB)')
+        finally:
+            files.close()
+            if prefetcher:
+                prefetcher.close()
+            report_summary = report.close()
+            journal.close()
+
+        file_count = discovery.found
+        print(bpy.app.translations.pgettext_iface("Actual files to process: {}. Total files: {}, skipped: {}").format(
+            file_count, discovery.total_pmx_count, discovery.total_pmx_count - file_count
+        ))
+
+        if profile_enabled:
+            self.profiler.end_file()
+            trace_path = get_profile_env_path() or os.path.join(
+                get_cache_dir("profiles"), f"{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+            self.profiler.write_chrome_trace(trace_path)
+            print(self.profiler.format_summary())
+            print(f"性能分析结果（Chrome Trace格式）：{trace_path}")
+
+        if resumed_count:
+            print(f"继续上次的处理，跳过{resumed_count}个上次已完成或无法处理的文件")
+        if duplicate_count:
+            print(f"重复的源文件数量：{duplicate_count}，已复用结果，节省约{saved_time:.2f}s")
+        print(f"进程峰值内存：{report_summary['peak_rss_mb']:.0f}MB")
+        print(f"单个模型耗时 p50 {report_summary['latency_p50_s']:.2f}s，p95 {report_summary['latency_p95_s']:.2f}s，"
+              f"最大 {report_summary['latency_max_s']:.2f}s")
+        print(f"批处理报告：{report.jsonl_path}，{report.csv_path}")
 
         # 汇总结果
         total_time = time.time() - start_time
@@ -145,7 +266,8 @@ class SetRgbaOperator(bpy.types.Operator):
             self.report({'WARNING'}, f"{combined_msg}")
             self.report({'WARNING'}, msg)
         else:
-            msg = f"目录“{abs_path}”处理完成（总耗时{total_time:.2f}s）"
+            msg = (f"目录“{abs_path}”处理完成（已是最新而跳过{up_to_date_count}个，"
+                   f"重复而复用{duplicate_count}个，节省约{saved_time:.2f}s，总耗时{total_time:.2f}s）")
             self.report({'INFO'}, msg)
 
     def check_props(self, props):
@@ -157,190 +279,356 @@ class SetRgbaOperator(bpy.types.Operator):
         if not check_batch_props(self, batch):
             return False
 
+        try:
+            variants = parse_variants(batch.variants)
+        except ValueError as e:
+            self.report({'ERROR'}, f"多版本输出格式错误：{e}")
+            return False
+        if any(char in name for name, _ in variants for char in INVALID_CHARS):
+            self.report({'ERROR'}, 'Invalid name suffix!')
+            return False
+
         return True
 
-    def set_rgba(self, props, f_path=None):
-        factor = round_to_two_decimals(props.factor)
-        rb_scale_factor = round_to_two_decimals(props.rb_scale_factor)
+    def set_rgba(self, spec, f_path=None, source_hash=None):
         filepath = f_path
+        profiler = self.profiler
+        result = transplant(spec, filepath, source_hash, profiler)
+        self.source_counts = result.source_counts
+        if result.error:
+            clean_tmp_collection()
+            return result.name, "ERROR", result.error, []
+
+        # 导出模型
+        profiler.stage("export")
+        new_filepaths = export_outputs(result.root, spec, filepath, result.source_hash)
+
+        # 删除临时集合内所有物体
+        profiler.stage("clean_tmp_collection")
+        clean_tmp_collection()
+
+        return result.name, "INFO", f"执行完成，模型文件地址：{'，'.join(new_filepaths)}", new_filepaths
+
+
+class TransplantResult(NamedTuple):
+    name: str
+    # 分析失败时的错误信息，此时root等字段为None
+    error: Optional[str]
+    root: object
+    source_hash: Optional[str]
+    # 源模型的顶点/骨骼/刚体数量
+    source_counts: dict
+    analysis: object
+    # RGBA胸部刚体缩放前的半径，调整会话中修改刚体缩放时使用
+    rgba_radius: float = 0.0
 
-        # 防止MMD Tools插件的导入Bug，这里需将当前帧调整为0或1
-        bpy.context.scene.frame_current = 0
-        # 获取临时集合，在临时集合中进行模型的处理
-        get_collection(TMP_COLLECTION_NAME)
 
-        # 导入源模型
+def transplant(spec, filepath, source_hash=None, profiler=None, keep_collision_state=False):
+    """
+    在临时集合中导入源模型并完成RGBA胸部物理移植（不导出）
+    keep_collision_state为True时，在设置碰撞前记录各刚体的碰撞状态，供调整会话中重新设置碰撞时恢复
+    """
+    profiler = profiler or StageProfiler()
+
+    # 防止MMD Tools插件的导入Bug，这里需将当前帧调整为0或1
+    bpy.context.scene.frame_current = 0
+    # 获取临时集合，在临时集合中进行模型的处理
+    get_collection(TMP_COLLECTION_NAME)
+
+    # 导入源模型，开启导入缓存时优先从快照中载入
+    profiler.stage("import")
+    if spec.snapshot_cache_size and source_hash:
+        store = SnapshotStore(get_cache_dir("snapshots"), spec.snapshot_cache_size * 1024 * 1024,
+                              repr((tuple(get_mmd_tools_version()), tuple(bpy.app.version))))
+        import_pmx_cached(filepath, source_hash, store)
+    else:
         import_pmx(filepath)
-        root = bpy.context.active_object
-        armature, objs, joint_parent, rb_parent = get_mmd_info(root)
-        obj = objs[0]
-
-        # 获取源模型名称
-        abs_path = bpy.path.abspath(filepath)
-        file_dir = os.path.dirname(bpy.path.abspath(filepath))
-        file_name = os.path.basename(abs_path)
-        name, ext = os.path.splitext(file_name)
-
-        # 获取源模型胸部骨骼列表
-        breast_bones = get_breast_bones(root)
-        if not breast_bones:
-            clean_tmp_collection()
-            return name, "ERROR", "源模型中未找到胸部骨骼"
-        breast_names = [b.name for b in breast_bones]
-
-        # 筛选源模型胸部骨骼中的水平胸部骨骼，用于计算位置
-        horizontal_bones = filter_horizontal_bones(armature, breast_bones)
-        # 从源模型胸部顶点中筛选权重大于WEIGHT_THRESHOLD的顶点，作为胸部网格范围，用于定位伪胸部骨骼的坐标
-        influenced_verts = get_vertices_influenced_by_bones(obj, [b.name for b in breast_bones])
-        if not influenced_verts:
-            clean_tmp_collection()
-            return name, "ERROR", f"源模型中胸部顶点权重均小于{WEIGHT_THRESHOLD}，无法获取有效胸部网格范围"
+    root = bpy.context.active_object
+    armature, objs, joint_parent, rb_parent = get_mmd_info(root)
+    obj = objs[0]
+    source_counts = {"vertices": sum(len(o.data.vertices) for o in objs),
+                     "bones": len(armature.data.bones), "rigid_bodies": len(rb_parent.children)}
+
+    # 获取源模型名称
+    abs_path = bpy.path.abspath(filepath)
+    file_name = os.path.basename(abs_path)
+    name, ext = os.path.splitext(file_name)
+
+    # 构建源模型骨骼索引，胸部骨骼识别与胸饰子树展开均基于该索引，仅计算一次
+    profiler.stage("analysis")
+    bone_index = BoneIndex.from_armature(armature)
+    # 分析源模型（胸部骨骼、伪胸部骨骼坐标、胸部饰品信息），相同的源模型仅分析一次
+    # 插件版本与MMD Tools版本均会影响分析结果，与处理结果清单的环境键一致
+    analysis_cache = AnalysisCache(get_cache_dir("analysis"),
+                                   repr((tuple(get_own_addon_version()), tuple(get_mmd_tools_version()))))
+    analysis = analysis_cache.load(source_hash) if source_hash else None
+    if analysis is None:
+        analysis = analyze_source(obj, joint_parent, rb_parent, bone_index)
+        if source_hash:
+            analysis_cache.save(source_hash, analysis)
+    else:
+        print(f"使用已缓存的源模型分析结果：{file_name}")
+    if analysis.error:
+        return TransplantResult(name, analysis.error, None, source_hash, source_counts, analysis)
+    breast_names = analysis.breast_names
+    accessory_breast_rel_map = analysis.accessory_breast_rel_map
+    # 分析结果中的Joint为MMD名称，解析为当前场景中的物体名称
+    kept_joints = resolve_kept_joints(joint_parent, analysis.kept_joints)
+    accessory_bone_names = set(analysis.accessory_bone_names)
+
+    # 获取源模型“物理”显示枠索引
+    frames = root.mmd_root.display_item_frames
+    physics_frame_index = next((i for i, frame in enumerate(frames) if frame.name == PHYSICAL_FRAME_NAME), -1)
+
+    # 导入RGBA胸部
+    profiler.stage("import_rgba")
+    import_pmx(RGBA_FILE_L)
+    root_l = bpy.context.active_object
+    armature_l, objs_l, joint_parent_l, rb_parent_l = get_mmd_info(root_l)
+    import_pmx(RGBA_FILE_R)
+    root_r = bpy.context.active_object
+    armature_r, objs_r, joint_parent_r, rb_parent_r = get_mmd_info(root_r)
+
+    # 移除RGBA胸部网格对象
+    for breast_obj in objs_l + objs_r:
+        bpy.data.objects.remove(breast_obj)
+
+    # 获取RGBA胸部中左右胸骨
+    bone_l = armature_l.pose.bones.get(BREAST_BL_NAME_L)
+    if not bone_l:
+        clean_tmp_collection()
+        raise RuntimeError(f"未在胸部素材中找到{BREAST_BL_NAME_L}骨骼")
+    bone_r = armature_r.pose.bones.get(BREAST_BL_NAME_R)
+    if not bone_r:
+        clean_tmp_collection()
+        raise RuntimeError(f"未在胸部素材中找到{BREAST_BL_NAME_R}骨骼")
+
+    # 伪胸部骨骼的坐标
+    dummy_head_lo_l, dummy_head_lo_r, dummy_tail_lo_l, dummy_tail_lo_r = (mathutils.Vector(co) for co in (
+        analysis.dummy_head_l, analysis.dummy_head_r, analysis.dummy_tail_l, analysis.dummy_tail_r))
+    x_r, z_r = analysis.x_r, analysis.z_r
+
+    # 调整并应用RGBA胸部骨骼的缩放、旋转、位置
+    profiler.stage("fit")
+    rgba_radius = apply_scale_diff(rb_parent_l, rb_parent_r, x_r, z_r, spec.rb_scale_factor)
+    apply_rotation_diff(
+        root_l, armature_l, bone_l, dummy_head_lo_l, dummy_tail_lo_l,
+        root_r, armature_r, bone_r, dummy_head_lo_r, dummy_tail_lo_r)
+    apply_location_diff(root_l, armature_l, bone_l, dummy_tail_lo_l,
+                        root_r, armature_r, bone_r, dummy_tail_lo_r, rb_parent_l)
+    # 删除源模型胸部骨骼及对应的刚体Joint，防止刚体Joint重名
+    profiler.stage("remove_breast_bones")
+    b_names_l, b_names_r = remove_breast_bones(root, armature, rb_parent, kept_joints, bone_index, breast_names)
+    # 通过MMD Tools手术，合并模型
+    profiler.stage("join_model")
+    # 合并后RGBA胸部的根物体被删除，其注释文本不再被引用，需单独删除
+    rgba_texts = get_comment_texts(root_l) + get_comment_texts(root_r)
+    join_model(armature, armature_l, armature_r)
+    for text in rgba_texts:
+        bpy.data.texts.remove(text, do_unlink=True)
+
+    # 重新获取源模型，即合并后的模型
+    armature, objs, _, rb_parent = get_mmd_info(root)
+    obj = objs[0]
+
+    # 将胸部权重从源模型转移到左胸和右胸上
+    profiler.stage("trans_vg")
+    for name_l in b_names_l:
+        trans_vg(obj, name_l, BREAST_BL_NAME_L)
+    for name_r in b_names_r:
+        trans_vg(obj, name_r, BREAST_BL_NAME_R)
+
+    # 修复胸饰与胸之间的父子关系与Joint连接
+    profiler.stage("repair_accessory")
+    repair_accessory(root, accessory_breast_rel_map, kept_joints)
+    # 将胸部刚体绑定到源模型的身体骨骼
+    bind_rb_to_body(rb_parent)
+    # 设置胸部刚体碰撞组并对胸部刚体及胸部Joint重排序
+    profiler.stage("set_collision_and_resort")
+    if keep_collision_state:
+        save_collision_state(rb_parent)
+    set_collision_and_resort(root, accessory_breast_rel_map, accessory_bone_names, spec)
+    # 恢复“物理”显示枠位置
+    if physics_frame_index != -1:
+        frames.move(frames.find(PHYSICAL_FRAME_NAME), physics_frame_index)
+    else:
+        # 物理显示枠来源于RGBA素材
+        frames.move(frames.find(PHYSICAL_FRAME_NAME), len(root.mmd_root.display_item_frames) - 1)
 
-        # 校验源模型是否存在名为“上半身2”的骨骼
-        if not any(pb.name == UPPER_BODY2_NAME for pb in armature.pose.bones):
-            clean_tmp_collection()
-            return name, "ERROR", f"源模型中未找到名称为“{UPPER_BODY2_NAME}”的骨骼"
-
-        # 获取源模型“物理”显示枠索引
-        frames = root.mmd_root.display_item_frames
-        physics_frame_index = next((i for i, frame in enumerate(frames) if frame.name == PHYSICAL_FRAME_NAME), -1)
-
-        # 获取源模型胸部饰品信息
-        accessory_breast_rel_map, kept_joints = get_accessory_info(armature, breast_bones, breast_names, joint_parent,
-                                                                   rb_parent)
-
-        # 导入RGBA胸部
-        rgba_file_l = os.path.join(os.path.dirname(os.path.dirname(__file__)), "externals", "RGBA_L.pmx")
-        import_pmx(rgba_file_l)
-        root_l = bpy.context.active_object
-        armature_l, objs_l, joint_parent_l, rb_parent_l = get_mmd_info(root_l)
-        rgba_file_r = os.path.join(os.path.dirname(os.path.dirname(__file__)), "externals", "RGBA_R.pmx")
-        import_pmx(rgba_file_r)
-        root_r = bpy.context.active_object
-        armature_r, objs_r, joint_parent_r, rb_parent_r = get_mmd_info(root_r)
-
-        # 移除RGBA胸部网格对象
-        for breast_obj in objs_l + objs_r:
-            bpy.data.objects.remove(breast_obj)
-
-        # 获取RGBA胸部中左右胸骨
-        bone_l = armature_l.pose.bones.get(BREAST_BL_NAME_L)
-        if not bone_l:
-            clean_tmp_collection()
-            raise RuntimeError(f"未在胸部素材中找到{BREAST_BL_NAME_L}骨骼")
-        bone_r = armature_r.pose.bones.get(BREAST_BL_NAME_R)
-        if not bone_r:
-            clean_tmp_collection()
-            raise RuntimeError(f"未在胸部素材中找到{BREAST_BL_NAME_R}骨骼")
-
-        # 获取伪胸部骨骼的坐标
-        dummy_head_lo_l, dummy_head_lo_r, dummy_tail_lo_l, dummy_tail_lo_r, x_r, z_r = get_dummy_breast_coords(
-            armature, breast_bones, horizontal_bones, influenced_verts, obj)
-
-        # 调整并应用RGBA胸部骨骼的缩放、旋转、位置
-        apply_scale_diff(rb_parent_l, rb_parent_r, x_r, z_r, rb_scale_factor)
-        apply_rotation_diff(
-            root_l, armature_l, bone_l, dummy_head_lo_l, dummy_tail_lo_l,
-            root_r, armature_r, bone_r, dummy_head_lo_r, dummy_tail_lo_r)
-        apply_location_diff(root_l, armature_l, bone_l, dummy_tail_lo_l,
-                            root_r, armature_r, bone_r, dummy_tail_lo_r, rb_parent_l)
-        # 删除源模型胸部骨骼及对应的刚体Joint，防止刚体Joint重名
-        b_names_l, b_names_r = remove_breast_bones(root, armature, rb_parent, kept_joints)
-        # 通过MMD Tools手术，合并模型
-        join_model(armature, armature_l, armature_r)
-
-        # 重新获取源模型，即合并后的模型
-        armature, objs, _, rb_parent = get_mmd_info(root)
-        obj = objs[0]
-
-        # 将胸部权重从源模型转移到左胸和右胸上
-        for name_l in b_names_l:
-            trans_vg(obj, name_l, BREAST_BL_NAME_L)
-        for name_r in b_names_r:
-            trans_vg(obj, name_r, BREAST_BL_NAME_R)
-
-        # 修复胸饰与胸之间的父子关系与Joint连接
-        repair_accessory(root, accessory_breast_rel_map, kept_joints)
-        # 将胸部刚体绑定到源模型的身体骨骼
-        bind_rb_to_body(rb_parent)
-        # 设置胸部刚体碰撞组并对胸部刚体及胸部Joint重排序
-        set_collision_and_resort(root, accessory_breast_rel_map, props)
-        # 恢复“物理”显示枠位置
-        if physics_frame_index != -1:
-            frames.move(frames.find(PHYSICAL_FRAME_NAME), physics_frame_index)
-        else:
-            # 物理显示枠来源于RGBA素材
-            frames.move(frames.find(PHYSICAL_FRAME_NAME), len(root.mmd_root.display_item_frames) - 1)
+    return TransplantResult(name, None, root, source_hash or hash_file(filepath), source_counts, analysis, rgba_radius)
 
-        # 汝窑百分比
-        # RGBA刚体依然保留了普通胸部刚体的结构，包括胸部骨骼、胸部刚体和胸部Joint，其余刚体与Joint仅作为辅助使用。
-        # 也就是说，真正影响胸部骨骼运动的刚体是绑定到该骨骼的物理刚体，因此只需修改对应Joint的限定值即可实现抖动幅度的变化。
-        # 另外，改变胸部权重会影响原本模型，导致其被修改后不适合继续作为其它流程的基模，而修改Joint限定值可以解决该问题
-        set_joint_limits(factor, joint_parent, props)
+
+def export_outputs(root, spec, filepath, source_hash):
+    """按参数设置Joint限制并导出（多版本输出时逐个版本导出），返回生成的文件路径列表"""
+    armature, objs, joint_parent, rb_parent = get_mmd_info(root)
+    abs_path = bpy.path.abspath(filepath)
+    file_dir = os.path.dirname(abs_path)
+    file_name = os.path.basename(abs_path)
+    name = os.path.splitext(file_name)[0]
+
+    # 汝窑百分比
+    # RGBA刚体依然保留了普通胸部刚体的结构，包括胸部骨骼、胸部刚体和胸部Joint，其余刚体与Joint仅作为辅助使用。
+    # 也就是说，真正影响胸部骨骼运动的刚体是绑定到该骨骼的物理刚体，因此只需修改对应Joint的限定值即可实现抖动幅度的变化。
+    # 另外，改变胸部权重会影响原本模型，导致其被修改后不适合继续作为其它流程的基模，而修改Joint限定值可以解决该问题
+    # 多版本输出时，模型仅拟合一次，每个版本仅重新设置Joint限定值后导出
+    deselect_all_objects()
+    select_and_activate(root)
+    new_filepaths = []
+    # 生成标记，记录源模型与参数，供后续识别插件生成的文件
+    source_hash = source_hash or hash_file(filepath)
+    addon_version = get_own_addon_version()
+    digest = spec_digest(spec)
+    created_text = None
+    for variant_name, joint_limits in spec.variants or ((None, spec.joint_limits),):
+        set_joint_limits(joint_limits, joint_parent)
+        marker = make_marker(source_hash, file_name, spec.suffix, variant_name, digest, addon_version)
+        created_text = write_provenance(root, marker) or created_text
 
         # 导出模型
-        deselect_all_objects()
-        select_and_activate(root)
-        batch = props.batch
-        new_filepath = os.path.join(file_dir, f"{name} {batch.suffix}.pmx")
-        if os.path.exists(new_filepath):
+        output_name = f"{name} {spec.suffix}" if variant_name is None else f"{name} {spec.suffix}_{variant_name}"
+        new_filepath = os.path.join(file_dir, f"{output_name}.pmx")
+        # 仅更新模式下覆盖原有文件，否则保留原有文件
+        if os.path.exists(new_filepath) and spec.conflict_strategy != 'UPDATE':
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            new_filepath = os.path.join(file_dir, f"{name} {batch.suffix} {timestamp}.pmx")
+            new_filepath = os.path.join(file_dir, f"{output_name} {timestamp}.pmx")
 
         export_pmx(new_filepath)
+        new_filepaths.append(new_filepath)
+
+    # 为写入生成标记而新建的英文注释文本不会被临时集合的清理删除，导出后删除
+    if created_text is not None:
+        root.mmd_root.comment_e_text = ""
+        bpy.data.texts.remove(created_text)
+    return new_filepaths
 
-        # 删除临时集合内所有物体
-        clean_tmp_collection()
 
-        return name, "INFO", f"执行完成，模型文件地址：{new_filepath}"
+def analyze_source(obj, joint_parent, rb_parent, bone_index):
+    """
+    分析源模型，结果仅取决于源模型本身，返回SourceAnalysis
+    刚体与Joint以MMD名称标识（与PMX文件一致），Blender物体名称会因场景中已有同名物体而带上.001等后缀，不能缓存
+    """
+    rb_bones = {rb.mmd_rigid.name_j: rb.mmd_rigid.bone for rb in rb_parent.children}
+    graph = JointGraph.from_objects(joint_parent, rb_parent, by_name_j=True)
+    return analyze_model(bone_index, rb_bones, graph, lambda breast_names: get_breast_vertex_positions(obj, breast_names))
+
+
+def resolve_kept_joints(joint_parent, kept_joints):
+    """将 Joint的MMD名称 → 左右 解析为 Joint物体名称 → 左右（同名的Joint均保留）"""
+    return {joint.name: kept_joints[joint.mmd_joint.name_j] for joint in joint_parent.children
+            if joint.mmd_joint.name_j in kept_joints}
+
+
+class PreflightOperator(bpy.types.Operator):
+    bl_idname = "mmd_jiggle_tools.preflight"
+    bl_label = "Preflight"
+    bl_description = ("预检模型目录中待处理的模型\n"
+                      "无需导入模型，仅解析模型文件，按与执行时相同的规则找出无法处理的模型及原因")
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        batch = context.scene.mmd_jiggle_tools_set_rgba.batch
+        if not check_batch_props(self, batch):
+            return {'CANCELLED'}
+
+        # 在独立的Python进程（Blender自带）中运行core.preflight，以便使用进程池并行解析
+        start_time = time.time()
+        cmd = [sys.executable, "-m", "core.preflight", bpy.path.abspath(batch.directory),
+               "--suffix", batch.suffix,
+               "--search-strategy", batch.search_strategy,
+               "--conflict-strategy", batch.conflict_strategy,
+               "--threshold", str(batch.threshold),
+               "--json"]
+        completed = subprocess.run(cmd, cwd=os.path.dirname(os.path.dirname(__file__)), capture_output=True,
+                                   encoding="utf-8", env=dict(os.environ, PYTHONIOENCODING="utf-8"))
+        try:
+            results = json.loads(completed.stdout)
+        except ValueError:
+            print(completed.stderr)
+            lines = completed.stderr.strip().splitlines()
+            self.report({'ERROR'}, f"预检失败：{lines[-1] if lines else completed.returncode}")
+            return {'CANCELLED'}
+
+        problems = [r for r in results if r["status"] != "OK"]
+        total_time = time.time() - start_time
+        msg = f"预检完成，{len(results) - len(problems)}/{len(results)} 个文件可以处理（总耗时 {total_time:.2f}s）"
+        if problems:
+            combined_msg = "\n".join(f"{r['path']} - {r['message']}" for r in problems)
+            print(combined_msg)
+            print(msg)
+            self.report({'WARNING'}, combined_msg)
+            self.report({'WARNING'}, msg + "。点击查看详细报告 ↑↑↑")
+        else:
+            self.report({'INFO'}, msg)
+        return {'FINISHED'}
+
+
+def remove_leaked_data(file_name, baseline):
+    """删除与基线相比残留的数据块（如MMD Tools导入时生成的图像、材质、文本）"""
+    leaked = get_leaked_data(baseline)
+    if not leaked:
+        return
+    summary = "，".join(f"{attr} {len(data)}" for attr, data in leaked.items())
+    print(f"文件“{file_name}”处理完成后仍有残留的数据块（{summary}），已删除")
+    bpy.data.batch_remove([id_data for data in leaked.values() for id_data in data])
+
+
+def get_joint_limits(props):
+    """按抖动模式计算胸部Joint限制，顺序同LIMIT_NAMES"""
+    if props.jiggle_adjustment_mode == "DEFAULT":
+        return scale_default_limits(round_to_two_decimals(props.factor))
+    return tuple(getattr(props, name) for name in LIMIT_NAMES)
+
 
+def compile_spec(props):
+    """将场景属性编译为TransplantSpec"""
+    batch = props.batch
+    joint_limits = get_joint_limits(props)
+    if props.jiggle_adjustment_mode == "DEFAULT":
+        variants = tuple((name, scale_default_limits(factor)) for name, factor in parse_variants(batch.variants))
+    else:
+        variants = tuple((name, scale_limits(joint_limits, factor)) for name, factor in parse_variants(batch.variants))
+    return TransplantSpec(
+        joint_limits=joint_limits,
+        variants=variants,
+        collision=props.collision,
+        collision_group_number=props.collision_group_number,
+        rb_scale_factor=round_to_two_decimals(props.rb_scale_factor),
+        suffix=batch.suffix,
+        directory=bpy.path.abspath(batch.directory),
+        search_strategy=batch.search_strategy,
+        threshold=batch.threshold,
+        conflict_strategy=batch.conflict_strategy,
+        prefetch_count=batch.prefetch_count,
+        snapshot_cache_size=batch.snapshot_cache_size if batch.use_snapshot_cache else 0,
+        profile=batch.profile,
+        resume=batch.resume,
+        low_memory=batch.low_memory,
+    )
 
-def set_joint_limits(factor, joint_parent, props):
+
+def write_provenance(root, marker):
+    """
+    将生成标记写入模型英文注释的末尾，导出后位于PMX文件头中
+    模型没有英文注释时新建文本并返回，由调用方在导出后删除；否则返回None
+    """
+    text = bpy.data.texts.get(root.mmd_root.comment_e_text)
+    created_text = None
+    if text is None:
+        text = created_text = bpy.data.texts.new(f"{root.name}_e")
+        root.mmd_root.comment_e_text = text.name
+    text.from_string(set_marker(text.as_string(), marker))
+    return created_text
+
+
+def set_joint_limits(joint_limits, joint_parent):
+    """设置左右胸Joint的限制，joint_limits顺序同LIMIT_NAMES"""
     for joint in joint_parent.children:
         joint_name = joint.mmd_joint.name_j
         if joint_name not in [BREAST_JP_NAME_L, BREAST_JP_NAME_R]:
             continue
         rbc = joint.rigid_body_constraint
-        if props.jiggle_adjustment_mode == "DEFAULT":
-            rbc.limit_lin_x_lower = get_prop_default_value(props, "limit_lin_x_lower") * factor
-            rbc.limit_lin_x_upper = get_prop_default_value(props, "limit_lin_x_upper") * factor
-            rbc.limit_lin_y_lower = get_prop_default_value(props, "limit_lin_y_lower") * factor
-            rbc.limit_lin_y_upper = get_prop_default_value(props, "limit_lin_y_upper") * factor
-            rbc.limit_lin_z_lower = get_prop_default_value(props, "limit_lin_z_lower") * factor
-            rbc.limit_lin_z_upper = get_prop_default_value(props, "limit_lin_z_upper") * factor
-
-            rbc.limit_ang_x_lower = math.radians(
-                math.degrees(get_prop_default_value(props, "limit_ang_x_lower")) * factor)
-            rbc.limit_ang_x_upper = math.radians(
-                math.degrees(get_prop_default_value(props, "limit_ang_x_upper")) * factor)
-            rbc.limit_ang_y_lower = math.radians(
-                math.degrees(get_prop_default_value(props, "limit_ang_y_lower")) * factor)
-            rbc.limit_ang_y_upper = math.radians(
-                math.degrees(get_prop_default_value(props, "limit_ang_y_upper")) * factor)
-            rbc.limit_ang_z_lower = math.radians(
-                math.degrees(get_prop_default_value(props, "limit_ang_z_lower")) * factor)
-            rbc.limit_ang_z_upper = math.radians(
-                math.degrees(get_prop_default_value(props, "limit_ang_z_upper")) * factor)
-        else:
-            rbc.limit_lin_x_lower = props.limit_lin_x_lower
-            rbc.limit_lin_x_upper = props.limit_lin_x_upper
-            rbc.limit_lin_y_lower = props.limit_lin_y_lower
-            rbc.limit_lin_y_upper = props.limit_lin_y_upper
-            rbc.limit_lin_z_lower = props.limit_lin_z_lower
-            rbc.limit_lin_z_upper = props.limit_lin_z_upper
-
-            rbc.limit_ang_x_lower = props.limit_ang_x_lower
-            rbc.limit_ang_x_upper = props.limit_ang_x_upper
-            rbc.limit_ang_y_lower = props.limit_ang_y_lower
-            rbc.limit_ang_y_upper = props.limit_ang_y_upper
-            rbc.limit_ang_z_lower = props.limit_ang_z_lower
-            rbc.limit_ang_z_upper = props.limit_ang_z_upper
-
-
-def get_prop_default_value(struct, identifier):
-    for prop in struct.bl_rna.properties:
-        if prop.identifier == identifier:
-            return prop.default
+        for limit_name, value in zip(LIMIT_NAMES, joint_limits):
+            setattr(rbc, limit_name, value)
 
 
 def get_rb_bone_rel_map(rb_parent):
@@ -360,7 +648,7 @@ def get_rb_bone_rel_map(rb_parent):
     return rbn_bone_map, rbn_rb_map, bone_rbs_map
 
 
-def set_collision_and_resort(root, accessory_breast_rel_map, props):
+def set_collision_and_resort(root, accessory_breast_rel_map, accessory_bone_names, spec):
     """
     设置刚体碰撞组并对RGBA胸部刚体及Joint重排序
     创建“双臂衝突刚体”，仅对“胸部刚体”碰撞，“胸部刚体”仅对“双臂衝突刚体”碰撞
@@ -371,32 +659,36 @@ def set_collision_and_resort(root, accessory_breast_rel_map, props):
     """
     armature, objs, joint_parent, rb_parent = get_mmd_info(root)
     rigid_bodies = rb_parent.children
-    collision = props.collision
-    breast_rb_group = props.collision_group_number
+    collision = spec.collision
+    breast_rb_group = spec.collision_group_number
+
+    # 读取刚体信息快照，碰撞组与碰撞掩码以位掩码形式整体计算，最后统一写回
+    names_j = [rb.mmd_rigid.name_j for rb in rigid_bodies]
+    types = [rb.mmd_rigid.type for rb in rigid_bodies]
+    matrix = CollisionMatrix.from_rigid_bodies(rigid_bodies)
+    original_matrix = matrix.copy()
+    # 新建的衝突刚体，与matrix中追加的索引一一对应
+    new_rbs = []
+    rgba_indices = np.flatnonzero([name_j in RGBA_RB_NAMES for name_j in names_j])
 
     # 不论碰撞策略如何设置，第一步均先将胸部物理碰撞关闭
-    for rb in rigid_bodies:
-        if rb.mmd_rigid.name_j not in RGBA_RB_NAMES:
-            continue
-        rb.mmd_rigid.collision_group_number = breast_rb_group
-        for i in range(16):
-            rb.mmd_rigid.collision_group_mask[i] = True
+    matrix.set_group(rgba_indices, breast_rb_group)
+    matrix.set_masks(rgba_indices, ALL_GROUPS_BITS)
 
     # 创建“双臂衝突刚体”，仅对“胸部刚体”碰撞
     limb_rb_map = {}
     if collision in ["DEFAULT"]:
         # 少前2 设置名称含“上半身”的刚体不与胸部碰撞，可能会影响其它“物理刚体”的碰撞，如头发，但几率较低
-        for rb in rigid_bodies:
-            if UPPER_BODY_NAME in rb.mmd_rigid.name_j:
-                rb.mmd_rigid.collision_group_mask[breast_rb_group] = True
+        upper_indices = np.flatnonzero([UPPER_BODY_NAME in name_j for name_j in names_j])
+        matrix.mask_groups(upper_indices, [breast_rb_group])
 
         # 创建两臂衝突刚体，并设置两臂衝突刚体与胸部碰撞，且仅与胸部碰撞
-        for rb in rigid_bodies:
+        for i, rb in enumerate(rigid_bodies):
             # 仅追踪骨骼类型
-            if rb.mmd_rigid.type in ('1', '2'):
+            if types[i] in ('1', '2'):
                 continue
             # 避免重复创建
-            name_j = rb.mmd_rigid.name_j
+            name_j = names_j[i]
             if name_j in limb_rb_map:
                 continue
             # 仅创建两臂衝突刚体
@@ -407,40 +699,29 @@ def set_collision_and_resort(root, accessory_breast_rel_map, props):
             crb_name = f"{name_j}衝突"
             crb.mmd_rigid.name_j = crb_name
             crb.name = f"AAA_{crb_name}"
-            crb.mmd_rigid.collision_group_number = LIMB_RB_GROUP
             # 仅与胸部碰撞
-            for i in range(16):
-                if i == breast_rb_group:
-                    crb.mmd_rigid.collision_group_mask[i] = False
-                else:
-                    crb.mmd_rigid.collision_group_mask[i] = True
+            matrix.append(LIMB_RB_GROUP, ALL_GROUPS_BITS & ~groups_to_bits([breast_rb_group]))
+            new_rbs.append(crb)
 
         # “胸部刚体”仅对“双臂衝突刚体”碰撞
-        for rb in rigid_bodies:
-            if rb.mmd_rigid.name_j in [BREAST_JP_NAME_L, BREAST_JP_NAME_R]:
-                rb.mmd_rigid.collision_group_mask[LIMB_RB_GROUP] = False
+        breast_indices = np.flatnonzero([name_j in [BREAST_JP_NAME_L, BREAST_JP_NAME_R] for name_j in names_j])
+        matrix.unmask_groups(breast_indices, [LIMB_RB_GROUP])
 
         # 获取物理刚体所在碰撞组并去重
         # 物理刚体是否对“胸部衝突刚体”碰撞，取决于原本设置，而非全部设置为碰撞以防止冲突。案例如翡翠
         # 为了尽可能减少对碰撞组的占用，“胸部衝突刚体”的碰撞组与“胸部刚体”相同
-        cgn_set = set()
-        for rb in rigid_bodies:
-            # 0:骨骼 1:物理 2:物理+骨骼
-            if rb.mmd_rigid.type not in ('1', '2'):
-                continue
-            cgn = rb.mmd_rigid.collision_group_number
-            if cgn == breast_rb_group:
-                continue
-            cgn_set.add(cgn)
+        # 0:骨骼 1:物理 2:物理+骨骼
+        physical = np.array([t in ('1', '2') for t in types], dtype=bool)
+        cgn_set = set(matrix.groups[:len(rigid_bodies)][physical].tolist()) - {breast_rb_group}
 
         # 创建胸部碰撞刚体
         breast_collision_rb_map = {}
-        for rb in rigid_bodies:
+        for i, rb in enumerate(rigid_bodies):
             # 仅追踪骨骼类型
-            if rb.mmd_rigid.type not in ('1', '2'):
+            if types[i] not in ('1', '2'):
                 continue
             # 避免重复创建
-            name_j = rb.mmd_rigid.name_j
+            name_j = names_j[i]
             if name_j in breast_collision_rb_map:
                 continue
             # 仅创建两臂衝突刚体
@@ -452,38 +733,45 @@ def set_collision_and_resort(root, accessory_breast_rel_map, props):
             crb.mmd_rigid.name_j = crb_name
             crb.name = f"AAA_{crb_name}"
             crb.mmd_rigid.type = "0"
-            crb.mmd_rigid.collision_group_number = breast_rb_group
             # 与物理部位碰撞
-            for i in cgn_set:
-                crb.mmd_rigid.collision_group_mask[i] = False
+            matrix.append(breast_rb_group, int(matrix.masks[i]) & ~groups_to_bits(cgn_set))
+            new_rbs.append(crb)
 
         # 胸部首个子骨对应的刚体如果为“物理+骨骼”类型，则改为追踪骨骼，如乱破
-        for rb in rigid_bodies:
-            if rb.mmd_rigid.type != '2':  # 限定 物理+骨骼 类型
+        for i, rb in enumerate(rigid_bodies):
+            if types[i] != '2':  # 限定 物理+骨骼 类型
                 continue
             if rb.mmd_rigid.bone not in accessory_breast_rel_map:
                 continue
-            rb.mmd_rigid.type = '0'
-            rb.mmd_rigid.collision_group_mask[breast_rb_group] = True
+            rb.mmd_rigid.type = types[i] = '0'
+            matrix.mask_groups([i], [breast_rb_group])
 
         # 胸部子级和胸部如果有碰撞且穿模，设置为非碰撞，如朱鸢
-        rgba_rbs = [rb for rb in rigid_bodies if rb.mmd_rigid.name_j in RGBA_RB_NAMES]
-        accessory_bone_names = expand_accessory_bone_names(armature, accessory_breast_rel_map)
-        for rb in rigid_bodies:
-            if rb.mmd_rigid.type not in ('1', '2'):
+        rgba_rbs = [rigid_bodies[i] for i in rgba_indices]
+        for i, rb in enumerate(rigid_bodies):
+            if types[i] not in ('1', '2'):
                 continue
-            if rb.mmd_rigid.name_j in RGBA_RB_NAMES:
+            if names_j[i] in RGBA_RB_NAMES:
                 continue
             if rb.mmd_rigid.bone not in accessory_bone_names:
                 continue
-            if rb.mmd_rigid.collision_group_mask[breast_rb_group] is True:
+            if matrix.is_masked(i, breast_rb_group):
                 continue
             for rgba_rb in rgba_rbs:
                 intersection = check_bvh_intersection(rb, rgba_rb)
                 if intersection:
-                    rb.mmd_rigid.collision_group_mask[breast_rb_group] = True
+                    matrix.mask_groups([i], [breast_rb_group])
                     break
 
+    # 统一写回碰撞组与碰撞掩码，每个刚体最多写入一次
+    all_rbs = list(rigid_bodies) + new_rbs
+    for i in matrix.changed(original_matrix):
+        mmd_rigid = all_rbs[i].mmd_rigid
+        mmd_rigid.collision_group_number = int(matrix.groups[i])
+        mmd_rigid.collision_group_mask = bits_to_mask(int(matrix.masks[i]))
+    if os.environ.get(DUMP_COLLISION_ENV):
+        print(matrix.format())
+
     # 刚体顺序重排序
     breast_rbs = []
     for rb in rigid_bodies:
@@ -510,6 +798,37 @@ def set_collision_and_resort(root, accessory_breast_rel_map, props):
         set_index(rb, 10000 + index)
 
 
+def save_collision_state(rb_parent):
+    """在刚体上记录当前的名称、碰撞组、碰撞掩码与类型，供restore_collision_state恢复"""
+    for rb in rb_parent.children:
+        mmd_rigid = rb.mmd_rigid
+        rb[COLLISION_STATE_KEY] = json.dumps([mmd_rigid.name_j, mmd_rigid.collision_group_number,
+                                              list(mmd_rigid.collision_group_mask), mmd_rigid.type])
+
+
+def restore_collision_state(rb_parent):
+    """
+    恢复save_collision_state记录的碰撞状态，并删除其后set_collision_and_resort创建的衝突刚体
+    （衝突刚体由原刚体复制而来，带有原刚体的记录，名称与记录不一致）
+    """
+    for rb in list(rb_parent.children):
+        state = rb.get(COLLISION_STATE_KEY)
+        if state is None:
+            continue
+        name_j, group, mask, rb_type = json.loads(state)
+        mmd_rigid = rb.mmd_rigid
+        if mmd_rigid.name_j != name_j:
+            mesh = rb.data
+            bpy.data.objects.remove(rb, do_unlink=True)
+            if mesh is not None and mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+            continue
+        if mmd_rigid.type != rb_type:
+            mmd_rigid.type = rb_type
+        mmd_rigid.collision_group_number = group
+        mmd_rigid.collision_group_mask = mask
+
+
 def apply_location_diff(root_l, armature_l, bone_l, dummy_tail_lo_l, root_r, armature_r, bone_r, dummy_tail_lo_r,
                         rb_parent_l):
     """计算RGBA胸部骨骼tail与伪胸部骨骼tail的位置差，调整RGBA胸部骨骼tail使其位置与伪胸部骨骼tail一致"""
@@ -523,10 +842,7 @@ def apply_location_diff(root_l, armature_l, bone_l, dummy_tail_lo_l, root_r, arm
 
     # 获取 胸部刚体前端 与 源模型胸部区域y最小值 的差值
     b_rb_l = next(r for r in rb_parent_l.children if r.mmd_rigid.name_j == BREAST_JP_NAME_L)
-    world_cos = [b_rb_l.matrix_world @ v.co for v in b_rb_l.data.vertices]
-    y_values = [co.y for co in world_cos]
-    y_min = min(y_values)
-    offset_y = (armature_r.matrix_world @ bone_r.tail).y - y_min
+    offset_y = (armature_r.matrix_world @ bone_r.tail).y - get_breast_front_y(b_rb_l)
 
     # 移动胸部root以适配源模型
     root_l.location.y += offset_y
@@ -536,6 +852,36 @@ def apply_location_diff(root_l, armature_l, bone_l, dummy_tail_lo_l, root_r, arm
     apply_transform_to_objects([root_l, root_r], (True, False, False))
 
 
+def get_breast_front_y(b_rb_l):
+    """胸部刚体前端的位置，即左胸刚体顶点在世界坐标中y的最小值"""
+    return min((b_rb_l.matrix_world @ v.co).y for v in b_rb_l.data.vertices)
+
+
+def move_rgba_breast(root, offset_y):
+    """
+    将合并后的RGBA胸部（胸部骨骼、RGBA刚体与Joint）沿y轴整体移动offset_y（世界坐标）
+    与移植时在合并前移动RGBA胸部root的效果一致，调整会话中修改刚体缩放后重新对齐胸部刚体前端时使用
+    """
+    armature, _, joint_parent, rb_parent = get_mmd_info(root)
+    offset = mathutils.Vector((0, offset_y, 0))
+    objects = [rb for rb in rb_parent.children if rb.mmd_rigid.name_j in RGBA_RB2_NAMES]
+    objects += [joint for joint in joint_parent.children if joint.mmd_joint.name_j in RGBA_JOINT_NAMES]
+    for obj in objects:
+        matrix = obj.matrix_world.copy()
+        matrix.translation += offset
+        obj.matrix_world = matrix
+
+    local_offset = armature.matrix_world.inverted().to_3x3() @ offset
+    deselect_all_objects()
+    select_and_activate(armature)
+    bpy.ops.object.mode_set(mode='EDIT')
+    for name in (BREAST_BL_NAME_L, BREAST_BL_NAME_R):
+        edit_bone = armature.data.edit_bones[name]
+        edit_bone.head += local_offset
+        edit_bone.tail += local_offset
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+
 def apply_rotation_diff(root_l, armature_l, bone_l, dummy_head_lo_l, dummy_tail_lo_l,
                         root_r, armature_r, bone_r, dummy_head_lo_r, dummy_tail_lo_r):
     """计算RGBA胸部骨骼与伪胸部骨骼的旋转差，调整RGBA胸部骨骼使其旋转与伪胸部骨骼一致（仅在水平面上进行旋转）"""
@@ -564,71 +910,35 @@ def apply_rotation_diff(root_l, armature_l, bone_l, dummy_head_lo_l, dummy_tail_
 
 
 def apply_scale_diff(rb_parent_l, rb_parent_r, x_r, z_r, rb_scale_factor):
-    """计算RGBA胸部刚体半径与胸部区域半径的缩放差，并调整RGBA胸部刚体半径"""
+    """计算RGBA胸部刚体半径与胸部区域半径的缩放差，并调整RGBA胸部刚体半径，返回缩放前的半径"""
     b_rb_l = next(r for r in rb_parent_l.children if r.mmd_rigid.name_j == BREAST_JP_NAME_L)
     b_rb_r = next(r for r in rb_parent_r.children if r.mmd_rigid.name_j == BREAST_JP_NAME_R)
-    breast_r = (x_r + z_r) / 2
     r = b_rb_l.mmd_rigid.size[0]
+    scale_breast_rbs(b_rb_l, b_rb_r, r, x_r, z_r, rb_scale_factor)
+    return r
+
+
+def scale_breast_rbs(b_rb_l, b_rb_r, r, x_r, z_r, rb_scale_factor):
+    """按缩放前的半径r设置左右胸部刚体的半径（左右胸部素材中的胸部刚体半径相同），调整会话中修改刚体缩放时同样使用"""
+    breast_r = (x_r + z_r) / 2
     # 由于胸部并非完美球形，弥补缩放差后胸部刚体会超出实际胸部区域，所以需乘上rb_scale_factor
     scale_factor = breast_r / r * rb_scale_factor
 
     # 缩放RGBA胸部刚体以适配源模型胸部区域
-    b_rb_l.mmd_rigid.size[0] *= scale_factor
-    b_rb_r.mmd_rigid.size[0] *= scale_factor
-
-
-def get_dummy_breast_coords(armature, breast_bones, horizontal_bones, influenced_verts, obj):
-    """获取伪胸部骨骼的坐标"""
-    world_cos = [obj.matrix_world @ v.co for v in influenced_verts]
-    x_values = [co.x for co in world_cos]
-    y_values = [co.y for co in world_cos]
-    z_values = [co.z for co in world_cos]
-
-    # 伪胸部骨骼的 tail.y 取自 influenced_verts 中 y 值最小的顶点
-    y_min = min(y_values)
-    # 伪胸部骨骼的 tail.x 取自 influenced_verts 中 一侧x 值最大的顶点 与 0 的均值
-    x_r = x_max = max(x_values)
-    avg_x = x_max / 2
-    # 伪胸部骨骼的 tail.z 取自 influenced_verts 中 z 值最大最小两点的均值
-    z_min, z_max = min(z_values), max(z_values)
-    avg_z = (z_min + z_max) / 2
-    z_r = (z_max - z_min) / 2
-
-    dummy_tail_lo_l = mathutils.Vector((abs(avg_x), y_min, avg_z))
-    dummy_tail_lo_r = mathutils.Vector((-abs(avg_x), y_min, avg_z))
-
-    # 从水平胸部骨骼中，获取head坐标中y值最大的骨骼，并计算伪胸部骨骼head位置
-    if horizontal_bones:
-        max_head_bone = max(horizontal_bones, key=lambda b: (armature.matrix_world @ b.head_local).y)
-    else:
-        max_head_bone = max(breast_bones, key=lambda b: (armature.matrix_world @ b.head_local).y)
-    max_head_co = armature.matrix_world @ max_head_bone.head_local
-    dummy_head_lo_l = mathutils.Vector((abs(max_head_co.x), max_head_co.y, dummy_tail_lo_l.z))
-    dummy_head_lo_r = mathutils.Vector((-abs(max_head_co.x), max_head_co.y, dummy_tail_lo_r.z))
-    return dummy_head_lo_l, dummy_head_lo_r, dummy_tail_lo_l, dummy_tail_lo_r, x_r, z_r
+    b_rb_l.mmd_rigid.size[0] = r * scale_factor
+    b_rb_r.mmd_rigid.size[0] = r * scale_factor
 
 
-def remove_breast_bones(root, armature, rb_parent, kept_joints):
-    # 记录被删除的骨骼属于左侧还是右侧
-    breast_bones = get_breast_bones(root)
-    breast_names = [b.name for b in breast_bones]
+def remove_breast_bones(root, armature, rb_parent, kept_joints, bone_index, breast_names):
+    # 记录被删除的骨骼属于左侧还是右侧（根据骨架空间中tail的x坐标确定左右）
     b_names_l = []
     b_names_r = []
-
-    deselect_all_objects()
-    select_and_activate(armature)
-    bpy.ops.object.mode_set(mode='EDIT')
-    edit_bones = armature.data.edit_bones
-    for bone in breast_bones:
-        eb = edit_bones.get(bone.name)
-        if not eb:
-            continue
-        # 检查 bone.head 和 bone.tail 的 x 坐标来确定左右
-        if eb.tail.x > 0:
-            b_names_l.append(bone.name)
-        elif eb.tail.x < 0:
-            b_names_r.append(bone.name)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    for name in breast_names:
+        tail_x = bone_index.tails[bone_index.index[name], 0]
+        if tail_x > 0:
+            b_names_l.append(name)
+        elif tail_x < 0:
+            b_names_r.append(name)
 
     # 记录刚体与其关联骨骼的map
     _, _, bone_rbs_map = get_rb_bone_rel_map(rb_parent)
@@ -641,7 +951,8 @@ def remove_breast_bones(root, armature, rb_parent, kept_joints):
     select_and_activate(armature)
     bpy.ops.object.mode_set(mode='EDIT')
     edit_bones = armature.data.edit_bones
-    to_delete = [eb.name for eb in edit_bones if eb.name in breast_names]
+    breast_name_set = set(breast_names)
+    to_delete = [eb.name for eb in edit_bones if eb.name in breast_name_set]
     for name in to_delete:
         rbs_to_remove.extend(bone_rbs_map.get(name, []))
         edit_bones.remove(edit_bones[name])
@@ -682,8 +993,7 @@ def bind_rb_to_body(rb_parent):
     for rb in rb_parent.children:
         if rb.mmd_rigid.name_j in ["上半身2_L", "上半身2_R"]:
             rb.mmd_rigid.bone = UPPER_BODY2_NAME
-            for i in range(16):
-                rb.mmd_rigid.collision_group_mask[i] = True
+            rb.mmd_rigid.collision_group_mask = bits_to_mask(ALL_GROUPS_BITS)
             rb.mmd_rigid.size[0] = 0.01
             rb.mmd_rigid.size[1] = 0.01
 
@@ -704,12 +1014,13 @@ def repair_accessory(root, accessory_breast_rel_map, kept_joints):
     bpy.ops.object.mode_set(mode='OBJECT')
 
     # 重新连接无效关节
+    graph = JointGraph.from_objects(joint_parent, rb_parent)
     b_rb_l = next(r for r in rb_parent.children if r.mmd_rigid.name_j == BREAST_JP_NAME_L)
     b_rb_r = next(r for r in rb_parent.children if r.mmd_rigid.name_j == BREAST_JP_NAME_R)
 
-    for joint in reversed(joint_parent.children):
-        side = kept_joints.get(joint.name)
-        if not side:
+    for joint_name, side in kept_joints.items():
+        joint = graph.joints.get(joint_name)
+        if not joint:
             continue
         target_rb = b_rb_l if side == "L" else b_rb_r
         rbc = joint.rigid_body_constraint
@@ -720,64 +1031,6 @@ def repair_accessory(root, accessory_breast_rel_map, kept_joints):
             rbc.object2 = target_rb
 
 
-def get_accessory_info(armature, breast_bones, breast_names, joint_parent, rb_parent):
-    """
-    获取胸部饰品信息，用于后续处理：
-        1. 修复骨骼的父子关系
-        2. 修复Joint的连接关系
-    """
-    # 胸饰品指胸骨的子骨骼，例如胸飾、胸坠、胸結等（bbc 即 breast_bone_child）
-    # 记录胸饰品根骨骼和胸部骨骼的关系，供后续修复骨骼父子级用
-    accessory_breast_rel_map = {}
-    for bb in breast_bones:
-        for bbc in bb.children:
-            if bbc.name not in breast_names and not is_dummy_bone(bbc.name):
-                accessory_breast_rel_map[bbc.name] = bb.name
-
-    # 获取胸部刚体名称列表与胸饰品刚体名称列表
-    breast_rb_names = [rb.name for rb in rb_parent.children if rb.mmd_rigid.bone in breast_names]
-    accessory_bone_names = expand_accessory_bone_names(armature, accessory_breast_rel_map)
-    accessory_rb_names = [rb.name for rb in rb_parent.children if rb.mmd_rigid.bone in accessory_bone_names]
-
-    # 记录链接胸和胸饰品的Joint，避免后续被删除，供后续修复Joint连接用
-    kept_joints = {}
-    for joint in joint_parent.children:
-        object1 = joint.rigid_body_constraint.object1
-        object2 = joint.rigid_body_constraint.object2
-
-        # todo 根据实际位置确定左右
-        if object1.name in accessory_rb_names and object2.name in breast_rb_names:
-            kept_joints[joint.name] = "L" if "左" in object2.name else "R"
-        elif object1.name in breast_rb_names and object2.name in accessory_rb_names:
-            kept_joints[joint.name] = "L" if "左" in object1.name else "R"
-    return accessory_breast_rel_map, kept_joints
-
-
-def get_breast_bones(root):
-    """
-    获取胸部骨骼列表
-
-    - 通过正则来识别模型中的胸部骨骼。
-    - 少女前线2的胸部骨骼单独处理。
-    """
-
-    armature = find_pmx_armature(root)
-    breast_bones = []
-    for b in armature.data.bones:
-        b_name = b.name
-        if is_dummy_bone(b_name):
-            continue
-        match = BREAST_BONE_PATTERN.match(b_name)
-        if match:
-            breast_bones.append(b)
-            continue
-        match = check_girlsfrontline_breast_bones_and_rbs(b_name)
-        if match:
-            breast_bones.append(b)
-
-    return breast_bones
-
-
 def get_physical_bone(root):
     """获取受物理影响的骨骼"""
     rigidbody_parent = find_rigid_body_parent(root)
@@ -797,9 +1050,15 @@ def get_physical_bone(root):
     return bl_names
 
 
-def clean_tmp_collection():
-    if TMP_COLLECTION_NAME in bpy.data.collections:
-        collection = bpy.data.collections[TMP_COLLECTION_NAME]
+def clean_tmp_collection(collection_name=TMP_COLLECTION_NAME):
+    """删除指定集合（默认为临时集合）及其中所有物体，并清理导入生成的文本与未使用数据块"""
+    # 导入pmx生成的注释文本（防止找不到脚本），仅删除该集合中模型引用的文本，不影响其它集合（如调整会话）中的模型
+    text_to_delete_list = []
+    if collection_name in bpy.data.collections:
+        collection = bpy.data.collections[collection_name]
+        for obj in collection.objects:
+            if obj.mmd_type == 'ROOT':
+                text_to_delete_list.extend(t for t in get_comment_texts(obj) if t not in text_to_delete_list)
         # 遍历集合中的所有对象
         for obj in list(collection.objects):
             # 从集合中移除对象
@@ -809,19 +1068,6 @@ def clean_tmp_collection():
         # 删除临时集合
         bpy.data.collections.remove(collection)
 
-    # 删除由导入pmx生成的文本（防止找不到脚本）
-    text_to_delete_list = []
-    for text in bpy.data.texts:
-        text_name = text.name
-        match = TXT_INFO_PATTERN.match(text_name)
-        if match is not None:
-            base_text_name = match.group(1)
-            if match.group(3) is not None:
-                base_text_name = base_text_name + match.group(3)
-            base_text = bpy.data.texts.get(base_text_name, None)
-            if base_text is not None:
-                text_to_delete_list.append(base_text)
-                text_to_delete_list.append(text)
     for text_to_delete in text_to_delete_list:
         bpy.data.texts.remove(text_to_delete, do_unlink=True)
 
@@ -829,6 +1075,16 @@ def clean_tmp_collection():
     bpy.ops.outliner.orphans_purge(do_recursive=True)
 
 
+def get_comment_texts(root):
+    """模型根物体引用的注释文本（中文注释、英文注释）"""
+    texts = []
+    for text_name in (root.mmd_root.comment_text, root.mmd_root.comment_e_text):
+        text = bpy.data.texts.get(text_name) if text_name else None
+        if text is not None:
+            texts.append(text)
+    return texts
+
+
 def apply_transform_to_objects(objects, trans):
     """对一组对象应用变换（仅缩放）"""
     for obj in objects:
@@ -891,52 +1147,25 @@ def trans_vg(obj, source_vg_name, target_vg_name, factor=1.0, remove_source=True
                 source_vg.add([v_index], src_weight * (1 - factor), 'REPLACE')
 
 
-def filter_horizontal_bones(armature, breast_bones):
-    # 假设 breast_bones 已经存在
-    # 夹角阈值 30 度
-    angle_threshold = math.radians(30)
-
-    filtered_bones = []
-
-    for b in breast_bones:
-        # 骨骼在世界空间的 head 和 tail
-        head_world = armature.matrix_world @ b.head_local
-        tail_world = armature.matrix_world @ b.tail_local
-
-        # 计算骨骼向量
-        bone_vec = tail_world - head_world
-
-        # 投影到 XY 平面
-        bone_vec_xy = mathutils.Vector((bone_vec.x, bone_vec.y, 0))
-
-        # 如果骨骼长度很小，跳过避免除零
-        if bone_vec.length == 0 or bone_vec_xy.length == 0:
-            continue
-
-        # 夹角 = 骨骼向量与水平投影向量的夹角
-        angle = bone_vec.angle(bone_vec_xy)
-
-        if angle < angle_threshold:
-            filtered_bones.append(b)
-
-    return filtered_bones
-
-
-def get_vertices_influenced_by_bones(obj, bone_names):
-    verts = []
+def get_breast_vertex_positions(obj, bone_names):
+    """获取胸部权重（各胸部骨骼权重之和）大于WEIGHT_THRESHOLD的顶点的世界坐标（N×3）"""
     mesh = obj.data
-
+    # 预先将骨骼名称转换为顶点组索引，避免逐个顶点组查询名称
+    bone_name_set = set(bone_names)
+    group_indices = {vg.index for vg in obj.vertex_groups if vg.name in bone_name_set}
+    indices = []
     for v in mesh.vertices:
         total_weight = 0.0
         for g in v.groups:
-            vg_name = obj.vertex_groups[g.group].name
-            if vg_name in bone_names:
+            if g.group in group_indices:
                 total_weight += g.weight
-
         if total_weight > WEIGHT_THRESHOLD:
-            verts.append(v)
+            indices.append(v.index)
 
-    return verts
+    cos = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", cos)
+    matrix = np.array(obj.matrix_world)
+    return cos.reshape(-1, 3)[indices] @ matrix[:3, :3].T + matrix[:3, 3]
 
 
 def remove_invalid_rigidbody_joint(root, rbs_to_remove, kept_joints):
@@ -944,16 +1173,17 @@ def remove_invalid_rigidbody_joint(root, rbs_to_remove, kept_joints):
     original_mode = bpy.context.active_object.mode
     armature, objs, joint_parent, rb_parent = get_mmd_info(root)
 
+    graph = JointGraph.from_objects(joint_parent, rb_parent)
+    kept_joint_names = set(kept_joints.keys())
+
     # （预先）删除无效关节
-    for joint in reversed(joint_parent.children):
-        if joint.name in kept_joints.keys():
-            continue
-        rigidbody1 = joint.rigid_body_constraint.object1
-        rigidbody2 = joint.rigid_body_constraint.object2
-        if any(r not in rb_parent.children for r in [rigidbody1, rigidbody2]):
-            bpy.data.objects.remove(joint, do_unlink=True)
+    invalid_joints = graph.dangling_joints() - kept_joint_names
+    for joint_name in invalid_joints:
+        bpy.data.objects.remove(graph.joints[joint_name], do_unlink=True)
+    graph.remove_joints(invalid_joints)
 
     # 处理刚体
+    rb_names_to_remove = {rb.name for rb in rbs_to_remove}
     rbs_to_delete = set()
     for rigidbody in rb_parent.children:
         # 虽然这些刚体在删除对应骨骼时会一并被删除，但它们有可能被错误地绑定到非胸部骨骼上，所以在此强制删除
@@ -966,9 +1196,7 @@ def remove_invalid_rigidbody_joint(root, rbs_to_remove, kept_joints):
             rbs_to_delete.add(rigidbody)
             continue
         # 删除衝突刚体，防止重复创建
-        addon_rb = [f"{n}衝突" for n in LIMB_RB_NAMES + [BREAST_JP_NAME_L, BREAST_JP_NAME_R]] + ["上半身2_R",
-                                                                                                 "上半身2_L"]
-        if name_j in addon_rb:
+        if name_j in ADDON_RB_NAMES:
             rbs_to_delete.add(rigidbody)
             continue
         match = check_girlsfrontline_breast_bones_and_rbs(name_j)
@@ -976,114 +1204,37 @@ def remove_invalid_rigidbody_joint(root, rbs_to_remove, kept_joints):
             rbs_to_delete.add(rigidbody)
             continue
         # 关联骨骼不存在则删除这个刚体
-        if rigidbody.name in rbs_to_remove:
+        if rigidbody.name in rb_names_to_remove:
             rbs_to_delete.add(rigidbody)
             continue
         # 当刚体没有关联骨骼时，刚体可能会被Joint关联，所以不会导致问题，因此这种情况不处理，取决于模型本身
     # 统一删除刚体
+    graph.remove_rigid_bodies([rb.name for rb in rbs_to_delete])
     for rb_to_delete in rbs_to_delete:
         bpy.data.objects.remove(rb_to_delete, do_unlink=True)
 
-    # 删除无效关节
-    for joint in reversed(joint_parent.children):
-        if joint.name in kept_joints.keys():
-            continue
-        rigidbody1 = joint.rigid_body_constraint.object1
-        rigidbody2 = joint.rigid_body_constraint.object2
-        if not rigidbody1 or not rigidbody2:
-            bpy.data.objects.remove(joint, do_unlink=True)
+    # 删除无效关节（端点刚体已被删除）
+    invalid_joints = graph.dangling_joints() - kept_joint_names
+    for joint_name in invalid_joints:
+        bpy.data.objects.remove(graph.joints[joint_name], do_unlink=True)
+    graph.remove_joints(invalid_joints)
 
     bpy.ops.object.mode_set(mode=original_mode)
 
 
-def format_factor(factor, decimals=2):
-    return f"{factor:.{decimals}f}".rstrip('0').rstrip('.')
-
-
 def set_index(obj, index):
     m = RB_JOINT_PREFIX_REGEXP.match(obj.name)
     name = m.group('name') if m else obj.name
     obj.name = '%s_%s' % (int2base(index, 36, 3), name)
 
 
-def expand_accessory_bone_names(armature, accessory_breast_rel_map):
-    """根据胸饰骨骼关系表递归扩展所有子骨骼名称"""
-    bones = armature.data.bones
-    accessory_bone_names = list(accessory_breast_rel_map.keys())
-
-    def recurse(target_name, collected):
-        bone = bones.get(target_name)
-        if not bone:
-            return
-        for child in bone.children:
-            if child.name not in collected:
-                collected.append(child.name)
-                recurse(child.name, collected)
-
-    # 对每个起始骨骼递归扩展
-    for root_name in list(accessory_bone_names):
-        recurse(root_name, accessory_bone_names)
-
-    return accessory_bone_names
-
-
-def recursive_search(props):
-    """寻找指定路径下各个子目录中，时间最新且未进行处理的那个模型"""
-    batch = props.batch
-    directory = batch.directory
-    search_strategy = batch.search_strategy
-    threshold = batch.threshold
-    suffix = batch.suffix
-    conflict_strategy = batch.conflict_strategy
-
-    results = []
-    total_pmx_count = 0
-    for root, dirs, files in os.walk(directory):
-        pmx_files = [f for f in files if f.lower().endswith(('.pmx', '.pmd'))]
-        if not pmx_files:
-            continue
-        total_pmx_count += len(pmx_files)
-
-        print(f"当前模型目录：{root}")
-        # 原模型文件
-        original_files = []
-        # 原模型文件（已处理）
-        processed_files = set()
-        # 经检索模式和冲突时筛选后的模型文件
-        selected = []
-        processed_pattern = re.compile(r'^(.+)' + suffix + r'.*')
-        for f in pmx_files:
-            if os.path.getsize(os.path.join(root, f)) <= threshold:
-                continue
-            name_no_ext, ext = os.path.splitext(f)
-            m = processed_pattern.match(name_no_ext)
-            if m:
-                original_name = m.groups()[0]
-                original_name = original_name[:-1] if original_name.endswith(" ") else original_name
-                processed_files.add(f"{original_name}{ext}")
-            else:
-                original_files.append(f)
-
-        print(f"原模型文件:{original_files}")
-        print(f"原模型文件（已优化过）:{processed_files}")
-        if search_strategy == 'LATEST':
-            selected = [max(original_files, key=lambda x: os.path.getmtime(os.path.join(root, x)))]
-        elif search_strategy == 'ALL':
-            selected = original_files
-        print(f"原模型文件（检索模式-{search_strategy}）：{selected}")
-        if conflict_strategy == 'SKIP':
-            selected = [f for f in selected if f not in processed_files]
-        else:
-            pass
-        print(f"原模型文件（检索模式-{search_strategy} 冲突时-{conflict_strategy}）：{selected}")
-
-        results.extend(os.path.join(root, f) for f in selected)
-
-    msg = bpy.app.translations.pgettext_iface("Actual files to process: {}. Total files: {}, skipped: {}").format(
-        len(results), total_pmx_count, total_pmx_count - len(results)
-    )
-    print(msg)
-    return results
+def recursive_search(spec):
+    """
+    寻找指定路径下各个子目录中，时间最新且未进行处理的那个模型
+    返回可迭代的FileDiscovery，每解析完一个目录即返回其中的待处理文件
+    """
+    # 扫描索引：仅重新列举发生变化的目录
+    return FileDiscovery(spec, ScanIndex(get_scan_index_path(spec.directory)))
 
 
 def check_batch_props(operator, batch):
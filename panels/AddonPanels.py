@@ -1,7 +1,8 @@
-import addon_utils
 import bpy
 
-from ..operators.set_rgba_operators import SetRgbaOperator
+from ..operators.session_operators import EndSessionOperator, ExportSessionOperator, StartSessionOperator
+from ..operators.set_rgba_operators import PreflightOperator, SetRgbaOperator
+from ..utils import get_own_addon_version
 
 
 class RGBAPanel(bpy.types.Panel):
@@ -69,10 +70,30 @@ class RGBAPanel(bpy.types.Panel):
         batch_ui.prop(batch, "search_strategy")
         batch_ui.prop(batch, "threshold")
         batch_ui.prop(batch, "suffix")
+        batch_ui.prop(batch, "variants")
         batch_ui.prop(batch, "conflict_strategy")
-
-
-        col.operator(SetRgbaOperator.bl_idname, text=SetRgbaOperator.bl_label)
+        batch_ui.prop(batch, "prefetch_count")
+        row = batch_ui.row()
+        row.prop(batch, "use_snapshot_cache")
+        size_row = row.row()
+        size_row.enabled = batch.use_snapshot_cache
+        size_row.prop(batch, "snapshot_cache_size")
+        batch_ui.prop(batch, "resume")
+        batch_ui.prop(batch, "low_memory")
+        batch_ui.prop(batch, "profile")
+
+
+        row = col.row()
+        row.operator(PreflightOperator.bl_idname, text=PreflightOperator.bl_label)
+        row.operator(SetRgbaOperator.bl_idname, text=SetRgbaOperator.bl_label)
+
+        session_box = col.box()
+        session_ui = session_box.column()
+        session_ui.prop(props, "session_file")
+        row = session_ui.row()
+        row.operator(StartSessionOperator.bl_idname, text=StartSessionOperator.bl_label)
+        row.operator(ExportSessionOperator.bl_idname, text=ExportSessionOperator.bl_label)
+        row.operator(EndSessionOperator.bl_idname, text=EndSessionOperator.bl_label)
 
 
 class AboutPanel(bpy.types.Panel):
@@ -91,7 +112,5 @@ class AboutPanel(bpy.types.Panel):
         col = layout.column(align=True)
 
         # 版本号
-        col.label(
-            text='版本号：' + str([addon.bl_info.get('version', (-1, -1, -1)) for addon in addon_utils.modules() if
-                                  addon.bl_info['name'] == 'mmd_jiggle_bones'][0]))
+        col.label(text='版本号：' + str(get_own_addon_version()))
         col.label(text='作者：KafeiMMD')
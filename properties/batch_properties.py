@@ -20,7 +20,9 @@ class BatchProperty(bpy.types.PropertyGroup):
         description="当模型目录中已存在由插件生成的模型文件时，如何进行后续操作",
         items=[
             ("SKIP", "跳过", "忽略对应的源模型文件，不再执行后续操作"),
-            ("RE_GENERATE", "重新生成", "生成一个新的模型文件，并保留原有文件")
+            ("RE_GENERATE", "重新生成", "生成一个新的模型文件，并保留原有文件"),
+            ("UPDATE", "仅更新", "源模型文件内容、插件版本或参数发生变化时才重新生成，并覆盖原有文件；"
+                               "否则跳过。依据为插件记录的处理结果，首次使用时会全部重新生成")
         ],
         default="RE_GENERATE"
     )
@@ -30,6 +32,54 @@ class BatchProperty(bpy.types.PropertyGroup):
         default='RGBA',
         maxlen=50,  # 防止用户随意输入
     )
+    variants: bpy.props.StringProperty(
+        name="多版本输出",
+        description="以逗号分隔的抖动系数，如“0.3, 0.5, 0.8”或“soft=0.3, hard=0.8”。"
+                    "模型仅拟合一次，每个系数输出一个“名称后缀_版本名称”的文件。"
+                    "默认模式下系数即抖动强度，自定义模式下系数与自定义限制相乘。为空时仅输出一个文件",
+        default='',
+    )
+    prefetch_count: bpy.props.IntProperty(
+        name="预读数量",
+        description="处理当前模型时，在后台提前读取后续模型文件及其纹理的数量，模型位于网络存储等较慢的位置时可加快处理。0表示不预读",
+        default=2,
+        min=0,
+        max=16,
+    )
+    use_snapshot_cache: bpy.props.BoolProperty(
+        name="导入缓存",
+        description="将导入后的源模型保存为压缩的.blend快照（位于插件缓存目录），再次处理同一模型时直接载入快照，"
+                    "无需重新解析模型文件。适用于反复调整参数后重新处理同一批模型",
+        default=False,
+    )
+    snapshot_cache_size: bpy.props.IntProperty(
+        name="缓存上限",
+        description="导入缓存的容量上限（单位：MB），超出时优先删除最久未使用的快照",
+        default=4096,
+        min=64,
+        max=1024 * 1024,
+    )
+    resume: bpy.props.BoolProperty(
+        name="继续上次",
+        description="从上次中断（如Blender崩溃）的位置继续处理。依据为插件记录的批处理日志："
+                    "跳过上次已完成的文件与因模型本身问题而失败的文件，重新处理中断时正在处理的文件与因暂时性错误而失败的文件；"
+                    "参数发生变化的文件会重新处理",
+        default=False,
+    )
+    low_memory: bpy.props.BoolProperty(
+        name="低内存模式",
+        description="处理期间暂时关闭全局撤销，避免撤销系统在整个批处理中持续占用内存；"
+                    "每个模型处理完成后，检查物体、网格、材质、图像、文本等数据块是否恢复到处理开始时的数量，"
+                    "并删除残留的数据块。适用于一次处理大量模型",
+        default=False,
+    )
+    profile: bpy.props.BoolProperty(
+        name="性能分析",
+        description="记录每个模型各处理阶段（导入、拟合、合并、权重转移、碰撞设置、导出等）的耗时、CPU时间、常驻内存增量与物体数量，"
+                    "处理完成后在控制台输出汇总，并在插件缓存目录中保存Chrome Trace格式的结果。"
+                    "也可通过环境变量MMD_JIGGLE_PROFILE=1开启",
+        default=False,
+    )
     search_strategy: bpy.props.EnumProperty(
         name="检索模式",
         description="如果检索到多个符合条件的文件，应该如何处理",
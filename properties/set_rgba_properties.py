@@ -3,6 +3,7 @@ import math
 import bpy
 
 from .batch_properties import BatchProperty
+from ..core.spec import DEFAULT_LIMITS
 
 
 class SetRgbaProperty(bpy.types.PropertyGroup):
@@ -25,12 +26,13 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         max=1.0,
         precision=2,
         step=1,
+        update=lambda self, context: self.update_session(context, "limits"),
     )
 
     limit_lin_x_lower: bpy.props.FloatProperty(
         name="移动下限X",
         description="",
-        default=-0.04,
+        default=DEFAULT_LIMITS["limit_lin_x_lower"],
         min=-0.08,
         max=0,
         precision=3,
@@ -40,7 +42,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     limit_lin_x_upper: bpy.props.FloatProperty(
         name="移动上限X",
         description="",
-        default=0.04,
+        default=DEFAULT_LIMITS["limit_lin_x_upper"],
         min=0,
         max=0.08,
         precision=3,
@@ -55,7 +57,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     limit_lin_y_lower: bpy.props.FloatProperty(
         name="移动下限Y",
         description="",
-        default=-0.032,
+        default=DEFAULT_LIMITS["limit_lin_y_lower"],
         min=-0.08,
         max=0,
         precision=3,
@@ -65,7 +67,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     limit_lin_y_upper: bpy.props.FloatProperty(
         name="移动上限Y",
         description="",
-        default=0.024,
+        default=DEFAULT_LIMITS["limit_lin_y_upper"],
         min=0,
         max=0.08,
         precision=3,
@@ -81,7 +83,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     limit_lin_z_lower: bpy.props.FloatProperty(
         name="移动下限Z",
         description="",
-        default=-0.04,
+        default=DEFAULT_LIMITS["limit_lin_z_lower"],
         min=-0.08,
         max=0,
         precision=3,
@@ -91,7 +93,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     limit_lin_z_upper: bpy.props.FloatProperty(
         name="移动上限Z",
         description="",
-        default=0.04,
+        default=DEFAULT_LIMITS["limit_lin_z_upper"],
         min=0,
         max=0.08,
         precision=3,
@@ -109,7 +111,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         name="角度下限X",
         description="",
         subtype="ANGLE",
-        default=math.radians(-45),
+        default=DEFAULT_LIMITS["limit_ang_x_lower"],
         max=math.radians(0),
         min=math.radians(-180),
         update=lambda self, context: self.update_limits(context, "limit_ang_x_lower"),
@@ -118,7 +120,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         name="角度上限X",
         description="",
         subtype="ANGLE",
-        default=math.radians(45),
+        default=DEFAULT_LIMITS["limit_ang_x_upper"],
         max=math.radians(180),
         min=math.radians(0),
         update=lambda self, context: self.update_limits(context, "limit_ang_x_upper"),
@@ -132,7 +134,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         name="角度下限Y",
         description="",
         subtype="ANGLE",
-        default=math.radians(-15),
+        default=DEFAULT_LIMITS["limit_ang_y_lower"],
         max=math.radians(0),
         min=math.radians(-180),
         update=lambda self, context: self.update_limits(context, "limit_ang_y_lower"),
@@ -141,7 +143,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         name="角度上限Y",
         description="",
         subtype="ANGLE",
-        default=math.radians(15),
+        default=DEFAULT_LIMITS["limit_ang_y_upper"],
         max=math.radians(180),
         min=math.radians(0),
         update=lambda self, context: self.update_limits(context, "limit_ang_y_upper"),
@@ -155,7 +157,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         name="角度下限Z",
         description="",
         subtype="ANGLE",
-        default=math.radians(-60),
+        default=DEFAULT_LIMITS["limit_ang_z_lower"],
         max=math.radians(0),
         min=math.radians(-180),
         update=lambda self, context: self.update_limits(context, "limit_ang_z_lower"),
@@ -164,7 +166,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         name="角度上限Z",
         description="",
         subtype="ANGLE",
-        default=math.radians(60),
+        default=DEFAULT_LIMITS["limit_ang_z_upper"],
         max=math.radians(180),
         min=math.radians(0),
         update=lambda self, context: self.update_limits(context, "limit_ang_z_upper"),
@@ -183,6 +185,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         max=2,
         precision=2,
         step=1,
+        update=lambda self, context: self.update_session(context, "scale"),
     )
 
     collision: bpy.props.EnumProperty(
@@ -193,6 +196,7 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
             ("NO_COLLISION", "无碰撞", "胸部不参与任何物理碰撞计算")
         ],
         default="DEFAULT",
+        update=lambda self, context: self.update_session(context, "collision"),
     )
 
     collision_group_number: bpy.props.IntProperty(
@@ -205,6 +209,15 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     )
     batch: bpy.props.PointerProperty(type=BatchProperty)
 
+    session_file: bpy.props.StringProperty(
+        name="调整模型",
+        description="调整会话中使用的源模型文件\n"
+                    "开始调整后模型仅移植一次并保留在场景中，修改抖动、刚体缩放、碰撞参数时仅重新设置受影响的部分，"
+                    "确认效果后再导出",
+        subtype='FILE_PATH',
+        default='',
+    )
+
     @staticmethod
     def register():
         bpy.types.Scene.mmd_jiggle_tools_set_rgba = bpy.props.PointerProperty(type=SetRgbaProperty)
@@ -216,7 +229,15 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
     def skip_13(self, context):
         # 13 是手臂的碰撞组，避免使用13
         if self.collision_group_number == 13:
+            # 重新赋值会再次触发本方法，由该次调用更新调整会话
             self.collision_group_number = 12
+            return
+        self.update_session(context, "collision")
+
+    def update_session(self, context, stage):
+        """调整会话进行中时，按修改的参数重新设置会话模型中受影响的部分"""
+        from ..operators.session_operators import update_session
+        update_session(context, stage)
 
     def _sync_pair(self, sync, lower_attr, upper_attr, changed_property):
         if not sync:
@@ -241,9 +262,11 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
         self._sync_pair(self.limit_ang_x_sync, "limit_ang_x_lower", "limit_ang_x_upper", changed_property)
         self._sync_pair(self.limit_ang_y_sync, "limit_ang_y_lower", "limit_ang_y_upper", changed_property)
         self._sync_pair(self.limit_ang_z_sync, "limit_ang_z_lower", "limit_ang_z_upper", changed_property)
+        self.update_session(context, "limits")
 
     def set_default_limits(self, context, changed_property):
         if self.jiggle_adjustment_mode != "CUSTOM":
+            self.update_session(context, "limits")
             return
 
         struct = context.scene.mmd_jiggle_tools_set_rgba
@@ -259,3 +282,4 @@ class SetRgbaProperty(bpy.types.PropertyGroup):
                                    ]:
                 default = prop.default
                 setattr(struct, prop.identifier, default)
+        self.update_session(context, "limits")
@@ -1,15 +1,28 @@
+import hashlib
+import os
 import re
+import sys
 import time
 
-import addon_utils
 import bpy
 
 # 最大重试次数
 MAX_RETRIES = 5
+# 导出中的临时文件后缀，导出完成后重命名为目标文件
+PARTIAL_SUFFIX = ".partial"
+# 插件元数据缓存：enabled为读取时已启用插件的模块名称集合，versions为 插件名称 → 版本号
+_addon_metadata = {"enabled": None, "versions": {}, "own_version": None}
+# 低内存模式下，每个模型处理完成后需恢复到基线数量的数据块类型
+TRACKED_DATA_TYPES = ("objects", "meshes", "armatures", "materials", "images", "textures", "texts", "collections",
+                      "actions", "node_groups")
 # 临时集合名称
 TMP_COLLECTION_NAME = "KAFEI临时集合"
 # 导入pmx生成的txt文件pattern
 TXT_INFO_PATTERN = re.compile(r'(.*)(_e(\.\d{3})?)$')
+# 扩展清单文件，以扩展形式安装时Blender从中读取插件的元数据
+MANIFEST_FILE = os.path.join(os.path.dirname(__file__), "blender_manifest.toml")
+# 插件缓存目录名称（位于Blender用户配置目录下）
+CACHE_DIR_NAME = "mmd_jiggle_bones_cache"
 
 
 def find_pmx_root():
@@ -125,11 +138,83 @@ def import_pmx(filepath: str) -> bool:
     ))
 
 
+def import_pmx_cached(filepath: str, source_hash: str, store) -> bool:
+    """导入PMX文件，优先从导入快照（SnapshotStore）中追加，未命中时导入PMX文件并保存快照"""
+    snapshot_path = store.lookup(source_hash)
+    if snapshot_path:
+        try:
+            load_snapshot(snapshot_path)
+            print(f"已从导入快照中载入，文件：{filepath}，快照：{snapshot_path}")
+            return True
+        except Exception as e:
+            print(f"导入快照载入失败，将重新导入PMX文件，快照：{snapshot_path}，错误：{e}")
+
+    import_pmx(filepath)
+    snapshot_path = store.path_for(source_hash)
+    try:
+        save_snapshot(bpy.context.active_object, snapshot_path)
+        store.evict(keep=snapshot_path)
+    except Exception as e:
+        # 快照仅用于加速，保存失败不影响本次处理
+        print(f"导入快照保存失败，快照：{snapshot_path}，错误：{e}")
+    return True
+
+
+def get_objects_recursive(obj):
+    """获取物体及其所有子级物体"""
+    objects = [obj]
+    for child in obj.children:
+        objects.extend(get_objects_recursive(child))
+    return objects
+
+
+def save_snapshot(root, snapshot_path):
+    """将刚导入的模型（空物体及其所有子级，以及模型注释文本）保存为压缩的.blend文件"""
+    datablocks = set(get_objects_recursive(root))
+    for text_name in (root.mmd_root.comment_text, root.mmd_root.comment_e_text):
+        text = bpy.data.texts.get(text_name)
+        if text is not None:
+            datablocks.add(text)
+    tmp_path = snapshot_path + ".tmp"
+    bpy.data.libraries.write(tmp_path, datablocks, compress=True)
+    os.replace(tmp_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path):
+    """将快照中的模型追加到当前激活的集合中，并选中激活其空物体（与导入PMX文件后的状态一致）"""
+    collection = bpy.context.view_layer.active_layer_collection.collection
+    with bpy.data.libraries.load(snapshot_path, link=False) as (data_from, data_to):
+        text_names = list(data_from.texts)
+        data_to.objects = list(data_from.objects)
+        data_to.texts = text_names
+
+    root = None
+    for obj in data_to.objects:
+        collection.objects.link(obj)
+        if obj.mmd_type == 'ROOT':
+            root = obj
+    if root is None:
+        raise RuntimeError("快照中未找到模型")
+
+    # 追加时文本可能因重名而被重命名
+    renamed = {old: text.name for old, text in zip(text_names, data_to.texts) if text is not None}
+    root.mmd_root.comment_text = renamed.get(root.mmd_root.comment_text, root.mmd_root.comment_text)
+    root.mmd_root.comment_e_text = renamed.get(root.mmd_root.comment_e_text, root.mmd_root.comment_e_text)
+
+    deselect_all_objects()
+    select_and_activate(root)
+    return root
+
+
 def export_pmx(filepath: str) -> bool:
-    """导出PMX文件，失败时自动重试"""
+    """
+    导出PMX文件，失败时自动重试
+    先导出到临时文件，完成后再重命名为目标文件，中断时不会留下不完整的模型文件
+    """
     v = get_mmd_tools_version()
+    partial_path = filepath + PARTIAL_SUFFIX
     params = {
-        'filepath': filepath,
+        'filepath': partial_path,
         'scale': 12.5,
     }
     if v < (4, 5, 2):
@@ -140,6 +225,7 @@ def export_pmx(filepath: str) -> bool:
     for attempt in range(MAX_RETRIES):
         try:
             bpy.ops.mmd_tools.export_pmx('EXEC_DEFAULT', **params)
+            os.replace(partial_path, filepath)
             print(bpy.app.translations.pgettext_iface(
                 f"Export successful, file: {filepath}, retry count: {attempt}"
             ))
@@ -151,6 +237,8 @@ def export_pmx(filepath: str) -> bool:
             time.sleep(1)
 
     # 全部重试失败后抛出异常
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
     raise Exception(bpy.app.translations.pgettext_iface(
         f"Continuous export error, please check. File path: {filepath}"
     ))
@@ -230,11 +318,51 @@ def get_collection(collection_name):
     return collection
 
 
-def get_addon_version(name):
+def get_enabled_addons():
+    """已启用插件的模块名称集合（插件启用/禁用时变化）"""
+    return frozenset(addon.module for addon in bpy.context.preferences.addons)
+
+
+def refresh_addon_metadata():
+    """
+    重新读取插件元数据并缓存
+    addon_utils.modules()会遍历并解析磁盘上所有已安装的插件，耗时较长，仅在首次使用时及插件启用状态变化时调用
+    """
+    import addon_utils
+    versions = {}
     for addon in addon_utils.modules():
-        if addon.bl_info.get('name') == name:
-            return addon.bl_info.get('version', (-1, -1, -1))
-    return -1, -1, -1
+        versions.setdefault(addon.bl_info.get('name'), addon.bl_info.get('version', (-1, -1, -1)))
+    _addon_metadata["enabled"] = get_enabled_addons()
+    _addon_metadata["versions"] = versions
+
+
+def get_addon_metadata():
+    """插件元数据缓存，已启用的插件发生变化时重新读取"""
+    if _addon_metadata["enabled"] != get_enabled_addons():
+        refresh_addon_metadata()
+    return _addon_metadata
+
+
+def get_addon_version(name):
+    return tuple(get_addon_metadata()["versions"].get(name, (-1, -1, -1)))
+
+
+def get_own_addon_version():
+    """
+    本插件的版本号，读取插件包自身的元数据而不按名称查找
+    以扩展形式安装时插件名称为清单中的name（“MMD Jiggle Bones”），按名称查找将得到(-1, -1, -1)
+    优先读取扩展清单中的version，无法读取时（如Python 3.11以下没有tomllib）取bl_info中的version
+    """
+    if _addon_metadata["own_version"] is None:
+        version = None
+        try:
+            import tomllib
+            with open(MANIFEST_FILE, "rb") as f:
+                version = tuple(int(v) for v in tomllib.load(f)["version"].split("."))
+        except (ImportError, OSError, KeyError, ValueError):
+            pass
+        _addon_metadata["own_version"] = version or tuple(sys.modules[__package__].bl_info["version"])
+    return _addon_metadata["own_version"]
 
 
 def get_mmd_tools_version():
@@ -251,33 +379,45 @@ def is_mmd_tools_enabled():
     4.2版本 临时为 bl_ext.user_default.mmd_tools
     4.3版本及以后 bl_ext.blender_org.mmd_tools
     """
-    for addon in bpy.context.preferences.addons:
-        if addon.module.endswith("mmd_tools"):
-            return True
-    return False
+    return any(module.endswith("mmd_tools") for module in get_addon_metadata()["enabled"])
 
 
-def int2base(x, base, width=0):
-    """
-    Method to convert an int to a base
-    Source: http://stackoverflow.com/questions/2267362
-    """
-    import string
-    digs = string.digits + string.ascii_uppercase
-    assert (2 <= base <= len(digs))
-    digits, negtive = '', False
-    if x <= 0:
-        if x == 0:
-            return '0' * max(1, width)
-        x, negtive, width = -x, True, width - 1
-    while x:
-        digits = digs[x % base] + digits
-        x //= base
-    digits = '0' * (width - len(digits)) + digits
-    if negtive:
-        digits = '-' + digits
-    return digits
-
-
-def is_dummy_bone(name):
-    return name.startswith("_dummy_") or name.startswith("_shadow_")
+def get_cache_dir(*sub_dirs):
+    """获取插件缓存目录，不存在则新建"""
+    path = os.path.join(bpy.utils.user_resource('CONFIG', path=CACHE_DIR_NAME, create=True), *sub_dirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_directory_key(directory):
+    return hashlib.sha1(os.path.normcase(os.path.abspath(directory)).encode("utf-8")).hexdigest()[:16]
+
+
+def get_scan_index_path(directory):
+    """获取模型目录对应的扫描索引文件路径"""
+    return os.path.join(get_cache_dir("scan_index"), f"{get_directory_key(directory)}.json")
+
+
+def get_result_manifest_path(directory):
+    """获取模型目录对应的处理结果清单文件路径"""
+    return os.path.join(get_cache_dir("result_manifest"), f"{get_directory_key(directory)}.jsonl")
+
+
+def get_data_names():
+    """获取各类型数据块的名称集合，作为批处理开始时的基线"""
+    return {attr: {id_data.name_full for id_data in getattr(bpy.data, attr)} for attr in TRACKED_DATA_TYPES}
+
+
+def get_leaked_data(baseline):
+    """与基线相比新增的数据块，返回 {类型: [数据块, ...]}"""
+    leaked = {}
+    for attr, names in baseline.items():
+        new_data = [id_data for id_data in getattr(bpy.data, attr) if id_data.name_full not in names]
+        if new_data:
+            leaked[attr] = new_data
+    return leaked
+
+
+def get_journal_path(directory):
+    """获取模型目录对应的批处理日志文件路径"""
+    return os.path.join(get_cache_dir("journal"), f"{get_directory_key(directory)}.jsonl")